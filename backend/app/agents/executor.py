@@ -2,29 +2,55 @@ from __future__ import annotations
 
 """LangChain-free tool agent using OpenAI function-calling.
 
-This helper executes a single-turn conversation with automatic tool calls.
-If the AI decides to call one of the registered tools, we run it and pass
-its result back so the model can produce the final answer.
+This helper executes a conversation turn with automatic tool calls.  While
+the AI keeps calling registered tools we run them and pass their results
+back, for up to `max_steps` rounds within a token budget and wall-clock
+deadline, until the model produces the final answer.
 """
 
 from typing import List, Dict, Any
+import asyncio
 import json
+import logging
+import time
 
-from openai import AsyncOpenAI
+from app.config import (
+    TOOL_MAX_CONCURRENCY,
+    TOOL_AGENT_MAX_STEPS,
+    TOOL_AGENT_TOKEN_BUDGET,
+    TOOL_AGENT_DEADLINE_SEC,
+)
+from app.services.llm_gateway import llm_gateway
+from app.services.model_router import model_router, INTERACTIVE
+from app.services.supabase_service import USER_IDENTITY_COLUMNS, supabase_service
+from app.utils.deadline import remaining as request_time_left
+from .tools import tool_registry  # tools are imported on first use
 
-from app.config import OPENAI_API_KEY
-from .tools import ALL_TOOLS  # list of instantiated tools
+logger = logging.getLogger(__name__)
+
+# Extra time allowed for the wrap-up completion once the deadline has passed
+_FINAL_ANSWER_GRACE_SEC = 15.0
 
 
 class ToolAgent:
     """Lightweight wrapper around OpenAI function-calling + EDGE tools."""
 
-    def __init__(self, model: str = "gpt-3.5-turbo") -> None:
-        self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-        self.model = model
-        self.tools = ALL_TOOLS
-        self._specs = [{"type": "function", "function": t.openai_spec()} for t in self.tools]
-        self._tool_map = {t.name: t for t in self.tools}
+    def __init__(
+        self,
+        model: str | None = None,
+        *,
+        max_steps: int = TOOL_AGENT_MAX_STEPS,
+        token_budget: int = TOOL_AGENT_TOKEN_BUDGET,
+        deadline_sec: float = TOOL_AGENT_DEADLINE_SEC,
+    ) -> None:
+        self.gateway = llm_gateway
+        self.router = model_router
+        self.model = model  # None = let the router pick per policy
+        self.max_steps = max_steps
+        self.token_budget = token_budget
+        self.deadline_sec = deadline_sec
+        self.registry = tool_registry
+        self._specs = [{"type": "function", "function": spec} for spec in self.registry.openai_specs()]
 
     # ------------------------------------------------------------------
     # Public API
@@ -72,10 +98,10 @@ class ToolAgent:
         #    fails to call `create_task`.  This is intentionally simple and
         #    should be refined over time.
         # ------------------------------------------------------------------
-        async def _auto_create_tasks(raw: str) -> list[str]:
+        async def _auto_task_rows(raw: str) -> list[Dict[str, Any]]:
             """Detect phrases like 'need to <verb>' or 'update the X' and
-            create pending tasks.  Returns human-readable summaries of any
-            tasks we created so we can mention them in the assistant reply."""
+            build pending task rows for them.  Nothing is written here; the
+            rows are inserted once the turn has produced an answer."""
 
             import re
 
@@ -95,10 +121,8 @@ class ToolAgent:
                 elif re.match(r"^(?:also\s+|then\s+)?(update|gather|create|build|write|design|implement|fix)\b", part, re.I):
                     candidates.append(part[0].upper() + part[1:])
 
-            summaries: list[str] = []
-            create_tool = self._tool_map.get("create_task")
-            if not create_tool or not candidates:
-                return summaries  # nothing to do
+            if not user_id or not candidates:
+                return []  # nothing to do
 
             # crude role inference helper
             def infer_role(desc: str) -> str:
@@ -109,99 +133,205 @@ class ToolAgent:
                     return "CMO"
                 return "CEO"
 
-            for desc in candidates:
-                try:
-                    await create_tool.run(
-                        user_id=user_id,
-                        assigned_to_role=infer_role(desc),
-                        description=desc,
-                        status="pending",
-                    )
-                    summaries.append(desc)
-                except Exception:
-                    # We swallow errors to avoid blocking the main chat flow
-                    pass
-            return summaries
-
-        auto_tasks = await _auto_create_tasks(user_message)
-
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            tools=self._specs,
-            tool_choice="auto",
-        )
-        choice = response.choices[0]
-        if choice.finish_reason == "tool_calls":
-            # Execute each requested tool (naïvely, sequentially)
-            tool_outputs = {}
-            for call in choice.message.tool_calls:
-                # openai>=1.0: each call has .function with name & arguments
-                name = getattr(call, "name", None)
-                if name is None and hasattr(call, "function"):
-                    name = call.function.name  # type: ignore
-                    arguments_str = call.function.arguments  # type: ignore
-                else:
-                    arguments_str = call.arguments  # type: ignore
-
-                args = json.loads(arguments_str or "{}")
-                tool = self._tool_map.get(name)
-                if not tool:
-                    tool_outputs[name] = f"[Error] unknown tool {name}"
-                    continue
+            try:
+                # Callers pass the auth ID; older clients send the DB user id
+                db_user = (
+                    await supabase_service.get_user_by_auth_id(user_id, columns=USER_IDENTITY_COLUMNS)
+                    or await supabase_service.get_user_by_id(user_id, columns=USER_IDENTITY_COLUMNS)
+                )
+                if not db_user:
+                    logger.warning(f"Auto task creation skipped: no user for id {user_id}")
+                    return []
+            except Exception as exc:
+                logger.warning(f"Auto task creation failed for {len(candidates)} task(s): {exc!r}")
+                return []
+            return [
+                {
+                    "user_id": db_user["id"],
+                    "auth_user_id": db_user.get("auth_user_id"),
+                    "assigned_to_role": infer_role(desc),
+                    "description": desc,
+                    "status": "pending",
+                }
+                for desc in candidates
+            ]
+
+        # Look the user up concurrently with the agent loop below, but insert
+        # only after the loop has answered: an insert already running in the
+        # db pool cannot be cancelled, so a failed or abandoned turn must
+        # not have started one (as with /chat's _finalize_chat).
+        auto_tasks_job = asyncio.create_task(_auto_task_rows(user_message))
+        try:
+            final_answer = await self._agent_loop(messages, user_id)
+        except BaseException:
+            auto_tasks_job.cancel()
+            raise
+
+        auto_tasks: list[str] = []
+        try:
+            rows = await auto_tasks_job
+            # One insert request for every candidate
+            await supabase_service.create_tasks_bulk(rows)
+            auto_tasks = [row["description"] for row in rows]
+        except Exception as exc:
+            logger.warning(f"Auto task creation failed: {exc!r}")
 
-                # Inject user_id if tool is create_task and arg missing
-                if name == "create_task" and "user_id" not in args and user_id:
-                    args["user_id"] = user_id
+        if auto_tasks:
+            bullets = "\n".join(f"• {t}" for t in auto_tasks)
+            final_answer += f"\n\nI've added the following tasks:\n{bullets}"
+        return final_answer
 
-                # Inject auth_user_id for file_manager
-                if name == "file_manager" and "auth_user_id" not in args and user_id:
-                    args["auth_user_id"] = user_id
+    async def _agent_loop(self, messages: List[Any], user_id: str | None) -> str:
+        """Run the tool-calling loop and return the model's final answer."""
 
-                # Inject auth_user_id for codebase_explorer
-                if name == "codebase_explorer" and "auth_user_id" not in args and user_id:
-                    args["auth_user_id"] = user_id
+        # ------------------------------------------------------------------
+        # 1. Agent loop: let the model call tools for up to `max_steps`
+        #    rounds, stopping early as soon as it answers without tools or
+        #    the token budget / wall-clock deadline is exhausted.  The loop
+        #    ends early enough for the wrap-up call to fit in the request's
+        #    own deadline, if there is one.
+        # ------------------------------------------------------------------
+        loop_budget = self.deadline_sec
+        request_left = request_time_left()
+        if request_left is not None:
+            loop_budget = min(loop_budget, request_left - _FINAL_ANSWER_GRACE_SEC)
+        deadline = time.monotonic() + loop_budget
+        tokens_used = 0
+        final_answer: str | None = None
+        stop_reason = "max_steps"
+        step = 0
+
+        for step in range(1, self.max_steps + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                stop_reason = "deadline"
+                break
+
+            response = await self._complete(
+                messages,
+                timeout=remaining,
+                tools=self._specs,
+                tool_choice="auto",
+            )
+            tokens_used += _total_tokens(response)
+            choice = response.choices[0]
+
+            if choice.finish_reason != "tool_calls" or not choice.message.tool_calls:
+                final_answer = (choice.message.content or "").strip()
+                stop_reason = "answered"
+                break
 
-                try:
-                    result = await tool.run(**args)
-                except Exception as exc:  # pragma: no cover
-                    result = f"[Tool execution error]: {exc}"
-                tool_outputs[name] = result
+            # Execute the requested tools concurrently, keyed by tool_call_id
+            tool_outputs = await self._run_tool_calls(choice.message.tool_calls, user_id)
 
             # Add the assistant tool call message and tool result message
             messages.append(choice.message)  # assistant with tool calls
 
             # For each tool call add a corresponding tool message
             for call in choice.message.tool_calls:
-                call_id = getattr(call, "id", None)
-                name = getattr(call, "name", None) or (call.function.name if hasattr(call, "function") else "")
-                content = json.dumps({"result": tool_outputs.get(name, "")})
+                content = json.dumps({"result": tool_outputs[call.id]["result"]}, default=str)
                 messages.append(
                     {
                         "role": "tool",
-                        "tool_call_id": call_id,
+                        "tool_call_id": call.id,
                         "content": content,
                     }
                 )
 
-            # Second completion – final answer
-            response2 = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
+            if tokens_used >= self.token_budget:
+                stop_reason = "token_budget"
+                break
+
+        logger.info(f"Tool agent stopped after {step} step(s) ({stop_reason}), {tokens_used} tokens")
+
+        # ------------------------------------------------------------------
+        # 2. Budget exhausted while the model still wanted tools – ask for a
+        #    final answer from what has been gathered so far (no tools).  The
+        #    wrap-up call gets a short grace period past the deadline.
+        # ------------------------------------------------------------------
+        if final_answer is None:
+            response = await self._complete(
+                messages,
+                timeout=max(deadline - time.monotonic(), _FINAL_ANSWER_GRACE_SEC),
             )
-            final_answer = response2.choices[0].message.content.strip()
-            if auto_tasks:
-                bullets = "\n".join(f"• {t}" for t in auto_tasks)
-                final_answer += f"\n\nI've added the following tasks:\n{bullets}"
-            return final_answer
-
-        # No tool call – just return content
-        final_answer = choice.message.content.strip()
-        if auto_tasks:
-            bullets = "\n".join(f"• {t}" for t in auto_tasks)
-            final_answer += f"\n\nI've added the following tasks:\n{bullets}"
+            final_answer = (response.choices[0].message.content or "").strip()
+
         return final_answer
 
+    async def _complete(self, messages: List[Any], **params: Any):
+        """One tool-agent completion; routed unless a model was pinned."""
+        if self.model:
+            return await self.gateway.chat_completion(
+                call_site="tool_agent", model=self.model, messages=messages, cache=False, **params
+            )
+        return await self.router.chat_completion(
+            request_class=INTERACTIVE, call_site="tool_agent", messages=messages, cache=False, **params
+        )
+
+    # ------------------------------------------------------------------
+    # Tool execution
+    # ------------------------------------------------------------------
+
+    async def _run_tool_calls(self, tool_calls: List[Any], user_id: str | None) -> Dict[str, Dict[str, Any]]:
+        """Run all *tool_calls* of one model turn concurrently.
+
+        At most ``TOOL_MAX_CONCURRENCY`` tools run at once.  Returns a dict
+        keyed by ``tool_call_id`` with each call's name, result and timing,
+        so repeated calls to the same tool do not overwrite each other.
+        """
+        semaphore = asyncio.Semaphore(TOOL_MAX_CONCURRENCY)
+
+        async def _bounded(call: Any) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._run_tool_call(call, user_id)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(_bounded(call) for call in tool_calls))
+        outputs = {call.id: result for call, result in zip(tool_calls, results)}
+        logger.info(
+            f"Ran {len(outputs)} tool call(s) in {(time.perf_counter() - started) * 1000:.0f}ms: "
+            + ", ".join(f"{o['name']}={o['elapsed_ms']:.0f}ms" for o in outputs.values())
+        )
+        return outputs
+
+    async def _run_tool_call(self, call: Any, user_id: str | None) -> Dict[str, Any]:
+        """Execute a single tool call; errors are returned as the result string."""
+        # openai>=1.0: each call has .function with name & arguments
+        name = call.function.name
+        started = time.perf_counter()
+        try:
+            args = json.loads(call.function.arguments or "{}")
+            tool = self.registry.get(name)
+            if not tool:
+                result: Any = f"[Error] unknown tool {name}"
+            else:
+                # Inject user_id if tool is create_task and arg missing
+                if name == "create_task" and "user_id" not in args and user_id:
+                    args["user_id"] = user_id
+
+                # Inject auth_user_id for file_manager
+                if name == "file_manager" and "auth_user_id" not in args and user_id:
+                    args["auth_user_id"] = user_id
+
+                # Inject auth_user_id for codebase_explorer
+                if name == "codebase_explorer" and "auth_user_id" not in args and user_id:
+                    args["auth_user_id"] = user_id
+
+                result = await tool.invoke(**args)
+        except Exception as exc:
+            result = f"[Tool execution error]: {exc}"
+        return {
+            "name": name,
+            "result": result,
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+
+
+def _total_tokens(response: Any) -> int:
+    """Return total tokens billed for *response* (0 if usage is missing)."""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", 0) or 0
+
 
 # Singleton instance (lazy)
 _tool_agent: ToolAgent | None = None
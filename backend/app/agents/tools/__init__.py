@@ -1,25 +1,19 @@
-from .scrape_website import ScrapeWebsiteTool
-from .write_notion import WriteNotionTool
-from .send_email import SendEmailTool
-from .read_pdf import ReadPDFTool
-from .create_task import CreateTaskTool
-from .search_google import SearchGoogleTool
-from .run_python import RunPythonTool
-from .summarize_text import SummarizeTextTool
-from .calendar_tool import CalendarTool
-from .file_manager import FileManagerTool
-from .codebase_explorer import CodebaseExplorerTool
+"""EDGE agent tools.
 
-ALL_TOOLS = [
-    ScrapeWebsiteTool(),
-    WriteNotionTool(),
-    SendEmailTool(),
-    ReadPDFTool(),
-    CreateTaskTool(),
-    SearchGoogleTool(),
-    RunPythonTool(),
-    SummarizeTextTool(),
-    CalendarTool(),
-    FileManagerTool(),
-    CodebaseExplorerTool(),
-] 
\ No newline at end of file
+Tools are loaded lazily through `tool_registry` (see registry.py); importing
+this package does not import any tool module.  ``ALL_TOOLS`` and the tool
+classes are still available as attributes but trigger the imports on access.
+"""
+
+from .registry import ToolRegistry, tool_registry
+
+
+def __getattr__(name: str):
+    if name == "ALL_TOOLS":
+        return tool_registry.all_tools()
+    if name.endswith("Tool"):
+        try:
+            return tool_registry.tool_class(name)
+        except KeyError:
+            pass
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
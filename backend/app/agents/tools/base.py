@@ -9,8 +9,11 @@ expose the tool's capabilities.
 """
 
 import abc
+import asyncio
 from typing import Any, Dict
 
+from app.utils import deadline
+
 
 class BaseTool(abc.ABC):
     """Abstract base class for all agent-accessible tools."""
@@ -37,6 +40,20 @@ class BaseTool(abc.ABC):
         IO-bound work (network requests, filesystem access, etc.).
         """
 
+    async def invoke(self, **kwargs: Any) -> Any:
+        """Run the tool within the current request deadline.
+
+        This is what the agent framework calls.  The tool is cancelled when
+        the request runs out of time, and not started at all if it already
+        has.
+        """
+        try:
+            return await asyncio.wait_for(self.run(**kwargs), timeout=deadline.timeout(None))
+        except asyncio.TimeoutError as exc:
+            if isinstance(exc, deadline.DeadlineExceeded):
+                raise
+            raise deadline.DeadlineExceeded(f"tool '{self.name}' ran out of time") from exc
+
     # ------------------------------------------------------------------
     # Optional helper – synchronous fallback
     # ------------------------------------------------------------------
@@ -10,7 +10,7 @@ from pathlib import Path
 from typing import List, Literal, Optional
 
 from app.models import RoleEnum, TaskStatusEnum
-from app.services.supabase_service import supabase_service
+from app.services.supabase_service import USER_IDENTITY_COLUMNS, supabase_service
 from app.utils.filesystem import get_user_workspace, is_safe_path
 from .base import BaseTool
 
@@ -92,10 +92,10 @@ class CreateTaskTool(BaseTool):
                     return f"Failed to create auto-generated resource file: {e}"
 
         # Find the user's database ID from their auth_id
-        db_user = await supabase_service.get_user_by_auth_id(user_id)
+        db_user = await supabase_service.get_user_by_auth_id(user_id, columns=USER_IDENTITY_COLUMNS)
         if not db_user:
             # Fallback for old system that used db id
-            db_user = await supabase_service.get_user_by_id(user_id)
+            db_user = await supabase_service.get_user_by_id(user_id, columns=USER_IDENTITY_COLUMNS)
             if not db_user:
                 raise ValueError(f"No user found with id or auth_id: {user_id}")
 
@@ -13,6 +13,7 @@ from typing import Optional
 
 import httpx
 
+from app.utils import deadline
 from .base import BaseTool
 
 try:
@@ -20,6 +21,9 @@ try:
 except ImportError:  # pragma: no cover
     pdfplumber = None  # type: ignore
 
+# Upper bound for downloading a PDF (further capped by the request deadline)
+_DOWNLOAD_TIMEOUT_SEC = 30.0
+
 
 class ReadPDFTool(BaseTool):
     name: str = "read_pdf"
@@ -38,7 +42,7 @@ class ReadPDFTool(BaseTool):
 
         # Download if URL
         if source.lower().startswith("http"):
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(timeout=deadline.timeout(_DOWNLOAD_TIMEOUT_SEC)) as client:
                 resp = await client.get(source)
                 resp.raise_for_status()
                 tmp_path = Path("/tmp/download.pdf")
@@ -0,0 +1,149 @@
+"""Lazy tool registry.
+
+Tools are declared in ``manifest.json`` next to this file – one entry per
+tool with its module, class and pre-computed OpenAI function spec – so the
+agent can advertise every tool without importing any of them.  A tool's
+module (and its heavy dependencies: bs4, pdfplumber, duckduckgo_search,
+notion_client …) is imported and the tool instantiated the first time it is
+actually called.
+
+Third-party tools can be registered through the ``edge.tools`` entry-point
+group (``name = "package.module:ToolClass"``); those are imported when the
+specs are first requested, since their spec is not in the manifest.
+
+After adding a tool or changing a tool's signature/description, refresh the
+cached specs with::
+
+    python -m app.agents.tools.registry
+"""
+
+import importlib
+import json
+import logging
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .base import BaseTool
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = Path(__file__).with_name("manifest.json")
+ENTRY_POINT_GROUP = "edge.tools"
+
+
+@dataclass
+class ToolEntry:
+    name: str
+    module: str  # absolute module path, e.g. "app.agents.tools.read_pdf"
+    class_name: str
+    spec: Optional[Dict[str, Any]] = None  # None until computed from the class
+
+
+class ToolRegistry:
+    def __init__(self, manifest_path: Path = MANIFEST_PATH, entry_point_group: Optional[str] = ENTRY_POINT_GROUP):
+        self.manifest_path = manifest_path
+        self.entry_point_group = entry_point_group
+        self._entries: Optional[Dict[str, ToolEntry]] = None
+        self._instances: Dict[str, BaseTool] = {}
+
+    # ------------------------------------------------------------------
+    # Discovery
+    # ------------------------------------------------------------------
+
+    def _load_entries(self) -> Dict[str, ToolEntry]:
+        if self._entries is not None:
+            return self._entries
+
+        entries: Dict[str, ToolEntry] = {}
+        manifest = json.loads(self.manifest_path.read_text())
+        for item in manifest["tools"]:
+            entries[item["name"]] = ToolEntry(
+                name=item["name"], module=item["module"], class_name=item["class"], spec=item.get("spec")
+            )
+
+        if self.entry_point_group:
+            for ep in entry_points(group=self.entry_point_group):
+                if ep.name in entries:
+                    logger.warning(f"Tool plugin '{ep.name}' ignored: name already registered")
+                    continue
+                module, _, class_name = ep.value.partition(":")
+                entries[ep.name] = ToolEntry(name=ep.name, module=module, class_name=class_name)
+
+        self._entries = entries
+        return entries
+
+    def names(self) -> List[str]:
+        return list(self._load_entries())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._load_entries()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def get(self, name: str) -> Optional[BaseTool]:
+        """Return the tool instance for *name*, importing it on first use."""
+        tool = self._instances.get(name)
+        if tool is not None:
+            return tool
+        entry = self._load_entries().get(name)
+        if entry is None:
+            return None
+        module = importlib.import_module(entry.module)
+        tool = getattr(module, entry.class_name)()
+        self._instances[name] = tool
+        logger.debug(f"Loaded tool '{name}' from {entry.module}")
+        return tool
+
+    def tool_class(self, class_name: str) -> type:
+        """Return a tool class by class name (imports its module)."""
+        for entry in self._load_entries().values():
+            if entry.class_name == class_name:
+                return getattr(importlib.import_module(entry.module), class_name)
+        raise KeyError(class_name)
+
+    def all_tools(self) -> List[BaseTool]:
+        """Instantiate every registered tool (imports all tool modules)."""
+        return [tool for tool in (self.get(name) for name in self.names()) if tool is not None]
+
+    def loaded(self) -> List[str]:
+        return list(self._instances)
+
+    # ------------------------------------------------------------------
+    # Specs
+    # ------------------------------------------------------------------
+
+    def openai_spec(self, name: str) -> Dict[str, Any]:
+        entry = self._load_entries()[name]
+        if entry.spec is None:
+            tool = self.get(name)
+            assert tool is not None
+            entry.spec = tool.openai_spec()
+        return entry.spec
+
+    def openai_specs(self) -> List[Dict[str, Any]]:
+        """Function specs for every tool; manifest tools are not imported."""
+        return [self.openai_spec(name) for name in self.names()]
+
+
+def build_manifest(manifest_path: Path = MANIFEST_PATH) -> Dict[str, Any]:
+    """Recompute each manifest tool's spec from its class."""
+    manifest = json.loads(manifest_path.read_text())
+    for item in manifest["tools"]:
+        tool = getattr(importlib.import_module(item["module"]), item["class"])()
+        if tool.name != item["name"]:
+            raise ValueError(f"{item['class']}.name is '{tool.name}', manifest says '{item['name']}'")
+        item["spec"] = tool.openai_spec()
+    return manifest
+
+
+# Shared registry used by the agents
+tool_registry = ToolRegistry()
+
+
+if __name__ == "__main__":
+    MANIFEST_PATH.write_text(json.dumps(build_manifest(), indent=2) + "\n")
+    print(f"Wrote {MANIFEST_PATH}")
@@ -14,6 +14,7 @@ from typing import Optional
 import httpx
 from bs4 import BeautifulSoup
 
+from app.utils import deadline
 from .base import BaseTool
 
 # Rough upper-bound on characters returned to avoid huge LLM prompts
@@ -39,7 +40,7 @@ class ScrapeWebsiteTool(BaseTool):
         if not url.lower().startswith(("http://", "https://")):
             raise ValueError("`url` must start with http:// or https://")
 
-        async with httpx.AsyncClient(follow_redirects=True, timeout=15.0) as client:
+        async with httpx.AsyncClient(follow_redirects=True, timeout=deadline.timeout(15.0)) as client:
             resp = await client.get(url)
             resp.raise_for_status()
             html = resp.text
@@ -2,13 +2,14 @@ from __future__ import annotations
 
 """Tool: summarize_text
 
-Quickly produce a concise summary of a longer text using the existing
-`OpenAIService` abstraction.
+Quickly produce a concise summary of a longer text using the shared
+`model_router` (background tier).
 """
 
 from typing import Optional
 
-from app.services.openai_service import openai_service
+from app.services.llm_gateway import llm_gateway
+from app.services.model_router import model_router, BACKGROUND
 from .base import BaseTool
 
 
@@ -26,16 +27,12 @@ class SummarizeTextTool(BaseTool):
             "You are a helpful assistant that summarizes text. "
             f"Please summarize the following content in <= {max_words} words:\n\n{text}"
         )
-        # openai_service currently works with roles – bypass using direct completions helper
-        try:
-            client = openai_service.client  # type: ignore[attr-defined]
-        except AttributeError:
-            client = None
-        if client is None:
+        if not llm_gateway.enabled:
             return text[:max_words] + ("..." if len(text.split()) > max_words else "")
 
-        resp = await client.chat.completions.create(  # type: ignore[func-returns-value]
-            model="gpt-3.5-turbo",
+        resp = await model_router.chat_completion(
+            request_class=BACKGROUND,
+            call_site="summarize_text",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
             max_tokens=256,
@@ -6,7 +6,10 @@ from typing import List, Dict, Any
 import re
 
 from app.services.supabase_service import supabase_service
-from app.services.openai_service import openai_service
+from app.services.llm_gateway import llm_gateway
+from app.services.model_router import model_router, BACKGROUND
+from app.services.llm_batch import BatchTransport, build_batch_line
+from app.config import LLM_BATCH_MODE
 
 # Workspace root is shared with the file_manager tool & /api/files endpoints
 WORKSPACE_ROOT = Path(os.getenv("EDGE_WORKSPACE", "/tmp/edge_workspace")).resolve()
@@ -14,6 +17,10 @@ WORKSPACE_ROOT = Path(os.getenv("EDGE_WORKSPACE", "/tmp/edge_workspace")).resolv
 logger = logging.getLogger(__name__)
 
 _POLL_INTERVAL_SEC = 30  # how often to look for new pending tasks
+_BATCH_MAX_REQUESTS = 50_000  # Batch API limit per input file
+
+# Deliverables are not latency-sensitive; same settings in sync & batch mode
+_DELIVERABLE_PARAMS = {"max_tokens": 800, "temperature": 0.7}
 
 def get_user_workspace_for_task(task: Dict[str, Any]) -> Path:
     """Get the user-specific workspace directory for a task."""
@@ -30,24 +37,16 @@ def get_user_workspace_for_task(task: Dict[str, Any]) -> Path:
 
 async def _fetch_pending_tasks() -> List[Dict[str, Any]]:
     """Return a list of tasks (dicts) that are still pending."""
-    # When running without a real Supabase instance we use the in-memory mock
-    if not supabase_service.client:
-        return [t for t in supabase_service._mock_tasks.values() if t.get("status") == "pending"]
-
-    # Supabase mode – query directly on the table
     try:
-        response = supabase_service.client.table("tasks").select("*").eq("status", "pending").execute()
-        return response.data or []
+        return await supabase_service.get_pending_tasks()
     except Exception as exc:
         logger.error(f"Failed to query pending tasks: {exc}")
         return []
 
 
-async def _infer_filename_and_content(task: Dict[str, Any]) -> tuple[str, str]:
-    """Return (relative_path, file_content) that fulfils *task*."""
+def _deliverable_path(task: Dict[str, Any]) -> tuple[str, str]:
+    """Return (relative_path, extension) for the deliverable of *task*."""
     description = task.get("description", "")
-    role = task.get("assigned_to_role", "AI")
-    user_id = task.get("user_id", "unknown")
 
     # ------------------------------------------------------------------
     # Decide on file extension based on simple heuristics
@@ -61,50 +60,65 @@ async def _infer_filename_and_content(task: Dict[str, Any]) -> tuple[str, str]:
     # Create user-specific completed_tasks folder
     # Include auth_user_id in the path so it matches the workspace structure
     auth_user_id = task.get("auth_user_id") or task.get("user_id", "unknown")
-    rel_path = f"{auth_user_id}/completed_tasks/{task['id']}.{ext}"
+    return f"{auth_user_id}/completed_tasks/{task['id']}.{ext}", ext
 
-    # ------------------------------------------------------------------
-    # Build prompt for OpenAI to actually accomplish the task
-    # ------------------------------------------------------------------
+
+def _deliverable_messages(task: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Build the prompt for OpenAI to actually accomplish *task*."""
+    description = task.get("description", "")
+    role = task.get("assigned_to_role", "AI")
     prompt = (
         f"You are acting as the {role} of an early-stage startup. "
         f"Your task is: {description}\n\n"
         f"Please complete the task and output ONLY the deliverable content. "
         f"Do not include any explanations or commentary."
     )
+    return [{"role": "user", "content": prompt}]
 
-    if openai_service.client:
+
+def _clean_deliverable(content: str, ext: str) -> str:
+    """Normalise raw model output before it is written to disk."""
+    content = content.strip()
+    # If GPT wrapped output in code fences, strip them for file writes
+    if ext in {"py", "txt", "md"} and content.startswith("```"):
+        # Remove first and last triple backtick blocks
+        parts = content.split("```")
+        if len(parts) >= 3:
+            content = "```".join(parts[1:-1]).lstrip("python\n").lstrip()
+    return content
+
+
+def _placeholder(task: Dict[str, Any]) -> str:
+    return f"AUTO-GENERATED PLACEHOLDER FOR TASK: {task.get('description', '')}"
+
+
+async def _infer_filename_and_content(task: Dict[str, Any]) -> tuple[str, str]:
+    """Return (relative_path, file_content) that fulfils *task*."""
+    rel_path, ext = _deliverable_path(task)
+
+    if llm_gateway.enabled:
         try:
-            response = openai_service.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=800,
-                temperature=0.7,
+            response = await model_router.chat_completion(
+                request_class=BACKGROUND,
+                call_site="worker",
+                messages=_deliverable_messages(task),
+                **_DELIVERABLE_PARAMS,
             )
-            content = response.choices[0].message.content.strip()
-            # If GPT wrapped output in code fences, strip them for file writes
-            if ext in {"py", "txt", "md"} and content.startswith("```"):
-                # Remove first and last triple backtick blocks
-                parts = content.split("```")
-                if len(parts) >= 3:
-                    content = "```".join(parts[1:-1]).lstrip("python\n").lstrip()
+            content = _clean_deliverable(response.choices[0].message.content, ext)
         except Exception as exc:
             logger.error(f"OpenAI generation failed for task {task['id']}: {exc}")
-            content = f"AUTO-GENERATED PLACEHOLDER FOR TASK: {description}"
+            content = _placeholder(task)
     else:
         # Dev / offline mode – create placeholder
-        content = f"AUTO-GENERATED PLACEHOLDER FOR TASK: {description}"
+        content = _placeholder(task)
 
     return rel_path, content
 
 
-async def _complete_task(task: Dict[str, Any]):
-    """Generate deliverable for *task*, save it, and mark task completed."""
+async def _save_deliverable(task: Dict[str, Any], rel_path: str, content: str):
+    """Write *content* to the user's workspace and mark *task* completed."""
     task_id = task["id"]
 
-    # Generate deliverable
-    rel_path, content = await _infer_filename_and_content(task)
-    
     # Get user-specific workspace
     user_workspace = get_user_workspace_for_task(task)
     
@@ -126,15 +140,92 @@ async def _complete_task(task: Dict[str, Any]):
     logger.info(f"Task {task_id} completed with deliverable {local_path} in user workspace")
 
 
+async def _complete_task(task: Dict[str, Any]):
+    """Generate deliverable for *task*, save it, and mark task completed."""
+    rel_path, content = await _infer_filename_and_content(task)
+    await _save_deliverable(task, rel_path, content)
+
+
+# ---------------------------------------------------------------------------
+# Batch mode
+#  Pending tasks are submitted to the OpenAI Batch API instead of one
+#  synchronous request each.  Submitted batches are tracked in memory; if
+#  the process restarts before results arrive the tasks are still
+#  `pending` and simply get resubmitted.
+# ---------------------------------------------------------------------------
+
+# batch_id -> {task_id: task}
+_submitted_batches: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+
+def _tasks_in_flight() -> set[str]:
+    return {task_id for tasks in _submitted_batches.values() for task_id in tasks}
+
+
+async def _submit_pending_batch(transport: BatchTransport, pending: List[Dict[str, Any]]):
+    """Submit every pending task that is not already part of a batch."""
+    in_flight = _tasks_in_flight()
+    fresh = [t for t in pending if str(t["id"]) not in in_flight][:_BATCH_MAX_REQUESTS]
+    if not fresh:
+        return
+
+    # Batch jobs cannot fall back mid-flight; they use the policy's first tier
+    model = model_router.pick_model(BACKGROUND, "worker")
+    lines = [
+        build_batch_line(str(t["id"]), model, _deliverable_messages(t), **_DELIVERABLE_PARAMS)
+        for t in fresh
+    ]
+    batch_id = await transport.submit(lines, metadata={"source": "task_completion_worker"})
+    _submitted_batches[batch_id] = {str(t["id"]): t for t in fresh}
+
+
+async def _collect_finished_batches(transport: BatchTransport):
+    """Poll submitted batches and write deliverables for completed ones."""
+    for batch_id in list(_submitted_batches):
+        try:
+            result = await transport.poll(batch_id)
+        except Exception as exc:
+            logger.warning(f"Polling batch {batch_id} failed: {exc}")
+            continue
+
+        if result.failed:
+            # Release the tasks so the next cycle resubmits them
+            logger.error(f"Batch {batch_id} ended with status {result.status}")
+            del _submitted_batches[batch_id]
+            continue
+        if not result.done:
+            continue
+
+        tasks = _submitted_batches.pop(batch_id)
+        for task_id, task in tasks.items():
+            rel_path, ext = _deliverable_path(task)
+            output = result.outputs.get(task_id)
+            content = _clean_deliverable(output, ext) if output else _placeholder(task)
+            try:
+                await _save_deliverable(task, rel_path, content)
+            except Exception as exc:
+                logger.error(f"Saving batch deliverable for task {task_id} failed: {exc}")
+
+
+async def _run_batch_cycle(transport: BatchTransport):
+    await _collect_finished_batches(transport)
+    pending = await _fetch_pending_tasks()
+    await _submit_pending_batch(transport, pending)
+
+
 async def task_completion_worker():
     """Background coroutine that auto-completes all pending tasks."""
+    transport = BatchTransport(llm_gateway.client) if LLM_BATCH_MODE and llm_gateway.enabled else None
     while True:
         try:
-            pending = await _fetch_pending_tasks()
-            if pending:
-                logger.info(f"Auto-completing {len(pending)} pending task(s)…")
-            for task in pending:
-                await _complete_task(task)
+            if transport is not None:
+                await _run_batch_cycle(transport)
+            else:
+                pending = await _fetch_pending_tasks()
+                if pending:
+                    logger.info(f"Auto-completing {len(pending)} pending task(s)…")
+                for task in pending:
+                    await _complete_task(task)
         except Exception as exc:
             logger.exception(f"Background worker failure: {exc}")
-        await asyncio.sleep(_POLL_INTERVAL_SEC) 
\ No newline at end of file
+        await asyncio.sleep(_POLL_INTERVAL_SEC)
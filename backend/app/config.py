@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -6,9 +7,50 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")  # This is the anon key
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")  # Service role key for backend operations
+SUPABASE_MAX_WORKERS = int(os.getenv("SUPABASE_MAX_WORKERS", "8"))  # threads running blocking PostgREST calls
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # OpenAI-compatible endpoint, e.g. app/dev/fake_openai.py
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 
+# LLM gateway tuning (see app/services/llm_gateway.py)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # simultaneous in-flight completions
+LLM_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "60"))  # default per-call timeout
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))  # shared HTTP connection pool size
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))  # 0 disables the completion cache
+LLM_CACHE_TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SEC", "3600"))
+CHAT_PROMPT_TOKEN_BUDGET = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "6000"))  # prompt tokens for agent chat
+LLM_RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))  # tries per call on 429/5xx/timeouts
+LLM_RETRY_BASE_DELAY_SEC = float(os.getenv("LLM_RETRY_BASE_DELAY_SEC", "0.5"))
+LLM_RETRY_MAX_DELAY_SEC = float(os.getenv("LLM_RETRY_MAX_DELAY_SEC", "8"))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))  # consecutive failures to open
+LLM_BREAKER_RESET_SEC = float(os.getenv("LLM_BREAKER_RESET_SEC", "30"))  # open -> half-open after this long
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() in {"1", "true", "yes"}  # hedge interactive chat
+LLM_HEDGE_MIN_DELAY_SEC = float(os.getenv("LLM_HEDGE_MIN_DELAY_SEC", "1"))  # floor for the p95 hedge delay
+LLM_TELEMETRY_JSONL = os.getenv("LLM_TELEMETRY_JSONL", "")  # optional per-call JSONL log path
+LLM_BATCH_MODE = os.getenv("LLM_BATCH_MODE", "false").lower() in {"1", "true", "yes"}  # worker uses the Batch API
+LLM_MODEL_TIERS = json.loads(os.getenv("LLM_MODEL_TIERS", "{}"))  # see app/services/model_router.py
+LLM_ROUTING_POLICY = json.loads(os.getenv("LLM_ROUTING_POLICY", "{}"))
+LLM_ROUTE_COOLDOWN_SEC = float(os.getenv("LLM_ROUTE_COOLDOWN_SEC", "30"))  # skip a rate-limited/slow tier this long
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))  # parallel tool calls per agent turn
+TOOL_AGENT_MAX_STEPS = int(os.getenv("TOOL_AGENT_MAX_STEPS", "5"))  # tool-calling rounds per request
+TOOL_AGENT_TOKEN_BUDGET = int(os.getenv("TOOL_AGENT_TOKEN_BUDGET", "20000"))  # cumulative tokens per request
+TOOL_AGENT_DEADLINE_SEC = float(os.getenv("TOOL_AGENT_DEADLINE_SEC", "90"))  # wall-clock limit per request
+CLIENT_DISCONNECT_POLL_SEC = float(os.getenv("CLIENT_DISCONNECT_POLL_SEC", "0.5"))  # chat routes check for a gone client
+REQUEST_DEADLINE_SEC = float(os.getenv("REQUEST_DEADLINE_SEC", "30"))  # default end-to-end budget per API request
+CHAT_DEADLINE_SEC = float(os.getenv("CHAT_DEADLINE_SEC", "60"))  # /chat and /chat/stream
+TOOL_CHAT_DEADLINE_SEC = float(os.getenv("TOOL_CHAT_DEADLINE_SEC", "120"))  # /chat-tools (agent loop + wrap-up)
+IDEMPOTENCY_TTL_SEC = float(os.getenv("IDEMPOTENCY_TTL_SEC", "86400"))  # how long Idempotency-Key responses are kept
+IDEMPOTENCY_CLAIM_TTL_SEC = float(os.getenv("IDEMPOTENCY_CLAIM_TTL_SEC", "300"))  # lock on a running key if its worker dies
+
+# Shared cache (see app/services/cache.py)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory | sqlite | redis
+CACHE_URL = os.getenv("CACHE_URL", "")  # sqlite file path or redis://host:port/db
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+# users/agents/companies read cache; 0 disables.  On by default only with sqlite: the
+# per-process memory backend only invalidates the worker that made a write, and redis
+# is opt-in
+ENTITY_CACHE_TTL_SEC = float(os.getenv("ENTITY_CACHE_TTL_SEC", "60" if CACHE_BACKEND == "sqlite" else "0"))
+
 # Validate required environment variables
 if not SUPABASE_URL:
     raise ValueError("SUPABASE_URL environment variable is required")
@@ -0,0 +1,76 @@
+"""Measure cold-start import time of the API (``import app.main``).
+
+Each run imports the app in a fresh interpreter, so nothing is cached in
+``sys.modules``.  Reports the median/min wall time and the slowest modules
+(by self time, from ``python -X importtime``)::
+
+    python -m app.dev.bench_import --runs 5 --top 15
+    python -m app.dev.bench_import --max-ms 900   # exit 1 if the median is slower
+
+Run from the ``backend`` directory with the usual environment variables set.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+_TIMED_IMPORT = (
+    "import time; t = time.perf_counter(); import {module}; "
+    "print('IMPORT_MS', (time.perf_counter() - t) * 1000)"
+)
+
+
+def _run_once(module: str, importtime: bool = False) -> Tuple[float, str]:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", _TIMED_IMPORT.format(module=module)]
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    ms = next(float(line.split()[1]) for line in proc.stdout.splitlines() if line.startswith("IMPORT_MS"))
+    return ms, proc.stderr
+
+
+def _slowest_modules(importtime_log: str, top: int) -> List[Dict[str, object]]:
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        rows.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    rows.sort(key=lambda r: r["self_ms"], reverse=True)
+    return rows[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark cold-start import time")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the median exceeds this")
+    args = parser.parse_args()
+
+    timings = [_run_once(args.module)[0] for _ in range(args.runs)]
+    _, log = _run_once(args.module, importtime=True)
+    median = statistics.median(timings)
+
+    print(
+        json.dumps(
+            {
+                "module": args.module,
+                "runs": args.runs,
+                "median_ms": round(median, 1),
+                "min_ms": round(min(timings), 1),
+                "slowest_modules": _slowest_modules(log, args.top),
+            },
+            indent=2,
+        )
+    )
+    if args.max_ms is not None and median > args.max_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
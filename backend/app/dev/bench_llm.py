@@ -0,0 +1,85 @@
+"""Load-test the real agent chat path against an OpenAI-compatible server.
+
+Start the stand-in (see app/dev/fake_openai.py), then::
+
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python -m app.dev.bench_llm --requests 200 --concurrency 20
+
+Each request runs `openai_service.get_agent_response` – prompt assembly,
+routing, gateway concurrency limits, retries and response parsing – and the
+script reports throughput, latency percentiles and the gateway telemetry.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.models import RoleEnum
+from app.services.llm_gateway import llm_gateway
+from app.services.llm_telemetry import llm_telemetry
+from app.services.openai_service import openai_service
+
+
+async def _run(total: int, concurrency: int, stream: bool) -> None:
+    if not llm_gateway.enabled:
+        raise SystemExit("Set OPENAI_BASE_URL (or a real OPENAI_API_KEY) first")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        role = list(RoleEnum)[i % len(RoleEnum)]
+        message = f"Benchmark question #{i}: what should we prioritise this week?"
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                if stream:
+                    async for _ in openai_service.stream_agent_response(role, message):
+                        pass
+                else:
+                    await openai_service.get_agent_response(role, message)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.monotonic() - started
+    await llm_gateway.aclose()
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else 0.0
+
+    print(
+        json.dumps(
+            {
+                "requests": total,
+                "concurrency": concurrency,
+                "errors": errors,
+                "elapsed_sec": round(elapsed, 3),
+                "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+                "latency_sec": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)},
+                "gateway": llm_gateway.resilience_stats(),
+                "telemetry": llm_telemetry.snapshot()["totals"],
+            },
+            indent=2,
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark agent chat against an OpenAI-compatible server")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--stream", action="store_true", help="use the streaming chat path")
+    args = parser.parse_args()
+    asyncio.run(_run(args.requests, args.concurrency, args.stream))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Deterministic OpenAI-compatible stand-in server for local load testing.
+
+Implements just enough of the OpenAI HTTP API for the backend's real code
+paths to run unchanged:
+
+* ``POST /v1/chat/completions`` – plain, streamed (SSE) and tool-calling
+  responses, all with ``usage`` (streams include it when
+  ``stream_options.include_usage`` is set).
+* ``GET /v1/models``.
+
+Replies are a pure function of the request, and latency and fault draws
+come from a seeded RNG, so runs are reproducible.  Latency is drawn from a
+configurable distribution (time to first token, then a per-token delay when
+streaming) and a configurable fraction of requests fail with 429 or 500.
+
+Run it standalone and point the backend at it::
+
+    python -m app.dev.fake_openai --port 8001 --latency lognormal:0.8,0.5 --rate-limit-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 uvicorn app.main:app
+
+``OPENAI_BASE_URL`` enables the gateway even with the placeholder API key.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_WORDS = (
+    "ship the mvp validate demand with early users measure retention iterate on onboarding "
+    "reduce churn prioritise the roadmap align the team hire carefully keep burn low "
+    "instrument the funnel talk to customers weekly automate the release pipeline"
+).split()
+
+
+def _count_tokens(text: str) -> int:
+    # ~4 characters per token; the server must not depend on app config
+    return math.ceil(len(text) / 4) if text else 0
+
+
+@dataclass
+class LatencyDistribution:
+    """Seconds of delay; ``kind`` is ``fixed``, ``uniform`` or ``lognormal``."""
+
+    kind: str = "fixed"
+    a: float = 0.0  # fixed: value, uniform: low, lognormal: median
+    b: float = 0.0  # uniform: high, lognormal: sigma
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """Parse ``"fixed:0.2"``, ``"uniform:0.1,0.5"`` or ``"lognormal:0.8,0.5"``."""
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v] or [0.0]
+        return cls(kind=kind, a=values[0], b=values[1] if len(values) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        return self.a
+
+
+@dataclass
+class FakeLLMConfig:
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    token_delay: float = 0.0  # per streamed token
+    rate_limit_rate: float = 0.0
+    server_error_rate: float = 0.0
+    completion_tokens: int = 60
+    tool_rounds: int = 1  # tool-calling replies per user turn before answering
+    seed: int = 0
+
+
+class FakeOpenAI:
+    def __init__(self, config: Optional[FakeLLMConfig] = None):
+        self.config = config or FakeLLMConfig()
+        self.rng = random.Random(self.config.seed)
+        self.requests = 0
+        self.requests_by_model: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Deterministic content
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _digest(body: Dict[str, Any]) -> int:
+        payload = json.dumps(body.get("messages", []), sort_keys=True, default=str)
+        return int(hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12], 16)
+
+    def _reply_text(self, body: Dict[str, Any]) -> str:
+        limit = min(int(body.get("max_tokens") or self.config.completion_tokens), self.config.completion_tokens)
+        words = random.Random(self._digest(body)).choices(_WORDS, k=max(limit, 1))
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            return json.dumps(self._schema_instance(schema, schema.get("$defs", {}), " ".join(words[:8])))
+        if response_format.get("type") == "json_object":
+            return json.dumps({"message": " ".join(words[:10])})
+        return " ".join(words)
+
+    @classmethod
+    def _schema_instance(cls, schema: Dict[str, Any], defs: Dict[str, Any], text: str) -> Any:
+        """Smallest value that satisfies a (strict-mode) JSON schema."""
+        if "$ref" in schema:
+            return cls._schema_instance(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, text)
+        if "enum" in schema:
+            return schema["enum"][0]
+        kind = schema.get("type")
+        if kind == "object":
+            return {k: cls._schema_instance(v, defs, text) for k, v in schema.get("properties", {}).items()}
+        if kind == "array":
+            return [cls._schema_instance(schema.get("items", {}), defs, text)]
+        return {"integer": 1, "number": 1.0, "boolean": False}.get(kind, text)
+
+    def _wants_tool_call(self, body: Dict[str, Any]) -> bool:
+        """Call tools for ``tool_rounds`` replies per user turn when tools are offered."""
+        if not body.get("tools") or body.get("tool_choice") == "none":
+            return False
+        rounds = 0
+        for message in reversed(body.get("messages", [])):
+            if message.get("role") == "user":
+                return rounds < self.config.tool_rounds
+            if message.get("role") == "assistant" and message.get("tool_calls"):
+                rounds += 1
+        return False
+
+    @staticmethod
+    def _placeholder_args(schema: Dict[str, Any]) -> Dict[str, Any]:
+        defaults = {"string": "test", "integer": 1, "number": 1.0, "boolean": False, "array": [], "object": {}}
+        properties = schema.get("properties", {})
+        return {
+            name: (properties[name].get("enum") or [defaults.get(properties[name].get("type"), "test")])[0]
+            for name in schema.get("required", [])
+            if name in properties
+        }
+
+    def _tool_calls(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Prefer tools named in the last user message, else the first tool
+        tools = [t["function"] for t in body["tools"] if t.get("type") == "function"]
+        last_user = next(
+            (str(m.get("content") or "") for m in reversed(body["messages"]) if m.get("role") == "user"), ""
+        ).lower()
+        chosen = [t for t in tools if t["name"] in last_user] or tools[:1]
+        digest = self._digest(body)
+        return [
+            {
+                "id": f"call_{digest:x}_{i}",
+                "type": "function",
+                "function": {"name": t["name"], "arguments": json.dumps(self._placeholder_args(t.get("parameters", {})))},
+            }
+            for i, t in enumerate(chosen)
+        ]
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+
+    def _usage(self, body: Dict[str, Any], completion: str) -> Dict[str, int]:
+        prompt_tokens = sum(4 + _count_tokens(str(m.get("content") or "")) for m in body.get("messages", [])) + 3
+        completion_tokens = _count_tokens(completion)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _fault(self) -> Optional[JSONResponse]:
+        roll = self.rng.random()
+        if roll < self.config.rate_limit_rate:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (injected)", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after-ms": "200"},
+            )
+        if roll < self.config.rate_limit_rate + self.config.server_error_rate:
+            return JSONResponse(
+                {"error": {"message": "Server error (injected)", "type": "server_error", "code": None}},
+                status_code=500,
+            )
+        return None
+
+    async def chat_completions(self, body: Dict[str, Any]):
+        self.requests += 1
+        model = body.get("model", "gpt-3.5-turbo")
+        self.requests_by_model[model] = self.requests_by_model.get(model, 0) + 1
+
+        await asyncio.sleep(self.config.latency.sample(self.rng))
+        fault = self._fault()
+        if fault is not None:
+            return fault
+
+        created = int(time.time())
+        completion_id = f"chatcmpl-fake-{self._digest(body):x}"
+        if self._wants_tool_call(body):
+            message: Dict[str, Any] = {"role": "assistant", "content": None, "tool_calls": self._tool_calls(body)}
+            finish_reason = "tool_calls"
+            text = json.dumps(message["tool_calls"])
+        else:
+            text = self._reply_text(body)
+            message = {"role": "assistant", "content": text}
+            finish_reason = "stop"
+
+        if body.get("stream"):
+            return StreamingResponse(
+                self._stream(body, completion_id, created, model, message, finish_reason, text),
+                media_type="text/event-stream",
+            )
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": self._usage(body, text),
+        }
+
+    async def _stream(
+        self,
+        body: Dict[str, Any],
+        completion_id: str,
+        created: int,
+        model: str,
+        message: Dict[str, Any],
+        finish_reason: str,
+        text: str,
+    ) -> AsyncIterator[bytes]:
+        def frame(delta: Dict[str, Any], finish: Optional[str] = None, usage: Optional[Dict[str, int]] = None) -> bytes:
+            chunk: Dict[str, Any] = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if usage:
+                chunk["usage"] = usage
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        yield frame({"role": "assistant", "content": ""})
+        if message.get("tool_calls"):
+            calls = [{"index": i, **call} for i, call in enumerate(message["tool_calls"])]
+            yield frame({"tool_calls": calls})
+        else:
+            for i, word in enumerate(text.split(" ")):
+                if self.config.token_delay:
+                    await asyncio.sleep(self.config.token_delay)
+                yield frame({"content": word if i == 0 else " " + word})
+        yield frame({}, finish_reason)
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield frame({}, usage=self._usage(body, text))
+        yield b"data: [DONE]\n\n"
+
+
+def create_app(config: Optional[FakeLLMConfig] = None) -> FastAPI:
+    """Return the stand-in server as an ASGI app (``app.state.fake`` holds counters)."""
+    fake = FakeOpenAI(config)
+    app = FastAPI(title="Fake OpenAI")
+    app.state.fake = fake
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await fake.chat_completions(await request.json())
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": m, "object": "model", "owned_by": "fake"} for m in ("gpt-4", "gpt-3.5-turbo")]}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds per streamed token")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--tool-rounds", type=int, default=1, help="tool-calling replies per user turn")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeLLMConfig(
+        latency=LatencyDistribution.parse(args.latency),
+        token_delay=args.token_delay,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        completion_tokens=args.completion_tokens,
+        tool_rounds=args.tool_rounds,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from fastapi.responses import JSONResponse
 import logging
 import asyncio
 from app.background_workers import task_completion_worker
+from app.config import REQUEST_DEADLINE_SEC
+from app.utils.deadline import DeadlineExceeded, DeadlineMiddleware
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +27,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Default deadline for every request; routes with their own budget override it
+app.add_middleware(DeadlineMiddleware, seconds=REQUEST_DEADLINE_SEC)
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exception_handler(request, exc):
+    logger.error(f"Request deadline exceeded: {request.method} {request.url.path}")
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "Request timed out"}
+    )
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -56,19 +69,34 @@ async def health_check():
     }
 
 # Import and include routers
-from app.routes import users, agents, tasks, files as files_route, companies
+from app.routes import users, agents, tasks, files as files_route, companies, metrics
 
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(agents.router, prefix="/api/agents", tags=["agents"])
 app.include_router(tasks.router, prefix="/api/tasks", tags=["tasks"])
 app.include_router(files_route.router, prefix="/api", tags=["files"])
 app.include_router(companies.router, prefix="/api/companies", tags=["companies"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["metrics"])
 
 @app.on_event("startup")
 async def _launch_background_workers():
     """Kick off async background tasks when the API starts."""
     asyncio.create_task(task_completion_worker())
 
+@app.on_event("shutdown")
+async def _close_llm_gateway():
+    """Release the shared LLM connection pool."""
+    from app.services.llm_gateway import llm_gateway
+
+    await llm_gateway.aclose()
+
+@app.on_event("shutdown")
+async def _close_db_pool():
+    """Stop the threads running Supabase queries."""
+    from app.services.db_pool import db_pool
+
+    db_pool.shutdown()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -93,6 +93,11 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskPage(BaseModel):
+    items: List[Task]
+    # Pass as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
 # Chat Models
 class ChatMessage(BaseModel):
     user_id: UUID
@@ -105,6 +110,27 @@ class ChatResponse(BaseModel):
     message: str
     conversation_state: Optional[Dict[str, Any]] = None
 
+# Suggestion Models (LLM structured output)
+class SuggestionPriorityEnum(str, Enum):
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+
+class ProactiveSuggestion(BaseModel):
+    type: str  # e.g. collaboration, strategy, product
+    message: str
+    action: str  # short snake_case next step
+    priority: SuggestionPriorityEnum
+
+class ProactiveSuggestionList(BaseModel):
+    suggestions: List[ProactiveSuggestion]
+
+class CompanyContextSuggestions(BaseModel):
+    company_info: str
+    product_overview: str
+    tech_stack: str
+    go_to_market_strategy: str
+
 # Company Models
 class CompanyBase(BaseModel):
     user_id: UUID
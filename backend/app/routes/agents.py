@@ -1,24 +1,35 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from app.models import Agent, ChatMessage, ChatResponse, RoleEnum
-from app.services.supabase_service import supabase_service
+from app.services.supabase_service import USER_ROLE_COLUMNS, TASK_ACTIVITY_COLUMNS, supabase_service
 from app.services.openai_service import openai_service
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
+import json
 import logging
+import time
+from contextlib import aclosing
 from datetime import datetime, timedelta
 import re, uuid
 from app.agents.executor import get_tool_agent
+from app.services.cache import get_cache
+from app.utils.singleflight import SingleFlight
+from app.utils.disconnect import CLIENT_CLOSED_REQUEST, ClientDisconnected, cancel_on_disconnect
+from app.utils.idempotency import run_idempotent
+from app.utils.deadline import DeadlineExceeded, request_deadline
+from app.config import CHAT_DEADLINE_SEC, TOOL_CHAT_DEADLINE_SEC
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # ---------------------------------------------------------------------------
-# In-memory cache to avoid hitting OpenAI on every page refresh
-#  Keyed by user_id and stores {"timestamp": datetime, "payload": dict}
-#  NOTE: This is a simple optimisation that works for a single-process server.
-#  If you run multiple workers or deploy server-less, consider a shared cache
-#  such as Redis or Supabase instead.
-_SUGGESTIONS_CACHE: dict[str, Dict[str, Any]] = {}
+# Cache to avoid hitting OpenAI on every page refresh
+#  Keyed by user_id and stores the response payload. Backed by the shared
+#  cache (CACHE_BACKEND), so sqlite/redis make it work across workers.
 _SUGGESTIONS_TTL = timedelta(minutes=5)
+_SUGGESTIONS_CACHE = get_cache("suggestions", ttl=_SUGGESTIONS_TTL.total_seconds())
+# Coalesces concurrent cache misses per user into a single generation
+_SUGGESTIONS_FLIGHT = SingleFlight()
 
 @router.get("/user/{user_id}", response_model=List[Agent])
 async def get_user_agents(user_id: str):
@@ -33,173 +44,247 @@ async def get_user_agents(user_id: str):
             detail="Failed to get user agents"
         )
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat_with_agent(chat_message: ChatMessage):
-    """Send a message to an AI agent and get a response with enhanced intelligence"""
+async def _prepare_chat(chat_message: ChatMessage) -> Dict[str, Any]:
+    """Load agents, run heuristic task extraction and build the LLM context.
+
+    Returns a dict consumed by `_finalize_chat`.  Nothing is written here, so
+    a turn abandoned before `_finalize_chat` leaves no side effects.  Raises
+    HTTPException when the user or the target agent does not exist.
+    """
+    # Get user to validate
+    user = await supabase_service.get_user_by_id(str(chat_message.user_id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    # Get all agents for inter-agent coordination (uncached: the target's
+    # conversation_state is read, extended and written back)
+    agents = await supabase_service.get_agents_by_user(str(chat_message.user_id), use_cache=False)
+    target_agent = None
+    other_agents = []
+    
+    for agent in agents:
+        if agent["role"] == chat_message.role:
+            target_agent = agent
+        else:
+            other_agents.append(agent)
+    
+    if not target_agent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No {chat_message.role} agent found for this user"
+        )
+    
+    # Build inter-agent coordination context
+    other_agents_activity = {}
+    for agent in other_agents:
+        conv_state = agent.get("conversation_state", {})
+        other_agents_activity[agent["role"]] = {
+            "last_active": conv_state.get("timestamp", "unknown"),
+            "message_count": conv_state.get("message_count", 0),
+            "recent_topics": conv_state.get("topics_discussed", []),
+            "status": "active" if conv_state.get("message_count", 0) > 0 else "initialized"
+        }
+    
+    # Get conversation history from agent state
+    conversation_state = target_agent.get("conversation_state", {})
+    conversation_history = conversation_state.get("messages", [])
+    
+    # Add user message to history
+    user_message_entry = {
+        "message": chat_message.message,
+        "is_from_user": True,
+        "timestamp": datetime.now().isoformat()
+    }
+    conversation_history.append(user_message_entry)
+    
+    # ------------------------------------------------------------------
+    # Heuristic task extraction: parse the latest user message for
+    # actionable phrases. The tasks are inserted by `_finalize_chat` once the
+    # turn completes, so they are logged even when the LLM doesn't flag them.
+    # ------------------------------------------------------------------
+    task_payloads: list[Dict[str, Any]] = []
     try:
-        # Get user to validate
-        user = await supabase_service.get_user_by_id(str(chat_message.user_id))
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        # Get all agents for inter-agent coordination
-        agents = await supabase_service.get_agents_by_user(str(chat_message.user_id))
-        target_agent = None
-        other_agents = []
-        
-        for agent in agents:
-            if agent["role"] == chat_message.role:
-                target_agent = agent
-            else:
-                other_agents.append(agent)
-        
-        if not target_agent:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"No {chat_message.role} agent found for this user"
-            )
-        
-        # Build inter-agent coordination context
-        other_agents_activity = {}
-        for agent in other_agents:
-            conv_state = agent.get("conversation_state", {})
-            other_agents_activity[agent["role"]] = {
-                "last_active": conv_state.get("timestamp", "unknown"),
-                "message_count": conv_state.get("message_count", 0),
-                "recent_topics": conv_state.get("topics_discussed", []),
-                "status": "active" if conv_state.get("message_count", 0) > 0 else "initialized"
+        import re as _re, uuid as _uuid
+
+        def _infer_role(_desc: str) -> str:
+            _d = _desc.lower()
+            if any(k in _d for k in ["ui", "interface", "frontend", "design"]):
+                return "CTO"
+            if any(k in _d for k in ["marketing", "feedback", "survey", "campaign"]):
+                return "CMO"
+            return "CEO"
+
+        raw_msg = chat_message.message
+        parts = _re.split(r"\band\b|[\n\u2022]", raw_msg)
+        for part in parts:
+            part = part.strip(" .")
+            if not part:
+                continue
+            desc: str | None = None
+            # Look for modal phrases (need to / should / must / have to / please)
+            if _re.search(r"\b(need to|should|must|have to|please)\b", part, _re.I):
+                desc = _re.sub(r"^(I|we)?\s*(need to|should|must|have to|please)\s*", "", part, flags=_re.I).strip()
+            # Or imperative verb at the start (update, gather, etc.)
+            elif _re.match(r"^(?:also\s+|then\s+)?(update|gather|create|build|write|design|implement|fix)\b", part, _re.I):
+                desc = part
+            if desc:
+                task_payloads.append({
+                    "id": str(_uuid.uuid4()),
+                    "user_id": str(chat_message.user_id),
+                    "assigned_to_role": _infer_role(desc),
+                    "description": desc.capitalize(),
+                    "status": "pending",
+                })
+    except Exception as _heur_err:
+        logger.warning(f"Heuristic task extraction failed: {_heur_err}")
+    
+    # Enhanced user context
+    enhanced_user_context = {
+        "user_role": user["role"], 
+        "user_email": user["email"],
+        "startup_stage": "early" if len(conversation_history) < 10 else "growing",
+        "team_size": len(agents) + 1,  # AI agents + human user
+        "active_agents": len([a for a in agents if a.get("conversation_state", {}).get("message_count", 0) > 0])
+    }
+
+    return {
+        "target_agent": target_agent,
+        "conversation_state": conversation_state,
+        "conversation_history": conversation_history,
+        "other_agents_activity": other_agents_activity,
+        "user_context": enhanced_user_context,
+        "heuristic_tasks": task_payloads,
+    }
+
+
+async def _finalize_chat(chat_message: ChatMessage, ctx: Dict[str, Any], ai_response: Dict[str, Any]) -> ChatResponse:
+    """Persist the finished turn and its tasks, and build the response"""
+    conversation_history = ctx["conversation_history"]
+
+    # Add AI response to history
+    ai_message_entry = {
+        "message": ai_response["message"],
+        "is_from_user": False,
+        "timestamp": datetime.now().isoformat()
+    }
+    conversation_history.append(ai_message_entry)
+    
+    # Auto-create tasks if AI marks them using [[task:ROLE]] syntax
+    ai_tasks: list[Dict[str, Any]] = []
+    try:
+        task_matches = re.findall(r"\[\[task:(CEO|CTO|CMO)\]\](.+)", ai_response["message"], re.IGNORECASE)
+        ai_tasks = [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": str(chat_message.user_id),
+                "assigned_to_role": role.upper(),
+                "description": desc.strip(),
+                "status": "pending"
             }
-        
-        # Get conversation history from agent state
-        conversation_state = target_agent.get("conversation_state", {})
-        conversation_history = conversation_state.get("messages", [])
-        
-        # Add user message to history
-        user_message_entry = {
-            "message": chat_message.message,
-            "is_from_user": True,
-            "timestamp": datetime.now().isoformat()
-        }
-        conversation_history.append(user_message_entry)
-        
-        # ------------------------------------------------------------------
-        # Heuristic task extraction: parse the latest user message and create
-        # tasks for any actionable phrases. This guarantees that tasks are
-        # logged even when the LLM doesn't explicitly flag them.
-        # ------------------------------------------------------------------
-        tasks_created: list[str] = []
-        try:
-            import re as _re, uuid as _uuid
-
-            def _infer_role(_desc: str) -> str:
-                _d = _desc.lower()
-                if any(k in _d for k in ["ui", "interface", "frontend", "design"]):
-                    return "CTO"
-                if any(k in _d for k in ["marketing", "feedback", "survey", "campaign"]):
-                    return "CMO"
-                return "CEO"
-
-            raw_msg = chat_message.message
-            parts = _re.split(r"\band\b|[\n\u2022]", raw_msg)
-            for part in parts:
-                part = part.strip(" .")
-                if not part:
-                    continue
-                desc: str | None = None
-                # Look for modal phrases (need to / should / must / have to / please)
-                if _re.search(r"\b(need to|should|must|have to|please)\b", part, _re.I):
-                    desc = _re.sub(r"^(I|we)?\s*(need to|should|must|have to|please)\s*", "", part, flags=_re.I).strip()
-                # Or imperative verb at the start (update, gather, etc.)
-                elif _re.match(r"^(?:also\s+|then\s+)?(update|gather|create|build|write|design|implement|fix)\b", part, _re.I):
-                    desc = part
-                if desc:
-                    task_payload = {
-                        "id": str(_uuid.uuid4()),
-                        "user_id": str(chat_message.user_id),
-                        "assigned_to_role": _infer_role(desc),
-                        "description": desc.capitalize(),
-                        "status": "pending",
-                    }
-                    await supabase_service.create_task(task_payload)
-                    tasks_created.append(desc.capitalize())
-        except Exception as _heur_err:
-            logger.warning(f"Heuristic task extraction failed: {_heur_err}")
-        
-        # ------------------------------------------------------------------
-        # Heuristic task extraction: always create tasks when user message
-        # clearly expresses an action, even if not tagged. Mirrors logic used
-        # Enhanced user context
-        enhanced_user_context = {
-            "user_role": user["role"], 
-            "user_email": user["email"],
-            "startup_stage": "early" if len(conversation_history) < 10 else "growing",
-            "team_size": len(agents) + 1,  # AI agents + human user
-            "active_agents": len([a for a in agents if a.get("conversation_state", {}).get("message_count", 0) > 0])
-        }
-        
+            for role, desc in task_matches
+        ]
+    except Exception as e:
+        logger.warning(f"Failed to parse tasks from AI response: {e}")
+
+    # One insert request for the heuristic and the [[task]] tasks
+    tasks_created: list[str] = []
+    try:
+        await supabase_service.create_tasks_bulk(ctx["heuristic_tasks"] + ai_tasks)
+        tasks_created = [payload["description"] for payload in ctx["heuristic_tasks"]]
+    except Exception as e:
+        logger.warning(f"Failed to create tasks for chat turn: {e}")
+    
+    # Update agent conversation state with enhanced tracking
+    ai_state = ai_response["conversation_state"]
+    topics = ai_state.get("topics_discussed", [])
+    updated_conversation_state = {
+        **ctx["conversation_state"],
+        "messages": conversation_history,
+        "last_updated": datetime.now().isoformat(),
+        "message_count": ai_state["message_count"],
+        "topics_discussed": topics,
+        "sentiment": ai_state.get("sentiment", "engaged"),
+        "context_summary": f"Recent discussion about: {', '.join(topics[:3])}"
+    }
+    
+    await supabase_service.update_agent_conversation(
+        ctx["target_agent"]["id"], 
+        updated_conversation_state
+    )
+    
+    # If we auto-created tasks, append a confirmation note to the assistant message
+    final_message = ai_response["message"]
+    if tasks_created:
+        bullets = "\n".join(f"• {t}" for t in tasks_created)
+        final_message += f"\n\nI've added the following tasks:\n{bullets}"
+
+    return ChatResponse(
+        agent_role=chat_message.role,
+        message=final_message,
+        conversation_state=updated_conversation_state
+    )
+
+
+def _sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat_with_agent(
+    chat_message: ChatMessage,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """Send a message to an AI agent and get a response with enhanced intelligence.
+
+    Send an ``Idempotency-Key`` header to make retries safe: a retry joins
+    or replays the original turn instead of running it again.
+    """
+
+    async def _run_turn() -> ChatResponse:
+        ctx = await _prepare_chat(chat_message)
+
         # Get enhanced AI response
-        ai_response = await openai_service.get_agent_response(
+        completion = openai_service.get_agent_response(
             agent_role=chat_message.role,
             user_message=chat_message.message,
-            conversation_history=conversation_history,
-            user_context=enhanced_user_context,
-            other_agents_activity=other_agents_activity
-        )
-        
-        # Add AI response to history
-        ai_message_entry = {
-            "message": ai_response["message"],
-            "is_from_user": False,
-            "timestamp": datetime.now().isoformat()
-        }
-        conversation_history.append(ai_message_entry)
-        
-        # Auto-create tasks if AI marks them using [[task:ROLE]] syntax
-        try:
-            task_matches = re.findall(r"\[\[task:(CEO|CTO|CMO)\]\](.+)", ai_response["message"], re.IGNORECASE)
-            for role, desc in task_matches:
-                task_data = {
-                    "id": str(uuid.uuid4()),
-                    "user_id": str(chat_message.user_id),
-                    "assigned_to_role": role.upper(),
-                    "description": desc.strip(),
-                    "status": "pending"
-                }
-                await supabase_service.create_task(task_data)
-        except Exception as e:
-            logger.warning(f"Failed to parse or create tasks from AI response: {e}")
-        
-        # Update agent conversation state with enhanced tracking
-        updated_conversation_state = {
-            **conversation_state,
-            "messages": conversation_history,
-            "last_updated": datetime.now().isoformat(),
-            "message_count": ai_response["conversation_state"]["message_count"],
-            "topics_discussed": ai_response["conversation_state"]["topics_discussed"],
-            "sentiment": ai_response["conversation_state"]["sentiment"],
-            "context_summary": f"Recent discussion about: {', '.join(ai_response['conversation_state']['topics_discussed'][:3])}"
-        }
-        
-        await supabase_service.update_agent_conversation(
-            target_agent["id"], 
-            updated_conversation_state
+            conversation_history=ctx["conversation_history"],
+            user_context=ctx["user_context"],
+            other_agents_activity=ctx["other_agents_activity"]
         )
-        
-        # If we auto-created tasks, append a confirmation note to the assistant message
-        final_message = ai_response["message"]
-        if tasks_created:
-            bullets = "\n".join(f"• {t}" for t in tasks_created)
-            final_message += f"\n\nI've added the following tasks:\n{bullets}"
+        if idempotency_key is None:
+            # Abandoned if the client disconnects.  With a key the turn is
+            # finished anyway so the client's retry can pick it up.
+            completion = cancel_on_disconnect(request, completion)
+        ai_response = await completion
 
-        return ChatResponse(
-            agent_role=chat_message.role,
-            message=final_message,
-            conversation_state=updated_conversation_state
+        return await _finalize_chat(chat_message, ctx, ai_response)
+
+    try:
+        with request_deadline(CHAT_DEADLINE_SEC):
+            return await run_idempotent(
+                idempotency_key,
+                scope=f"chat:{chat_message.user_id}",
+                payload=chat_message.model_dump(mode="json"),
+                work=_run_turn,
+                response=response,
+            )
+    except ClientDisconnected:
+        # Tasks and conversation state are only written by _finalize_chat, so the turn is simply dropped
+        logger.info(f"Client disconnected during chat with {chat_message.role}; turn discarded")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except DeadlineExceeded:
+        logger.error(f"Chat with {chat_message.role} exceeded its {CHAT_DEADLINE_SEC}s deadline")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="The agent took too long to respond"
         )
-        
     except HTTPException:
         raise
     except Exception as e:
@@ -209,6 +294,79 @@ async def chat_with_agent(chat_message: ChatMessage):
             detail="Failed to process chat message"
         )
 
+@router.post("/chat/stream")
+async def chat_with_agent_stream(chat_message: ChatMessage):
+    """Streaming variant of /chat that sends tokens as Server-Sent Events.
+
+    Emits ``data: {"token": ...}`` frames while the completion is produced,
+    then a single ``event: done`` frame carrying the full `ChatResponse`
+    (after task parsing and conversation persistence), or ``event: error``.
+    If the client disconnects mid-stream the completion is cancelled and
+    the turn is not persisted.
+    """
+    # One budget for preparing the turn and for the stream, as for /chat
+    stream_deadline = time.monotonic() + CHAT_DEADLINE_SEC
+    try:
+        with request_deadline(CHAT_DEADLINE_SEC):
+            ctx = await _prepare_chat(chat_message)
+    except HTTPException:
+        raise
+    except DeadlineExceeded:
+        logger.error(f"Streaming chat with {chat_message.role} exceeded its {CHAT_DEADLINE_SEC}s deadline")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="The agent took too long to respond"
+        )
+    except Exception as e:
+        logger.error(f"Error preparing streaming chat: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process chat message"
+        )
+
+    async def event_stream():
+        chunks: list[str] = []
+        # Runs after the handler has returned, so its deadline is re-entered
+        # here with what is left of the budget
+        with request_deadline(stream_deadline - time.monotonic()):
+            try:
+                # aclosing: close the upstream stream as soon as we stop reading
+                async with aclosing(
+                    openai_service.stream_agent_response(
+                        agent_role=chat_message.role,
+                        user_message=chat_message.message,
+                        conversation_history=ctx["conversation_history"],
+                        user_context=ctx["user_context"],
+                        other_agents_activity=ctx["other_agents_activity"]
+                    )
+                ) as tokens:
+                    async for token in tokens:
+                        chunks.append(token)
+                        yield _sse_event({"token": token})
+
+                ai_response = openai_service.build_agent_result(
+                    chat_message.role,
+                    "".join(chunks).strip(),
+                    chat_message.message,
+                    ctx["conversation_history"],
+                    ctx["user_context"]
+                )
+                chat_response = await _finalize_chat(chat_message, ctx, ai_response)
+                yield _sse_event(chat_response.model_dump(mode="json"), event="done")
+            except (asyncio.CancelledError, GeneratorExit):
+                # Starlette cancels the response when the client disconnects
+                logger.info(f"Client disconnected during streaming chat with {chat_message.role}; turn discarded")
+                raise
+            except Exception as e:
+                logger.error(f"Error in streaming chat with agent: {e}")
+                yield _sse_event({"detail": "Failed to process chat message"}, event="error")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/{agent_id}/conversation")
 async def get_agent_conversation(agent_id: str):
     """Get conversation history for an agent"""
@@ -228,35 +386,35 @@ async def get_agents_status(user_id: str):
     """Get comprehensive status of all AI agents for a user"""
     try:
         # Get user to validate
-        user = await supabase_service.get_user_by_id(user_id)
+        user = await supabase_service.get_user_by_id(user_id, columns=USER_ROLE_COLUMNS)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        # Get all agents
-        agents = await supabase_service.get_agents_by_user(user_id)
+        # Summary fields only; the message history stays in the database
+        agents = await supabase_service.get_agent_summaries(user_id)
         
         # Build comprehensive status
         agents_status = {}
         for agent in agents:
-            conv_state = agent.get("conversation_state", {})
+            message_count = agent.get("message_count") or 0
             agents_status[agent["role"]] = {
                 "id": agent["id"],
                 "role": agent["role"],
-                "status": "active" if conv_state.get("message_count", 0) > 0 else "initialized",
-                "message_count": conv_state.get("message_count", 0),
-                "last_active": conv_state.get("timestamp", agent.get("created_at")),
-                "recent_topics": conv_state.get("topics_discussed", []),
-                "context_summary": conv_state.get("context_summary", f"AI {agent['role']} ready to assist"),
-                "sentiment": conv_state.get("sentiment", "ready")
+                "status": "active" if message_count > 0 else "initialized",
+                "message_count": message_count,
+                "last_active": agent.get("timestamp") or agent.get("created_at"),
+                "recent_topics": agent.get("topics_discussed") or [],
+                "context_summary": agent.get("context_summary") or f"AI {agent['role']} ready to assist",
+                "sentiment": agent.get("sentiment") or "ready"
             }
         
         return {
             "user_role": user["role"],
             "total_agents": len(agents),
-            "active_agents": len([a for a in agents if a.get("conversation_state", {}).get("message_count", 0) > 0]),
+            "active_agents": len([a for a in agents if (a.get("message_count") or 0) > 0]),
             "agents": agents_status
         }
         
@@ -273,74 +431,13 @@ async def get_agents_status(user_id: str):
 async def get_proactive_suggestions(user_id: str):
     """Get proactive suggestions based on current activity and AI agent status"""
     try:
-        # Get user to validate
-        user = await supabase_service.get_user_by_id(user_id)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
-        
-        # Get agents status
-        agents = await supabase_service.get_agents_by_user(user_id)
-        
-        # Get recent tasks for activity context
-        tasks = await supabase_service.get_tasks_by_user(user_id)
-        recent_tasks = tasks[:5]  # Last 5 tasks
-        
-        # Build activity context
-        recent_activity = {
-            "user_role": user["role"],
-            "total_tasks": len(tasks),
-            "pending_tasks": len([t for t in tasks if t.get("status") == "pending"]),
-            "recent_task_topics": [t.get("description", "")[:50] for t in recent_tasks]
-        }
-        
-        # Build AI agents status
-        ai_agents_status = {}
-        for agent in agents:
-            conv_state = agent.get("conversation_state", {})
-            ai_agents_status[agent["role"]] = {
-                "activity_level": conv_state.get("message_count", 0),
-                "recent_topics": conv_state.get("topics_discussed", []),
-                "status": "active" if conv_state.get("message_count", 0) > 0 else "underutilized"
-            }
-        
-        # -------------------------------------------------------------------
-        # Try to serve cached suggestions if they are still fresh
-        cached = _SUGGESTIONS_CACHE.get(user_id)
-        now = datetime.utcnow()
-        if cached and now - cached["timestamp"] < _SUGGESTIONS_TTL:
-            return cached["payload"]
-
-        # Generate fresh proactive suggestions via OpenAI
-        suggestions = await openai_service.get_proactive_suggestions(
-            user_role=RoleEnum(user["role"]),
-            recent_activity=recent_activity,
-            ai_agents_status=ai_agents_status,
-        )
-        
-        # Attach the originating AI role to each suggestion for richer UI context
-        ai_roles = [agent["role"] for agent in agents if agent["role"] != user["role"]]
-        for idx, suggestion in enumerate(suggestions):
-            # Cycle through available AI roles so we always have a from_agent label
-            if isinstance(suggestion, dict):
-                suggestion["from_agent"] = ai_roles[idx % len(ai_roles)] if ai_roles else None
-
-        response_payload = {
-            "user_id": user_id,
-            "generated_at": "now",
-            "suggestions": suggestions,
-            "context": {
-                "recent_activity": recent_activity,
-                "ai_agents_status": ai_agents_status
-            }
-        }
+        # Serve cached suggestions before touching the database
+        cached = await _SUGGESTIONS_CACHE.get(user_id)
+        if cached is not None:
+            return cached
 
-        # Store in cache
-        _SUGGESTIONS_CACHE[user_id] = {"timestamp": now, "payload": response_payload}
-
-        return response_payload
+        # Concurrent misses for the same user share one DB + OpenAI round
+        return await _SUGGESTIONS_FLIGHT.do(user_id, lambda: _build_proactive_suggestions(user_id))
         
     except HTTPException:
         raise
@@ -351,12 +448,89 @@ async def get_proactive_suggestions(user_id: str):
             detail="Failed to get proactive suggestions"
         ) 
 
+async def _build_proactive_suggestions(user_id: str) -> Dict[str, Any]:
+    """Generate suggestions for *user_id* and store them in the cache"""
+    # Get user to validate
+    user = await supabase_service.get_user_by_id(user_id, columns=USER_ROLE_COLUMNS)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    # Get agents status
+    agents = await supabase_service.get_agent_summaries(user_id)
+    
+    # Last 5 tasks plus counts for activity context, without a full scan
+    recent_tasks, total_tasks, pending_tasks = await asyncio.gather(
+        supabase_service.get_tasks_by_user(user_id, columns=TASK_ACTIVITY_COLUMNS, limit=5),
+        supabase_service.count_tasks_by_user(user_id),
+        supabase_service.count_tasks_by_user(user_id, status="pending"),
+    )
+    
+    # Build activity context
+    recent_activity = {
+        "user_role": user["role"],
+        "total_tasks": total_tasks,
+        "pending_tasks": pending_tasks,
+        "recent_task_topics": [t.get("description", "")[:50] for t in recent_tasks]
+    }
+    
+    # Build AI agents status
+    ai_agents_status = {}
+    for agent in agents:
+        message_count = agent.get("message_count") or 0
+        ai_agents_status[agent["role"]] = {
+            "activity_level": message_count,
+            "recent_topics": agent.get("topics_discussed") or [],
+            "status": "active" if message_count > 0 else "underutilized"
+        }
+
+    # Generate fresh proactive suggestions via OpenAI
+    suggestions = await openai_service.get_proactive_suggestions(
+        user_role=RoleEnum(user["role"]),
+        recent_activity=recent_activity,
+        ai_agents_status=ai_agents_status,
+    )
+    
+    # Attach the originating AI role to each suggestion for richer UI context
+    ai_roles = [agent["role"] for agent in agents if agent["role"] != user["role"]]
+    for idx, suggestion in enumerate(suggestions):
+        # Cycle through available AI roles so we always have a from_agent label
+        if isinstance(suggestion, dict):
+            suggestion["from_agent"] = ai_roles[idx % len(ai_roles)] if ai_roles else None
+
+    response_payload = {
+        "user_id": user_id,
+        "generated_at": "now",
+        "suggestions": suggestions,
+        "context": {
+            "recent_activity": recent_activity,
+            "ai_agents_status": ai_agents_status
+        }
+    }
+
+    # Store in cache
+    await _SUGGESTIONS_CACHE.set(user_id, response_payload)
+
+    return response_payload
+
 @router.post("/chat-tools", response_model=ChatResponse)
-async def chat_with_agent_tools(chat_message: ChatMessage):
-    """Chat with agent using OpenAI function calling and EDGE tools"""
-    try:
+async def chat_with_agent_tools(
+    chat_message: ChatMessage,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """Chat with agent using OpenAI function calling and EDGE tools (honours ``Idempotency-Key``)"""
+
+    async def _run_turn() -> ChatResponse:
         agent = get_tool_agent()
-        response_text = await agent.chat(chat_message.message, str(chat_message.user_id))
+        reply = agent.chat(chat_message.message, str(chat_message.user_id))
+        if idempotency_key is None:
+            # Cancels in-flight completions and tool calls if the client leaves
+            reply = cancel_on_disconnect(request, reply)
+        response_text = await reply
 
         # Return simple response; conversation_state is placeholder
         return ChatResponse(
@@ -364,6 +538,24 @@ async def chat_with_agent_tools(chat_message: ChatMessage):
             message=response_text,
             conversation_state={},
         )
+
+    try:
+        with request_deadline(TOOL_CHAT_DEADLINE_SEC):
+            return await run_idempotent(
+                idempotency_key,
+                scope=f"chat-tools:{chat_message.user_id}",
+                payload=chat_message.model_dump(mode="json"),
+                work=_run_turn,
+                response=response,
+            )
+    except ClientDisconnected:
+        logger.info("Client disconnected during tool chat; cancelled")
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+    except DeadlineExceeded:
+        logger.error(f"Tool chat exceeded its {TOOL_CHAT_DEADLINE_SEC}s deadline")
+        raise HTTPException(status_code=504, detail="Tool chat timed out")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat_with_agent_tools: {e}")
         raise HTTPException(status_code=500, detail="Tool chat failed") 
\ No newline at end of file
@@ -16,7 +16,7 @@ async def create_company(company_data: CompanyCreate):
             raise HTTPException(status_code=500, detail="Failed to create company")
         # Propagate context to user agents
         try:
-            agents = await supabase_service.get_agents_by_user(created["user_id"])
+            agents = await supabase_service.get_agents_by_user(created["user_id"], use_cache=False)
             for agent in agents:
                 conversation_state = agent.get("conversation_state") or {}
                 context = conversation_state.get("context", {})
@@ -49,7 +49,7 @@ async def update_company(company_id: str, company_data: dict = Body(...)):
         # Propagate updated context to user agents
         try:
             user_id = updated["user_id"]
-            agents = await supabase_service.get_agents_by_user(user_id)
+            agents = await supabase_service.get_agents_by_user(user_id, use_cache=False)
             for agent in agents:
                 conversation_state = agent.get("conversation_state") or {}
                 context = conversation_state.get("context", {})
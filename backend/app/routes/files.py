@@ -9,7 +9,7 @@ from pathlib import Path
 import shutil
 
 from app.config import ENVIRONMENT  # just to ensure config import works
-from app.services.supabase_service import supabase_service
+from app.services.supabase_service import COMPANY_FILES_COLUMNS, supabase_service
 from app.auth import get_current_user, AuthUser
 from app.utils.filesystem import get_user_workspace, is_safe_path
 
@@ -162,7 +162,7 @@ async def upload_files(
     import asyncio
     async def update_company_files():
         try:
-            company = await supabase_service.get_company_by_user(user_id)
+            company = await supabase_service.get_company_by_user(user_id, columns=COMPANY_FILES_COLUMNS)
             if company:
                 existing_files = company.get("codebase_files", []) or []
                 # Add new files to existing list (avoid duplicates)
@@ -0,0 +1,36 @@
+"""Operational metrics endpoints (in-process, per worker).
+
+Behind the same bearer-token auth as the other ``/api`` routes.
+"""
+
+from fastapi import APIRouter, Depends
+
+from app.auth import get_current_user
+from app.services.cache import cache_stats
+from app.services.db_pool import db_pool
+from app.services.entity_cache import entity_cache
+from app.services.llm_gateway import llm_gateway
+from app.services.llm_telemetry import llm_telemetry
+from app.services.model_router import model_router
+from app.utils.idempotency import idempotency_stats
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+@router.get("/llm")
+async def llm_metrics():
+    """Per call-site LLM usage plus routing, resilience and cache counters."""
+    return {
+        "calls": llm_telemetry.snapshot(),
+        "tiers": model_router.stats(),
+        "resilience": llm_gateway.resilience_stats(),
+        "completion_cache": llm_gateway.cache.stats(),
+        "shared_cache": cache_stats(),
+        "idempotency": idempotency_stats(),
+    }
+
+
+@router.get("/db")
+async def db_metrics():
+    """Supabase thread pool queue depth/latency and entity cache hit ratios."""
+    return {"pool": db_pool.stats(), "entity_cache": entity_cache.stats()}
@@ -1,19 +1,38 @@
-from fastapi import APIRouter, HTTPException, status
-from app.models import Task, TaskCreate, TaskUpdate, TaskStatusEnum
-from app.services.supabase_service import supabase_service
-from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from app.models import RoleEnum, Task, TaskCreate, TaskPage, TaskUpdate, TaskStatusEnum
+from app.services.supabase_service import encode_task_cursor, supabase_service
+from app.utils.deadline import DeadlineExceeded
+from app.utils.idempotency import run_idempotent
+from typing import List, Literal, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 @router.post("/", response_model=Task, status_code=status.HTTP_201_CREATED)
-async def create_task(task_data: TaskCreate):
-    """Create a new task"""
+async def create_task(
+    task_data: TaskCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """Create a new task; retries with the same ``Idempotency-Key`` do not duplicate it"""
+    return await run_idempotent(
+        idempotency_key,
+        scope=f"tasks:{task_data.user_id}",
+        payload=task_data.model_dump(mode="json"),
+        work=lambda: _create_task(task_data),
+        response=response,
+    )
+
+
+async def _create_task(task_data: TaskCreate) -> Task:
     try:
         # Validate user exists, unless we are running in mock mode without Supabase
         if supabase_service.client:
-            user = await supabase_service.get_user_by_id(str(task_data.user_id))
+            user = await supabase_service.get_user_by_id(str(task_data.user_id), columns="id")
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -40,16 +59,38 @@ async def create_task(task_data: TaskCreate):
             detail="Failed to create task"
         )
 
+async def _task_page(
+    user_id: str,
+    *,
+    task_status: Optional[TaskStatusEnum],
+    role: Optional[str],
+    order: str,
+    limit: int,
+    cursor: Optional[str],
+) -> TaskPage:
+    # One extra row tells whether another page follows
+    try:
+        tasks = await supabase_service.get_tasks_by_user(
+            user_id,
+            status=task_status.value if task_status else None,
+            role=role,
+            order=order,
+            limit=limit + 1,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    page = tasks[:limit]
+    next_cursor = encode_task_cursor(page[-1], order) if len(tasks) > limit else None
+    return TaskPage(items=[Task(**task) for task in page], next_cursor=next_cursor)
+
 @router.get("/user/{user_id}", response_model=List[Task])
-async def get_user_tasks(user_id: str, status: Optional[TaskStatusEnum] = None):
-    """Get all tasks for a user, optionally filtered by status"""
+async def get_user_tasks(user_id: str, task_status: Optional[TaskStatusEnum] = Query(default=None, alias="status")):
+    """Get all tasks for a user, newest first, optionally filtered by status"""
     try:
-        tasks = await supabase_service.get_tasks_by_user(user_id)
-        
-        # Filter by status if provided
-        if status:
-            tasks = [task for task in tasks if task.get("status") == status]
-        
+        tasks = await supabase_service.get_tasks_by_user(
+            user_id, status=task_status.value if task_status else None
+        )
         return [Task(**task) for task in tasks]
         
     except Exception as e:
@@ -106,12 +147,39 @@ async def delete_task(task_id: str):
             detail="Failed to delete task"
         )
 
+@router.get("/user/{user_id}/page", response_model=TaskPage)
+async def get_user_tasks_page(
+    user_id: str,
+    task_status: Optional[TaskStatusEnum] = Query(default=None, alias="status"),
+    role: Optional[RoleEnum] = None,
+    order: Literal["desc", "asc"] = "desc",
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Get one page of a user's tasks; pass `next_cursor` back as `cursor` for the next"""
+    try:
+        return await _task_page(
+            user_id,
+            task_status=task_status,
+            role=role.value if role else None,
+            order=order,
+            limit=limit,
+            cursor=cursor,
+        )
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"Error getting user tasks page: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get user tasks"
+        )
+
 @router.get("/role/{role}/user/{user_id}", response_model=List[Task])
 async def get_tasks_by_role(role: str, user_id: str):
     """Get all tasks assigned to a specific role for a user"""
     try:
-        all_tasks = await supabase_service.get_tasks_by_user(user_id)
-        role_tasks = [task for task in all_tasks if task.get("assigned_to_role") == role]
+        role_tasks = await supabase_service.get_tasks_by_user(user_id, role=role)
         
         return [Task(**task) for task in role_tasks]
         
@@ -122,6 +190,29 @@ async def get_tasks_by_role(role: str, user_id: str):
             detail="Failed to get tasks by role"
         ) 
 
+@router.get("/role/{role}/user/{user_id}/page", response_model=TaskPage)
+async def get_tasks_by_role_page(
+    role: str,
+    user_id: str,
+    task_status: Optional[TaskStatusEnum] = Query(default=None, alias="status"),
+    order: Literal["desc", "asc"] = "desc",
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """Get one page of the tasks assigned to a specific role for a user"""
+    try:
+        return await _task_page(
+            user_id, task_status=task_status, role=role, order=order, limit=limit, cursor=cursor
+        )
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"Error getting tasks by role page: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get tasks by role"
+        )
+
 @router.post("/{task_id}/resources")
 async def add_task_resource(task_id: str, path: str):
     """Attach a resource file path to an existing task."""
@@ -3,6 +3,7 @@ from app.models import UserCreate, User, RoleEnum
 from app.services.supabase_service import supabase_service
 from app.services.openai_service import openai_service
 from app.auth import get_current_user, AuthUser
+from app.utils.deadline import request_deadline
 from typing import List
 import logging
 import os
@@ -13,15 +14,18 @@ router = APIRouter()
 async def generate_initial_tasks_background(user_id: str, user_role: RoleEnum, user_email: str, auth_user_id: str):
     """Background task to generate initial tasks after user onboarding"""
     try:
-        initial_tasks = await openai_service.generate_initial_tasks(
-            user_role, 
-            {"user_email": user_email, "user_role": user_role}
-        )
-        
-        for task in initial_tasks:
-            task["user_id"] = user_id
-            task["auth_user_id"] = auth_user_id  # Add auth user ID for workspace isolation
-            await supabase_service.create_task(task)
+        # Runs after the response: not bound by the request's deadline
+        with request_deadline(None):
+            initial_tasks = await openai_service.generate_initial_tasks(
+                user_role, 
+                {"user_email": user_email, "user_role": user_role}
+            )
+
+            for task in initial_tasks:
+                task["user_id"] = user_id
+                task["auth_user_id"] = auth_user_id  # Add auth user ID for workspace isolation
+            # One insert request for the whole task board
+            await supabase_service.create_tasks_bulk(initial_tasks)
             
         logger.info(f"Successfully generated {len(initial_tasks)} initial tasks for user {user_id}")
     except Exception as e:
@@ -66,11 +70,11 @@ async def onboard_user(user_data: UserCreate, background_tasks: BackgroundTasks,
         
         user_id = created_user["id"]
         
-        # Create AI agents for the roles the user didn't choose
+        # Create AI agents for the roles the user didn't choose (one insert)
         ai_roles = [role for role in RoleEnum if role != user_data.role]
         
-        for ai_role in ai_roles:
-            agent_data = {
+        await supabase_service.create_agents_bulk([
+            {
                 "user_id": user_id,
                 "role": ai_role,
                 "conversation_state": {
@@ -79,7 +83,8 @@ async def onboard_user(user_data: UserCreate, background_tasks: BackgroundTasks,
                     "context": {"user_role": user_data.role}
                 }
             }
-            await supabase_service.create_agent(agent_data)
+            for ai_role in ai_roles
+        ])
         
         # Schedule initial task generation in the background
         background_tasks.add_task(
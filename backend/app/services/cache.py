@@ -0,0 +1,398 @@
+"""Shared cache abstraction with pluggable backends.
+
+Backends
+--------
+* ``memory`` – process-local LRU (default; one cache per worker).
+* ``sqlite`` – a SQLite file shared by every worker on the same host.
+* ``redis``  – any server speaking the Redis protocol (RESP), shared by all
+  hosts.  Size bounds come from the server's ``maxmemory`` policy.
+
+Select one with ``CACHE_BACKEND`` / ``CACHE_URL``.  Callers never talk to a
+backend directly; they use `get_cache(namespace)`, which prefixes keys with
+the namespace, applies a default TTL and keeps hit/miss counters.  Values
+must be JSON-serialisable.  The cache is best-effort: backend errors are
+logged and treated as misses.
+"""
+
+import abc
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.config import CACHE_BACKEND, CACHE_URL, CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCacheBackend",
+    "SQLiteCacheBackend",
+    "RedisCacheBackend",
+    "NamespacedCache",
+    "get_cache",
+    "cache_stats",
+]
+
+
+class CacheBackend(abc.ABC):
+    """Raw key/value store holding serialised (string) values."""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the stored value or None if missing/expired."""
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store *value*; *ttl* is in seconds (None = no expiry)."""
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove *key* if present."""
+
+    @abc.abstractmethod
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Atomically store *value* only if *key* is absent; True if stored."""
+
+    async def aclose(self) -> None:
+        """Release backend resources."""
+
+
+# ---------------------------------------------------------------------------
+# In-memory LRU
+# ---------------------------------------------------------------------------
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # key -> (expires_at or None, value); order == recency of use
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        # No await between the check and the set, so this is atomic per process
+        entry = self._entries.get(key)
+        if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+
+# ---------------------------------------------------------------------------
+# SQLite file (shared by local workers)
+# ---------------------------------------------------------------------------
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """LRU-by-last-access cache stored in a SQLite file.
+
+    Every operation opens its own connection in a worker thread, so several
+    uvicorn worker processes can share the file safely (WAL mode).
+    """
+
+    def __init__(self, path: str, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def _get_sync(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def _set_sync(self, key: str, value: str, ttl: Optional[float]) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            # Enforce the size bound: expired rows first, then least recently used
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _delete_sync(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _add_sync(self, key: str, value: str, ttl: Optional[float]) -> bool:
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._connect() as conn:
+            # One transaction: an expired row does not block the insert
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            return cursor.rowcount == 1
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await asyncio.to_thread(self._set_sync, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete_sync, key)
+
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self._add_sync, key, value, ttl)
+
+
+# ---------------------------------------------------------------------------
+# Redis protocol
+# ---------------------------------------------------------------------------
+
+
+class RedisError(Exception):
+    """Error reply returned by the Redis server."""
+
+
+class RedisCacheBackend(CacheBackend):
+    """Minimal asyncio RESP client supporting GET / SET [NX] PX / DEL.
+
+    Works against Redis, Valkey, KeyDB or any local stand-in that speaks the
+    protocol.  Requests share one connection and are serialised by a lock;
+    the connection is re-opened after any error or cancellation, so a reply
+    left unread is never handed to the next request.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        parsed = urlparse(url or "redis://localhost:6379/0")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int((parsed.path or "/0").lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout=self.timeout
+        )
+        if self.password:
+            await self._roundtrip("AUTH", self.password)
+        if self.db:
+            await self._roundtrip("SELECT", str(self.db))
+
+    async def _roundtrip(self, *args: str) -> Any:
+        assert self._writer is not None and self._reader is not None
+        payload = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg.encode("utf-8")
+            payload.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._writer.write(b"".join(payload))
+        await self._writer.drain()
+        return await asyncio.wait_for(self._read_reply(), timeout=self.timeout)
+
+    async def _read_reply(self) -> Any:
+        assert self._reader is not None
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode("utf-8")
+        if kind == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    async def execute(self, *args: str) -> Any:
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                return await self._roundtrip(*args)
+            except BaseException:
+                # A command that failed or was cancelled mid-flight may leave
+                # its reply unread; the next command would read it as its own
+                await self._reset()
+                raise
+
+    async def _reset(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        if ttl:
+            await self.execute("SET", key, value, "PX", str(int(ttl * 1000)))
+        else:
+            await self.execute("SET", key, value)
+
+    async def delete(self, key: str) -> None:
+        await self.execute("DEL", key)
+
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        expiry = ("PX", str(int(ttl * 1000))) if ttl else ()
+        return await self.execute("SET", key, value, "NX", *expiry) == "OK"
+
+    async def aclose(self) -> None:
+        async with self._lock:
+            await self._reset()
+
+
+# ---------------------------------------------------------------------------
+# Namespaced front-end
+# ---------------------------------------------------------------------------
+
+
+class NamespacedCache:
+    """JSON-valued view of a backend restricted to one key namespace."""
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: Optional[float] = None):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"edge:{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self.backend.get(self._key(key))
+        except Exception as e:
+            logger.warning(f"Cache get failed for {self.namespace}: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        try:
+            await self.backend.set(self._key(key), json.dumps(value, default=str), ttl or self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache set failed for {self.namespace}: {e}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.backend.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {self.namespace}: {e}")
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Store *value* only if *key* is absent.
+
+        Unlike the other operations a backend error is raised, since callers
+        use this to claim work and must not assume the claim succeeded.
+        """
+        return await self.backend.add(self._key(key), json.dumps(value, default=str), ttl or self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def _create_backend() -> CacheBackend:
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(CACHE_URL or "/tmp/edge_cache.sqlite3")
+    if CACHE_BACKEND == "redis":
+        return RedisCacheBackend(CACHE_URL or "redis://localhost:6379/0")
+    if CACHE_BACKEND != "memory":
+        logger.warning(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}', falling back to memory")
+    return MemoryCacheBackend()
+
+
+_backend: Optional[CacheBackend] = None
+_namespaces: Dict[str, NamespacedCache] = {}
+
+
+def get_cache(namespace: str, *, ttl: Optional[float] = None) -> NamespacedCache:
+    """Return the (shared) cache view for *namespace*."""
+    global _backend
+    if _backend is None:
+        _backend = _create_backend()
+    cache = _namespaces.get(namespace)
+    if cache is None:
+        cache = _namespaces[namespace] = NamespacedCache(_backend, namespace, ttl)
+    return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters for every namespace created so far."""
+    return {name: cache.stats() for name, cache in _namespaces.items()}
@@ -0,0 +1,102 @@
+"""Bounded thread pool for the synchronous Supabase client.
+
+The ``supabase`` package (1.x) only ships a blocking PostgREST client, so
+`SupabaseService` hands every ``.execute()`` to this pool instead of running
+it on the event loop.  The pool size (``SUPABASE_MAX_WORKERS``) caps the
+number of concurrent DB round trips; callers beyond that wait in the queue.
+
+Queue depth, queue wait and execution latency are served by
+``GET /api/metrics/db`` so a saturated pool is visible before it shows up as
+request latency.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.config import SUPABASE_MAX_WORKERS
+from app.services.llm_telemetry import LATENCY_BUCKETS_MS, Histogram
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BlockingCallPool:
+    def __init__(self, max_workers: int = SUPABASE_MAX_WORKERS, name: str = "supabase"):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        # Counters are updated from worker threads as well as the loop
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.errors = 0
+        self.abandoned = 0
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.run_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    def _call(self, fn: Callable[..., T], args: tuple, submitted: float) -> T:
+        started = time.monotonic()
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.queue_wait_ms.observe((started - submitted) * 1000)
+        failed = False
+        try:
+            return fn(*args)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+                self.errors += failed
+                self.run_ms.observe((time.monotonic() - started) * 1000)
+
+    async def run(self, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None) -> T:
+        """Run ``fn(*args)`` on the pool and await its result.
+
+        If the caller stops waiting (cancellation or *timeout*) before the
+        call has started, it is dropped from the queue.  A call that is
+        already running finishes in its thread; its result is discarded.
+        """
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future = self._executor.submit(self._call, fn, args, time.monotonic())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            dropped = future.cancel()
+            with self._lock:
+                if dropped:
+                    self.queued -= 1
+                self.abandoned += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "active": self.active,
+                "completed": self.completed,
+                "errors": self.errors,
+                "abandoned": self.abandoned,
+                "queue_wait_ms": self.queue_wait_ms.snapshot(),
+                "run_ms": self.run_ms.snapshot(),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Create a singleton instance
+db_pool = BlockingCallPool()
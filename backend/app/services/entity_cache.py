@@ -0,0 +1,108 @@
+"""Read-through cache for rows `SupabaseService` reads on every request.
+
+Users (by ``id`` and ``auth_user_id``), a user's agents and their summaries
+(by ``user_id``) and a user's company (by ``user_id``) are kept in the shared
+cache (`get_cache`), one namespace per entity kind, for
+``ENTITY_CACHE_TTL_SEC``.  Size is bounded by the cache backend
+(``CACHE_MAX_ENTRIES`` for memory/sqlite, ``maxmemory`` for redis).  With a
+shared backend an invalidation is seen by every worker; with the memory
+backend it is not, so the cache is off by default there.  It is also off
+by default with redis; set ``ENTITY_CACHE_TTL_SEC`` to enable it.
+
+Read-modify-write paths (appending a chat turn to an agent's
+``conversation_state``) read agents with ``use_cache=False``.
+
+`SupabaseService` invalidates the affected keys after each of its own
+writes; rows changed outside the service are stale for at most the TTL.
+Misses are not cached, so a row created later is found immediately.
+Callers pass ``owned_by_key`` so a cached row is only returned for the
+key (``id``, ``auth_user_id`` or ``user_id``) it was stored under.
+Hit ratios per kind are served by ``GET /api/metrics/db``.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import ENTITY_CACHE_TTL_SEC
+from app.services.cache import NamespacedCache, get_cache
+
+logger = logging.getLogger(__name__)
+
+ENTITY_KINDS = ("users", "agents", "companies")
+
+# Recent invalidations remembered to reject fills that raced with a write
+_MAX_TRACKED_INVALIDATIONS = 4096
+
+
+class EntityCache:
+    def __init__(self, ttl: float = ENTITY_CACHE_TTL_SEC):
+        self.enabled = ttl > 0
+        self._caches: Dict[str, NamespacedCache] = {
+            kind: get_cache(f"entity:{kind}", ttl=ttl) for kind in ENTITY_KINDS
+        }
+        # Bumped on every invalidation; "kind:key" -> generation it was invalidated at
+        self._generation = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self.stale_fills = 0
+        self.mismatches = 0
+
+    def covers(self, columns: str, cached_columns: str) -> bool:
+        """Whether a read of *columns* can be served from rows of *cached_columns*"""
+        return self.enabled and set(columns.split(",")) <= set(cached_columns.split(","))
+
+    async def get_or_load(
+        self,
+        kind: str,
+        key: str,
+        load: Callable[[], Awaitable[Any]],
+        owned_by_key: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return the cached value for *key*, or ``await load()`` and cache it.
+
+        A value loaded while the same key was invalidated is returned but not
+        stored, so a read that started before a write cannot cache the old row.
+        A cached value rejected by *owned_by_key* (a row of another user) is
+        dropped and reloaded instead of returned.
+        """
+        cache = self._caches[kind]
+        value = await cache.get(key)
+        if value is not None:
+            if owned_by_key is None or owned_by_key(value):
+                return value
+            self.mismatches += 1
+            logger.warning(f"Entity cache entry {kind}:{key} holds another key's row; reloading")
+            await cache.delete(key)
+
+        started_at = self._generation
+        value = await load()
+        if value is None:
+            return None
+        if self._invalidated.get(f"{kind}:{key}", -1) > started_at:
+            self.stale_fills += 1
+            return value
+        await cache.set(key, value)
+        return value
+
+    async def invalidate(self, kind: str, *keys: str) -> None:
+        """Drop *keys* of *kind* after a write"""
+        for key in keys:
+            self._generation += 1
+            tracked = f"{kind}:{key}"
+            self._invalidated[tracked] = self._generation
+            self._invalidated.move_to_end(tracked)
+            while len(self._invalidated) > _MAX_TRACKED_INVALIDATIONS:
+                self._invalidated.popitem(last=False)
+            await self._caches[kind].delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "stale_fills": self.stale_fills,
+            "mismatches": self.mismatches,
+            **{kind: cache.stats() for kind, cache in self._caches.items()},
+        }
+
+
+# Create a singleton instance
+entity_cache = EntityCache()
@@ -0,0 +1,122 @@
+"""OpenAI Batch API transport for non-latency-sensitive completions.
+
+Requests are written as JSONL in the Batch API input format
+(``{"custom_id", "method", "url", "body"}`` per line), uploaded with
+``purpose="batch"`` and submitted against ``/v1/chat/completions``.
+`poll` reports the batch status and, once completed, parses the output
+file into ``{custom_id: content_or_None}``.
+
+The transport only uses the standard ``files`` / ``batches`` endpoints of
+an `AsyncOpenAI` client, so it can be pointed at a local stand-in server
+via ``base_url`` for testing.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+BATCH_DIR = Path(os.getenv("EDGE_BATCH_DIR", "/tmp/edge_batches")).resolve()
+
+_CHAT_ENDPOINT = "/v1/chat/completions"
+# Terminal states where no output will ever arrive
+_FAILED_STATES = {"failed", "expired", "cancelled"}
+
+
+def build_batch_line(custom_id: str, model: str, messages: List[Dict[str, Any]], **params: Any) -> Dict[str, Any]:
+    """Return one Batch API input line for a chat completion."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": _CHAT_ENDPOINT,
+        "body": {"model": model, "messages": messages, **params},
+    }
+
+
+@dataclass
+class BatchResult:
+    """Status of a submitted batch; `outputs` is filled once completed."""
+
+    batch_id: str
+    status: str
+    outputs: Dict[str, Optional[str]] = field(default_factory=dict)
+
+    @property
+    def done(self) -> bool:
+        return self.status == "completed"
+
+    @property
+    def failed(self) -> bool:
+        return self.status in _FAILED_STATES
+
+
+class BatchTransport:
+    def __init__(self, client: AsyncOpenAI, batch_dir: Path = BATCH_DIR):
+        self.client = client
+        self.batch_dir = batch_dir
+
+    async def submit(self, lines: List[Dict[str, Any]], metadata: Optional[Dict[str, str]] = None) -> str:
+        """Write *lines* to a JSONL file, upload it and create a batch.
+
+        Returns the batch id.  The JSONL file is kept in `batch_dir` for
+        auditing.
+        """
+        self.batch_dir.mkdir(parents=True, exist_ok=True)
+        payload = "\n".join(json.dumps(line) for line in lines) + "\n"
+
+        uploaded = await self.client.files.create(
+            file=("batch_input.jsonl", payload.encode("utf-8")),
+            purpose="batch",  # type: ignore[arg-type]
+        )
+        batch = await self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=_CHAT_ENDPOINT,
+            completion_window="24h",
+            metadata=metadata,
+        )
+        (self.batch_dir / f"{batch.id}.jsonl").write_text(payload)
+        logger.info(f"Submitted batch {batch.id} with {len(lines)} request(s)")
+        return batch.id
+
+    async def poll(self, batch_id: str) -> BatchResult:
+        """Return the batch status, with parsed outputs once completed."""
+        batch = await self.client.batches.retrieve(batch_id)
+        result = BatchResult(batch_id=batch_id, status=batch.status)
+        if batch.status != "completed":
+            return result
+
+        if batch.output_file_id:
+            content = await self.client.files.content(batch.output_file_id)
+            result.outputs.update(self._parse_output(content.text))
+        if batch.error_file_id:
+            # Requests that failed entirely are reported in the error file
+            content = await self.client.files.content(batch.error_file_id)
+            for custom_id in self._parse_output(content.text):
+                result.outputs.setdefault(custom_id, None)
+        return result
+
+    @staticmethod
+    def _parse_output(text: str) -> Dict[str, Optional[str]]:
+        """Map custom_id -> assistant content (None for failed requests)."""
+        outputs: Dict[str, Optional[str]] = {}
+        for raw in text.splitlines():
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            custom_id = line.get("custom_id")
+            response = line.get("response") or {}
+            if line.get("error") or response.get("status_code") != 200:
+                logger.warning(f"Batch request {custom_id} failed: {line.get('error') or response.get('status_code')}")
+                outputs[custom_id] = None
+                continue
+            try:
+                outputs[custom_id] = response["body"]["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                outputs[custom_id] = None
+        return outputs
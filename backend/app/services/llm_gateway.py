@@ -0,0 +1,380 @@
+"""Async gateway for every chat-completion call made by the backend.
+
+All LLM traffic (agent chat, tool agent, background worker, tools) goes
+through the single `llm_gateway` instance so that it shares one
+`AsyncOpenAI` client, one HTTP connection pool and one concurrency limit.
+Nothing in here blocks the event loop.  Byte-identical requests are served
+from an in-process `CompletionCache` unless the call site opts out.
+
+Failures are handled here rather than at each call site (see
+`app/services/llm_resilience.py`): retryable errors are retried with
+jittered backoff within the call's timeout, a per-model circuit breaker
+fails fast while the provider is degraded, and call sites that pass
+``hedge=True`` get a hedged second request once the first is slower than
+the model's observed p95 latency (when ``LLM_HEDGE_ENABLED`` is set).
+Every call, cache hits included, is reported to `llm_telemetry`.  Call
+timeouts are shrunk to the current request's deadline (`app.utils.deadline`).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import (
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT_SEC,
+    LLM_MAX_CONNECTIONS,
+    LLM_RETRY_MAX_ATTEMPTS,
+    LLM_RETRY_BASE_DELAY_SEC,
+    LLM_RETRY_MAX_DELAY_SEC,
+    LLM_BREAKER_FAILURE_THRESHOLD,
+    LLM_BREAKER_RESET_SEC,
+    LLM_HEDGE_ENABLED,
+    LLM_HEDGE_MIN_DELAY_SEC,
+)
+from app.services.llm_cache import CompletionCache
+from app.services.llm_telemetry import LLMTelemetry, llm_telemetry
+from app.services.prompt_budget import count_prompt_tokens, count_tokens
+from app.utils import deadline
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    LatencyTracker,
+    RetryPolicy,
+    hedged,
+    is_retryable,
+    retry_after_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        api_key: Optional[str] = OPENAI_API_KEY,
+        *,
+        base_url: Optional[str] = OPENAI_BASE_URL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT_SEC,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        cache: Optional[CompletionCache] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+        breaker_reset_sec: float = LLM_BREAKER_RESET_SEC,
+        hedging: bool = LLM_HEDGE_ENABLED,
+        hedge_min_delay: float = LLM_HEDGE_MIN_DELAY_SEC,
+        telemetry: Optional[LLMTelemetry] = None,
+    ):
+        self.timeout = timeout
+        self.cache = cache if cache is not None else CompletionCache()
+        self.telemetry = telemetry if telemetry is not None else llm_telemetry
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.retry = retry or RetryPolicy(
+            max_attempts=LLM_RETRY_MAX_ATTEMPTS,
+            base_delay=LLM_RETRY_BASE_DELAY_SEC,
+            max_delay=LLM_RETRY_MAX_DELAY_SEC,
+        )
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_sec = breaker_reset_sec
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self.retries = 0
+        self.hedges_sent = 0
+
+        # A custom base URL (e.g. the local stand-in in app/dev/fake_openai.py)
+        # enables the client even with the placeholder key
+        if base_url or (api_key and api_key != "sk-placeholder_key"):
+            # One pooled HTTP client for the whole process
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+                timeout=timeout,
+            )
+            self.client: Optional[AsyncOpenAI] = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=self._http_client,
+                timeout=timeout,
+                max_retries=0,  # retries are handled by `_call_resilient`
+            )
+        else:
+            self._http_client = None
+            self.client = None
+
+    @property
+    def enabled(self) -> bool:
+        """True when a real OpenAI client is configured (False in mock mode)."""
+        return self.client is not None
+
+    async def chat_completion(
+        self,
+        *,
+        call_site: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+        cache: bool = True,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        hedge: bool = False,
+        **params: Any,
+    ):
+        """Run one chat completion and return the raw OpenAI response.
+
+        *call_site* is a short label (e.g. ``"chat"``, ``"worker"``) used for
+        logging.  *timeout* overrides the gateway default for this call only
+        and bounds the whole call, retries included; it never exceeds the
+        remaining request deadline.  Pass ``cache=False``
+        for call sites whose answers must not be reused (interactive chat,
+        tool calling); *cache_if* stores only responses it accepts.  Pass
+        ``hedge=True`` for latency-sensitive calls that
+        may safely be sent twice.
+        """
+        if not self.client:
+            raise RuntimeError("LLM gateway is not configured (no OpenAI API key)")
+
+        cache_key = None
+        if cache:
+            cache_key = self.cache.make_key(model, messages, params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"LLM cache hit for '{call_site}'")
+                self.telemetry.record(call_site=call_site, model=model, latency_sec=0.0, status="cache_hit")
+                return cached
+
+        async def attempt(remaining: float):
+            async with self._semaphore:
+                return await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        timeout=remaining,
+                        **params,
+                    ),
+                    timeout=remaining,
+                )
+
+        started = time.monotonic()
+        try:
+            budget = deadline.timeout(timeout or self.timeout)
+            try:
+                response = await self._call_resilient(call_site, model, attempt, budget, hedge=hedge)
+            except asyncio.TimeoutError as exc:
+                raise _out_of_time(exc)
+        except asyncio.CancelledError:
+            self.telemetry.record(
+                call_site=call_site, model=model, latency_sec=time.monotonic() - started, status="cancelled"
+            )
+            raise
+        except Exception as exc:
+            self.telemetry.record(
+                call_site=call_site, model=model, latency_sec=time.monotonic() - started, status="error", error=exc
+            )
+            raise
+        usage = getattr(response, "usage", None)
+        self.telemetry.record(
+            call_site=call_site,
+            model=model,
+            latency_sec=time.monotonic() - started,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+        if cache_key is not None and (cache_if is None or cache_if(response)):
+            self.cache.set(cache_key, response)
+        return response
+
+    async def stream_chat_completion(
+        self,
+        *,
+        call_site: str,
+        model: str,
+        messages: List[Dict[str, Any]],
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas of a streamed chat completion.
+
+        The concurrency slot is held until the stream is exhausted (or the
+        consumer stops iterating).  *timeout* bounds opening the stream
+        (retries included) and each subsequent read, within the request
+        deadline.
+        """
+        if not self.client:
+            raise RuntimeError("LLM gateway is not configured (no OpenAI API key)")
+
+        started = time.monotonic()
+        chunks: List[str] = []
+        try:
+            async with self._semaphore:
+
+                async def attempt(remaining: float):
+                    return await asyncio.wait_for(
+                        self.client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            timeout=remaining,
+                            stream=True,
+                            **params,
+                        ),
+                        timeout=remaining,
+                    )
+
+                # Only opening the stream is retried; nothing has been yielded yet
+                budget = deadline.timeout(timeout or self.timeout)
+                try:
+                    stream = await self._call_resilient(call_site, model, attempt, budget)
+                except asyncio.TimeoutError as exc:
+                    raise _out_of_time(exc)
+
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            chunks.append(delta)
+                            yield delta
+                finally:
+                    await stream.close()
+        except BaseException as exc:
+            # The consumer closing the generator early (or being cancelled)
+            # is an abandoned call, not a provider error
+            abandoned = isinstance(exc, (asyncio.CancelledError, GeneratorExit))
+            self.telemetry.record(
+                call_site=call_site,
+                model=model,
+                latency_sec=time.monotonic() - started,
+                status="cancelled" if abandoned else "error",
+                error=None if abandoned else exc,
+                streamed=True,
+            )
+            raise
+
+        # Streamed responses carry no usage block; count tokens locally
+        self.telemetry.record(
+            call_site=call_site,
+            model=model,
+            latency_sec=time.monotonic() - started,
+            prompt_tokens=count_prompt_tokens(messages, model),
+            completion_tokens=count_tokens("".join(chunks), model),
+            streamed=True,
+        )
+
+    # ------------------------------------------------------------------
+    # Resilience
+    # ------------------------------------------------------------------
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(
+                model, failure_threshold=self.breaker_threshold, reset_timeout=self.breaker_reset_sec
+            )
+        return breaker
+
+    def _latency_tracker(self, model: str) -> LatencyTracker:
+        tracker = self._latency.get(model)
+        if tracker is None:
+            tracker = self._latency[model] = LatencyTracker()
+        return tracker
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        p95 = self._latency_tracker(model).percentile(0.95)
+        return None if p95 is None else max(p95, self.hedge_min_delay)
+
+    def _count_hedge(self) -> None:
+        self.hedges_sent += 1
+
+    async def _call_resilient(
+        self,
+        call_site: str,
+        model: str,
+        attempt: Callable[[float], Awaitable[Any]],
+        timeout: float,
+        hedge: bool = False,
+    ):
+        """Run *attempt(remaining_seconds)* with retries, breaker and hedging."""
+        budget_deadline = time.monotonic() + timeout
+        breaker = self._breaker(model)
+        attempt_no = 0
+        while True:
+            attempt_no += 1
+            breaker.before_call()
+            remaining = budget_deadline - time.monotonic()
+            started = time.monotonic()
+            try:
+                delay = self._hedge_delay(model) if hedge and self.hedging else None
+                if delay is not None and delay < remaining:
+                    # Each copy gets the budget left when it starts, so the
+                    # hedge cannot outlive the deadline by the hedge delay
+                    result = await hedged(
+                        lambda: attempt(budget_deadline - time.monotonic()), delay, on_hedge=self._count_hedge
+                    )
+                else:
+                    result = await attempt(remaining)
+            except asyncio.CancelledError:
+                # The caller went away (e.g. client disconnect); if this was
+                # the half-open probe, let the next call probe instead
+                breaker.release_probe()
+                raise
+            except Exception as exc:
+                if not is_retryable(exc):
+                    # The provider answered (e.g. 400); it is not degraded
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                backoff = self.retry.backoff(attempt_no, retry_after_seconds(exc))
+                if attempt_no >= self.retry.max_attempts or time.monotonic() + backoff >= budget_deadline:
+                    if isinstance(exc, asyncio.TimeoutError):
+                        logger.error(f"LLM call '{call_site}' timed out after {timeout}s")
+                    raise
+                logger.warning(
+                    f"LLM call '{call_site}' failed ({type(exc).__name__}), "
+                    f"retry {attempt_no}/{self.retry.max_attempts - 1} in {backoff:.2f}s"
+                )
+                self.retries += 1
+                await asyncio.sleep(backoff)
+                continue
+
+            breaker.record_success()
+            self._latency_tracker(model).add(time.monotonic() - started)
+            return result
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        """Retry/hedge counters and per-model breaker state."""
+        return {
+            "retries": self.retries,
+            "hedges_sent": self.hedges_sent,
+            "breakers": {model: b.snapshot() for model, b in self._breakers.items()},
+        }
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP connection pool and flush telemetry."""
+        await self.telemetry.flush()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
+
+def _out_of_time(exc: BaseException) -> BaseException:
+    """A timeout caused by the request deadline, rather than the provider."""
+    left = deadline.remaining()
+    if left is not None and left <= 0 and not isinstance(exc, deadline.DeadlineExceeded):
+        error = deadline.DeadlineExceeded("request deadline exceeded during LLM call")
+        error.__cause__ = exc
+        return error
+    return exc
+
+
+# Create a singleton instance
+llm_gateway = LLMGateway()
@@ -0,0 +1,195 @@
+"""Retry, circuit-breaking and hedging primitives for LLM calls.
+
+`LLMGateway` combines these around every completion:
+
+* `RetryPolicy` – jittered exponential backoff ("full jitter") for
+  retryable failures: 429, 5xx, connection errors and timeouts.  A
+  ``Retry-After`` header from the provider is honoured (capped at
+  ``max_delay``).
+* `CircuitBreaker` – after ``failure_threshold`` consecutive retryable
+  failures the circuit opens and calls fail fast with `CircuitOpenError`
+  for ``reset_timeout`` seconds; then a single probe is let through
+  (half-open) and its outcome closes or re-opens the circuit.
+* `hedged` – runs a request, and if it has not answered after *delay*
+  (the observed p95 latency, see `LatencyTracker`) sends a second copy and
+  returns whichever finishes first.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    "CircuitOpenError",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "LatencyTracker",
+    "hedged",
+    "is_retryable",
+    "retry_after_seconds",
+]
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for failures that may succeed if the same request is repeated."""
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True  # APIConnectionError includes APITimeoutError
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code >= 500
+    return False
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Return the provider's ``Retry-After`` hint in seconds, if any."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to our own backoff
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number *attempt* (1-based)."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def before_call(self) -> None:
+        """Raise `CircuitOpenError` unless a call may go through now."""
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return
+        raise CircuitOpenError(f"Circuit for '{self.name}' is open")
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit for '{self.name}' closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"Circuit for '{self.name}' opened after {self.consecutive_failures} failure(s)")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Forget an abandoned (cancelled) call without judging the provider."""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+        }
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the *p* quantile, or None until enough samples exist."""
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def hedged(
+    make_attempt: Callable[[], Awaitable[T]],
+    delay: float,
+    on_hedge: Optional[Callable[[], None]] = None,
+) -> T:
+    """Run *make_attempt*; start a second copy if the first is slower than *delay*.
+
+    Returns the first successful result and cancels the other copy.  If both
+    copies fail, the last error is raised.
+    """
+    tasks = [asyncio.ensure_future(make_attempt())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return tasks[0].result()
+
+        if on_hedge is not None:
+            on_hedge()
+        tasks.append(asyncio.ensure_future(make_attempt()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        if error is None:
+            raise RuntimeError("hedged request finished without a result")
+        raise error
+    finally:
+        # Cancel the loser (or both copies if our caller was cancelled)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,227 @@
+"""Per-call telemetry for LLM completions.
+
+`LLMGateway` reports every chat completion here – model, call site, prompt
+and completion tokens, latency, estimated cost and outcome (``ok``,
+``error``, ``cancelled`` or ``cache_hit``; ``cancelled`` calls were
+abandoned by the caller, e.g. a disconnected HTTP client).  Calls are
+aggregated per (call site, model) into counters and fixed-bucket
+histograms, served by ``GET /api/metrics/llm``.  Structured-output call sites also report parse
+outcomes (`record_parse`) so tokens spent on unusable replies are visible.
+
+Set ``LLM_TELEMETRY_JSONL`` to also append one JSON line per call to a file
+for offline analysis.  Lines are buffered and written from a worker thread
+so the event loop never waits on disk.
+"""
+
+import asyncio
+import bisect
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import LLM_TELEMETRY_JSONL
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds; the last bucket catches everything above
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+# USD per 1K (prompt, completion) tokens; unknown models report no cost
+PRICES_PER_1K: Dict[str, Tuple[float, float]] = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+# Buffered JSONL lines are flushed once this many have accumulated
+_JSONL_FLUSH_EVERY = 20
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    prices = PRICES_PER_1K.get(model)
+    if prices is None:
+        # Dated snapshots (e.g. gpt-4-0613) are priced like their family
+        family = max((m for m in PRICES_PER_1K if model.startswith(m)), key=len, default=None)
+        prices = PRICES_PER_1K.get(family) if family else None
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000
+
+
+class Histogram:
+    def __init__(self, bounds: Tuple[int, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{b}" for b in self.bounds] + ["inf"]
+        return {"buckets": dict(zip(labels, self.counts)), "sum": round(self.total, 3)}
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    errors: int = 0
+    cancelled: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_ms: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS_MS))
+    total_tokens: Histogram = field(default_factory=lambda: Histogram(TOKEN_BUCKETS))
+    error_types: Dict[str, int] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "cache_hits": self.cache_hits,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "latency_ms": self.latency_ms.snapshot(),
+            "total_tokens": self.total_tokens.snapshot(),
+            "error_types": dict(self.error_types),
+        }
+
+
+class LLMTelemetry:
+    def __init__(self, jsonl_path: Optional[str] = LLM_TELEMETRY_JSONL):
+        self.jsonl_path = jsonl_path or None
+        self._stats: Dict[Tuple[str, str], CallStats] = {}
+        # call_site -> outcome -> count (plus "wasted_tokens")
+        self._parse: Dict[str, Dict[str, int]] = {}
+        self._buffer: List[str] = []
+
+    def record(
+        self,
+        *,
+        call_site: str,
+        model: str,
+        latency_sec: float,
+        status: str = "ok",
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: Optional[BaseException] = None,
+        streamed: bool = False,
+    ) -> None:
+        """Record one completion; *status* is ``ok``, ``error``, ``cancelled`` or ``cache_hit``."""
+        stats = self._stats.setdefault((call_site, model), CallStats())
+        latency_ms = latency_sec * 1000
+        cost = estimate_cost(model, prompt_tokens, completion_tokens) if status == "ok" else None
+
+        stats.calls += 1
+        stats.latency_ms.observe(latency_ms)
+        if status == "error":
+            stats.errors += 1
+            error_type = type(error).__name__ if error is not None else "unknown"
+            stats.error_types[error_type] = stats.error_types.get(error_type, 0) + 1
+        elif status == "cancelled":
+            stats.cancelled += 1
+        elif status == "cache_hit":
+            stats.cache_hits += 1
+        else:
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.total_tokens.observe(prompt_tokens + completion_tokens)
+            stats.cost_usd += cost or 0.0
+
+        if self.jsonl_path:
+            self._buffer.append(
+                json.dumps(
+                    {
+                        "ts": time.time(),
+                        "call_site": call_site,
+                        "model": model,
+                        "status": status,
+                        "latency_ms": round(latency_ms, 1),
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "cost_usd": cost,
+                        "streamed": streamed,
+                        "error": type(error).__name__ if error is not None else None,
+                    }
+                )
+            )
+            if len(self._buffer) >= _JSONL_FLUSH_EVERY:
+                self._schedule_flush()
+
+    def record_parse(self, call_site: str, outcome: str, wasted_tokens: int = 0) -> None:
+        """Count a structured-output parse *outcome* for *call_site*.
+
+        Outcomes: ``parsed``, ``repaired_locally``, ``repaired_by_model``,
+        ``invalid`` (one unusable reply) and ``failed`` (gave up).
+        """
+        counts = self._parse.setdefault(call_site, {"wasted_tokens": 0})
+        counts[outcome] = counts.get(outcome, 0) + 1
+        counts["wasted_tokens"] += wasted_tokens
+
+    # ------------------------------------------------------------------
+    # JSONL sink
+    # ------------------------------------------------------------------
+
+    def _take_buffer(self) -> List[str]:
+        lines, self._buffer = self._buffer, []
+        return lines
+
+    def _write_lines(self, lines: List[str]) -> None:
+        try:
+            with open(self.jsonl_path, "a", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write LLM telemetry to {self.jsonl_path}: {e}")
+
+    def _schedule_flush(self) -> None:
+        lines = self._take_buffer()
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._write_lines, lines)
+        except RuntimeError:
+            self._write_lines(lines)  # no event loop (scripts, tests)
+
+    async def flush(self) -> None:
+        """Write any buffered JSONL lines."""
+        lines = self._take_buffer()
+        if lines and self.jsonl_path:
+            await asyncio.to_thread(self._write_lines, lines)
+
+    # ------------------------------------------------------------------
+    # Aggregates
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregates per call site, broken down by model, plus totals."""
+        by_call_site: Dict[str, Dict[str, Any]] = {}
+        totals = {"calls": 0, "errors": 0, "cancelled": 0, "cache_hits": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+        for (call_site, model), stats in sorted(self._stats.items()):
+            by_call_site.setdefault(call_site, {})[model] = stats.snapshot()
+            totals["calls"] += stats.calls
+            totals["errors"] += stats.errors
+            totals["cancelled"] += stats.cancelled
+            totals["cache_hits"] += stats.cache_hits
+            totals["prompt_tokens"] += stats.prompt_tokens
+            totals["completion_tokens"] += stats.completion_tokens
+            totals["cost_usd"] += stats.cost_usd
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        return {
+            "totals": totals,
+            "call_sites": by_call_site,
+            "structured_output": {site: dict(counts) for site, counts in self._parse.items()},
+        }
+
+    def reset(self) -> None:
+        self._stats.clear()
+        self._parse.clear()
+
+
+# Create a singleton instance
+llm_telemetry = LLMTelemetry()
@@ -0,0 +1,309 @@
+"""Latency/cost-aware model routing for LLM call sites.
+
+Call sites no longer hardcode model names; they state a *request class*
+and let `model_router` pick a model tier:
+
+* ``interactive`` – a user is waiting on the answer (agent chat).
+* ``background``  – nobody is waiting (worker deliverables, onboarding,
+  summaries).
+* ``suggestion``  – advisory output shown next to the UI.
+
+The policy maps each request class (or, more specifically, a call site)
+to an ordered list of tiers.  The first eligible tier is tried first; if it
+is still rate-limited, timing out or erroring server-side after the
+gateway's retries (or its circuit is open), the call falls back to the
+next tier.  A tier is skipped when the prompt does not fit its context
+window, when the prompt exceeds the class's ``downgrade_above_tokens``
+threshold (so large, low-value prompts go to the cheaper tier), or while it
+is cooling down after being rate-limited or slow.
+
+Per-tier latency and token counts are kept in memory (`stats()`) so the
+policy can be tuned.  Override the defaults with the JSON env vars
+``LLM_MODEL_TIERS`` and ``LLM_ROUTING_POLICY``; keys given there replace
+the matching default keys.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+import openai
+
+from app.config import LLM_MODEL_TIERS, LLM_ROUTING_POLICY, LLM_ROUTE_COOLDOWN_SEC
+from app.services.llm_gateway import LLMGateway, llm_gateway
+from app.services.llm_resilience import CircuitOpenError
+from app.services.prompt_budget import count_prompt_tokens, count_tokens
+from app.utils import deadline
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+SUGGESTION = "suggestion"
+
+DEFAULT_TIERS: Dict[str, Dict[str, Any]] = {
+    "premium": {"model": "gpt-4", "max_prompt_tokens": 7000},
+    # Premium-class model with json_schema structured outputs (see structured_output.py)
+    "structured": {"model": "gpt-4o", "max_prompt_tokens": 100000},
+    "standard": {"model": "gpt-3.5-turbo", "max_prompt_tokens": 15000},
+}
+
+# Call-site entries take precedence over class entries.  The call-site
+# defaults keep the models each call site used before routing existed.
+DEFAULT_POLICY: Dict[str, Dict[str, Any]] = {
+    INTERACTIVE: {"tiers": ["premium", "standard"], "slow_after_sec": 20},
+    SUGGESTION: {"tiers": ["structured", "standard"], "slow_after_sec": 30, "downgrade_above_tokens": 3000},
+    BACKGROUND: {"tiers": ["standard"], "slow_after_sec": 60},
+    "initial_tasks": {"tiers": ["premium", "standard"]},
+    "company_suggest": {"tiers": ["standard"]},
+    "tool_agent": {"tiers": ["standard"]},
+}
+
+# Errors that say "this tier is unavailable right now", not "bad request"
+_FALLBACK_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+    CircuitOpenError,
+)
+
+# Latency samples kept per tier for percentile reporting
+_LATENCY_WINDOW = 200
+
+
+@dataclass
+class Tier:
+    name: str
+    model: str
+    max_prompt_tokens: int
+
+
+@dataclass
+class TierMetrics:
+    requests: int = 0
+    failures: int = 0
+    fallbacks: int = 0  # failures that were retried on another tier
+    rate_limited: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=_LATENCY_WINDOW))
+    cooldown_until: float = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def pct(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "rate_limited": self.rate_limited,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_p50_sec": pct(0.50),
+            "latency_p95_sec": pct(0.95),
+            "cooling_down": self.cooldown_until > time.monotonic(),
+        }
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        gateway: LLMGateway,
+        tiers: Optional[Dict[str, Dict[str, Any]]] = None,
+        policy: Optional[Dict[str, Dict[str, Any]]] = None,
+        cooldown_sec: float = LLM_ROUTE_COOLDOWN_SEC,
+    ):
+        self.gateway = gateway
+        self.tiers = {
+            name: Tier(name=name, model=spec["model"], max_prompt_tokens=int(spec.get("max_prompt_tokens", 0)))
+            for name, spec in {**DEFAULT_TIERS, **(tiers or {})}.items()
+        }
+        self.policy = {**DEFAULT_POLICY, **(policy or {})}
+        self.cooldown_sec = cooldown_sec
+        self.metrics: Dict[str, TierMetrics] = {name: TierMetrics() for name in self.tiers}
+
+    # ------------------------------------------------------------------
+    # Routing decisions
+    # ------------------------------------------------------------------
+
+    def _rule(self, request_class: str, call_site: str, key: str, default: Any = None) -> Any:
+        for name in (call_site, request_class):
+            rule = self.policy.get(name)
+            if rule and key in rule:
+                return rule[key]
+        return default
+
+    def route(self, request_class: str, call_site: str, prompt_tokens: int = 0) -> List[Tier]:
+        """Return the tiers to try, in order, for one request."""
+        names = self._rule(request_class, call_site, "tiers") or ["standard"]
+        candidates = [self.tiers[n] for n in names if n in self.tiers]
+
+        # Drop tiers whose context window cannot hold the prompt
+        fitting = [t for t in candidates if not t.max_prompt_tokens or prompt_tokens <= t.max_prompt_tokens]
+        candidates = fitting or candidates[-1:]
+
+        downgrade_above = self._rule(request_class, call_site, "downgrade_above_tokens")
+        if downgrade_above and prompt_tokens > downgrade_above and len(candidates) > 1:
+            candidates = candidates[1:]
+
+        # Prefer tiers that are not cooling down, but never return nothing
+        now = time.monotonic()
+        healthy = [t for t in candidates if self.metrics[t.name].cooldown_until <= now]
+        if healthy and len(healthy) < len(candidates):
+            cooling = [t for t in candidates if t not in healthy]
+            candidates = healthy + cooling
+        return candidates
+
+    def pick_model(self, request_class: str, call_site: str, prompt_tokens: int = 0) -> str:
+        """Model name for call paths that cannot fall back (e.g. batch jobs)."""
+        return self.route(request_class, call_site, prompt_tokens)[0].model
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _record_success(
+        self, tier: Tier, request_class: str, call_site: str, elapsed: float, prompt_tokens: int, completion_tokens: int
+    ) -> None:
+        metrics = self.metrics[tier.name]
+        metrics.requests += 1
+        metrics.latencies.append(elapsed)
+        metrics.prompt_tokens += prompt_tokens
+        metrics.completion_tokens += completion_tokens
+        slow_after = self._rule(request_class, call_site, "slow_after_sec")
+        if slow_after and elapsed > slow_after:
+            logger.warning(f"Tier '{tier.name}' slow for '{call_site}' ({elapsed:.1f}s), cooling down")
+            metrics.cooldown_until = time.monotonic() + self.cooldown_sec
+
+    def _record_failure(self, tier: Tier, exc: BaseException, will_fall_back: bool) -> None:
+        metrics = self.metrics[tier.name]
+        metrics.requests += 1
+        metrics.failures += 1
+        if will_fall_back:
+            metrics.fallbacks += 1
+        if isinstance(exc, _FALLBACK_ERRORS):
+            if isinstance(exc, openai.RateLimitError):
+                metrics.rate_limited += 1
+            metrics.cooldown_until = time.monotonic() + self.cooldown_sec
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-tier counters and latency percentiles."""
+        return {
+            name: {"model": self.tiers[name].model, **metrics.snapshot()}
+            for name, metrics in self.metrics.items()
+        }
+
+    # ------------------------------------------------------------------
+    # Routed calls
+    # ------------------------------------------------------------------
+
+    async def chat_completion(
+        self,
+        *,
+        request_class: str,
+        call_site: str,
+        messages: List[Any],
+        model_params: Optional[Callable[[str], Dict[str, Any]]] = None,
+        **params: Any,
+    ):
+        """`LLMGateway.chat_completion` with the model chosen by policy.
+
+        *model_params*, if given, returns extra parameters for the chosen
+        model (e.g. a ``response_format`` only some models support).
+        """
+        prompt_tokens = count_prompt_tokens(messages)
+        tiers = self.route(request_class, call_site, prompt_tokens)
+
+        for index, tier in enumerate(tiers):
+            is_last = index == len(tiers) - 1
+            started = time.monotonic()
+            extra = model_params(tier.model) if model_params else {}
+            try:
+                response = await self.gateway.chat_completion(
+                    call_site=call_site, model=tier.model, messages=messages, **params, **extra
+                )
+            except deadline.DeadlineExceeded:
+                raise  # the request ran out of time; no tier is at fault
+            except _FALLBACK_ERRORS as exc:
+                self._record_failure(tier, exc, will_fall_back=not is_last)
+                if is_last:
+                    raise
+                logger.warning(f"Tier '{tier.name}' unavailable for '{call_site}' ({type(exc).__name__}), falling back")
+                continue
+            except Exception as exc:
+                self._record_failure(tier, exc, will_fall_back=False)
+                raise
+
+            usage = getattr(response, "usage", None)
+            self._record_success(
+                tier,
+                request_class,
+                call_site,
+                time.monotonic() - started,
+                getattr(usage, "prompt_tokens", None) or prompt_tokens,
+                getattr(usage, "completion_tokens", 0) or 0,
+            )
+            return response
+
+    async def stream_chat_completion(
+        self,
+        *,
+        request_class: str,
+        call_site: str,
+        messages: List[Any],
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Routed `LLMGateway.stream_chat_completion`.
+
+        Falls back to the next tier only if the stream fails before the
+        first token; once output has been sent it cannot be replaced.
+        """
+        prompt_tokens = count_prompt_tokens(messages)
+        tiers = self.route(request_class, call_site, prompt_tokens)
+
+        for index, tier in enumerate(tiers):
+            is_last = index == len(tiers) - 1
+            started = time.monotonic()
+            chunks: List[str] = []
+            try:
+                async for delta in self.gateway.stream_chat_completion(
+                    call_site=call_site, model=tier.model, messages=messages, **params
+                ):
+                    chunks.append(delta)
+                    yield delta
+            except deadline.DeadlineExceeded:
+                raise  # the request ran out of time; no tier is at fault
+            except _FALLBACK_ERRORS as exc:
+                can_fall_back = not is_last and not chunks
+                self._record_failure(tier, exc, will_fall_back=can_fall_back)
+                if not can_fall_back:
+                    raise
+                logger.warning(f"Tier '{tier.name}' unavailable for '{call_site}' ({type(exc).__name__}), falling back")
+                continue
+            except Exception as exc:
+                self._record_failure(tier, exc, will_fall_back=False)
+                raise
+
+            self._record_success(
+                tier,
+                request_class,
+                call_site,
+                time.monotonic() - started,
+                prompt_tokens,
+                count_tokens("".join(chunks)),
+            )
+            return
+
+
+# Create a singleton instance
+model_router = ModelRouter(llm_gateway, tiers=LLM_MODEL_TIERS, policy=LLM_ROUTING_POLICY)
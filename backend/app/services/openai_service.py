@@ -1,7 +1,10 @@
-from openai import OpenAI
-from app.config import OPENAI_API_KEY
-from app.models import RoleEnum
-from typing import Dict, List, Any, Optional
+from app.models import RoleEnum, ProactiveSuggestionList, CompanyContextSuggestions
+from app.services.llm_gateway import llm_gateway
+from app.services.model_router import model_router, INTERACTIVE, BACKGROUND, SUGGESTION
+from app.services.prompt_budget import PromptAssembler, PromptAssembly
+from app.services.structured_output import generate_structured
+from typing import AsyncIterator, Dict, List, Any, Optional
+import asyncio
 import logging
 import json
 from datetime import datetime
@@ -10,10 +13,11 @@ logger = logging.getLogger(__name__)
 
 class OpenAIService:
     def __init__(self):
-        if OPENAI_API_KEY and OPENAI_API_KEY != "sk-placeholder_key":
-            self.client = OpenAI(api_key=OPENAI_API_KEY)
-        else:
-            self.client = None
+        # All completions go through the shared async gateway
+        self.gateway = llm_gateway
+        self.router = model_router
+        self.prompt_assembler = PromptAssembler()
+        if not self.gateway.enabled:
             print("⚠️  Warning: Using placeholder OpenAI API key. AI responses will be mocked.")
         
         # Enhanced role-specific prompts with startup expertise
@@ -231,6 +235,87 @@ What can we launch this week to test and grow?"""
         
         return "\n".join(context_parts)
     
+    def _mock_agent_message(self, agent_role: RoleEnum, user_message: str) -> str:
+        """Canned agent reply used when no OpenAI key is configured"""
+        mock_responses = {
+            RoleEnum.CEO: f"As your AI CEO partner, I'm analyzing '{user_message}' from a strategic perspective. Key considerations: market opportunity, competitive positioning, and scalability. What's our target market size and how does this align with our 6-month milestones? (Mock response - no OpenAI key configured)",
+            
+            RoleEnum.CTO: f"From a technical standpoint on '{user_message}': I recommend we consider the architecture implications and technical feasibility. What's the expected user load and data requirements? Should we prototype this first or integrate with existing systems? (Mock response - no OpenAI key configured)",
+            
+            RoleEnum.CMO: f"Great question about '{user_message}'. From a growth perspective, let's think about our customer acquisition strategy. Who's our ideal customer profile and what channels should we prioritize? I'd suggest A/B testing this approach. (Mock response - no OpenAI key configured)"
+        }
+        return mock_responses.get(agent_role, "Enhanced mock AI response")
+
+    def _build_agent_messages(
+        self,
+        agent_role: RoleEnum,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, Any]]] = None,
+        user_context: Optional[Dict[str, Any]] = None,
+        other_agents_activity: Optional[Dict[str, Any]] = None
+    ) -> PromptAssembly:
+        """Assemble the chat-completion messages for an agent turn within the token budget"""
+        # Add role-specific context
+        enhanced_context = None
+        if user_context:
+            context_builder = self.context_builders.get(agent_role)
+            if context_builder:
+                conversation_state = conversation_history[-1] if conversation_history else {}
+                enhanced_context = context_builder(user_context, conversation_state)
+        
+        # Conversation history; the route has already appended the current
+        # user message, which is sent separately with the proactive instruction
+        history = list(conversation_history or [])
+        if history and history[-1].get("is_from_user") and history[-1].get("message") == user_message:
+            history.pop()
+        history_messages = [
+            {
+                "role": "user" if msg.get("is_from_user") else "assistant",
+                "content": msg.get("message", "")
+            }
+            for msg in history
+        ]
+        
+        # Add current user message with proactive instruction
+        enhanced_user_message = f"{user_message}\n\nPLEASE PROVIDE: Direct answer, specific recommendations, and one proactive suggestion for what we should consider next."
+        
+        assembly = self.prompt_assembler.assemble(
+            system_prompt=self.role_prompts[agent_role],
+            user_message=enhanced_user_message,
+            role_context=enhanced_context,
+            coordination=other_agents_activity,
+            history=history_messages,
+        )
+        logger.info(
+            f"{agent_role.value} prompt: {assembly.total_tokens} tokens {assembly.section_tokens}, "
+            f"history {assembly.history_included} kept / {assembly.history_dropped} dropped"
+        )
+        return assembly
+
+    def build_agent_result(
+        self,
+        agent_role: RoleEnum,
+        agent_message: str,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, Any]]] = None,
+        user_context: Optional[Dict[str, Any]] = None,
+        prompt_usage: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
+        """Wrap a finished agent reply in the response/conversation-state shape"""
+        return {
+            "agent_role": agent_role,
+            "prompt_usage": prompt_usage or {},
+            "message": agent_message,
+            "conversation_state": {
+                "last_message": agent_message,
+                "message_count": len(conversation_history) + 1 if conversation_history else 1,
+                "context": user_context,
+                "timestamp": datetime.now().isoformat(),
+                "topics_discussed": self._extract_topics(user_message),
+                "sentiment": "engaged"
+            }
+        }
+
     async def get_agent_response(
         self, 
         agent_role: RoleEnum, 
@@ -240,21 +325,13 @@ What can we launch this week to test and grow?"""
         other_agents_activity: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Get response from AI agent based on role with enhanced context"""
-        if not self.client:
-            # Enhanced mock responses
-            mock_responses = {
-                RoleEnum.CEO: f"As your AI CEO partner, I'm analyzing '{user_message}' from a strategic perspective. Key considerations: market opportunity, competitive positioning, and scalability. What's our target market size and how does this align with our 6-month milestones? (Mock response - no OpenAI key configured)",
-                
-                RoleEnum.CTO: f"From a technical standpoint on '{user_message}': I recommend we consider the architecture implications and technical feasibility. What's the expected user load and data requirements? Should we prototype this first or integrate with existing systems? (Mock response - no OpenAI key configured)",
-                
-                RoleEnum.CMO: f"Great question about '{user_message}'. From a growth perspective, let's think about our customer acquisition strategy. Who's our ideal customer profile and what channels should we prioritize? I'd suggest A/B testing this approach. (Mock response - no OpenAI key configured)"
-            }
-            
+        if not self.gateway.enabled:
+            mock_message = self._mock_agent_message(agent_role, user_message)
             return {
                 "agent_role": agent_role,
-                "message": mock_responses.get(agent_role, "Enhanced mock AI response"),
+                "message": mock_message,
                 "conversation_state": {
-                    "last_message": mock_responses.get(agent_role, "Enhanced mock AI response"),
+                    "last_message": mock_message,
                     "message_count": len(conversation_history) + 1 if conversation_history else 1,
                     "context": user_context,
                     "timestamp": datetime.now().isoformat()
@@ -262,40 +339,17 @@ What can we launch this week to test and grow?"""
             }
         
         try:
-            # Build enhanced conversation context
-            messages = [
-                {"role": "system", "content": self.role_prompts[agent_role]}
-            ]
-            
-            # Add role-specific context
-            if user_context:
-                context_builder = self.context_builders.get(agent_role)
-                if context_builder:
-                    conversation_state = conversation_history[-1] if conversation_history else {}
-                    enhanced_context = context_builder(user_context, conversation_state)
-                    messages.append({"role": "system", "content": enhanced_context})
-            
-            # Add inter-agent coordination context
-            if other_agents_activity:
-                coordination_context = f"TEAM COORDINATION:\n{json.dumps(other_agents_activity, indent=2)}"
-                messages.append({"role": "system", "content": coordination_context})
-            
-            # Add conversation history with enhanced context
-            if conversation_history:
-                for msg in conversation_history[-8:]:  # Last 8 messages for context
-                    messages.append({
-                        "role": "user" if msg.get("is_from_user") else "assistant",
-                        "content": msg.get("message", "")
-                    })
-            
-            # Add current user message with proactive instruction
-            enhanced_user_message = f"{user_message}\n\nPLEASE PROVIDE: Direct answer, specific recommendations, and one proactive suggestion for what we should consider next."
-            messages.append({"role": "user", "content": enhanced_user_message})
+            assembly = self._build_agent_messages(
+                agent_role, user_message, conversation_history, user_context, other_agents_activity
+            )
             
             # Get response from OpenAI with enhanced parameters
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=messages,
+            response = await self.router.chat_completion(
+                request_class=INTERACTIVE,
+                call_site="chat",
+                messages=assembly.messages,
+                cache=False,  # every chat turn should get a fresh answer
+                hedge=True,  # a user is waiting; duplicate slow requests
                 max_tokens=600,  # Increased for more detailed responses
                 temperature=0.7,
                 presence_penalty=0.1,
@@ -303,23 +357,51 @@ What can we launch this week to test and grow?"""
             )
             
             agent_message = response.choices[0].message.content
-            
-            return {
-                "agent_role": agent_role,
-                "message": agent_message,
-                "conversation_state": {
-                    "last_message": agent_message,
-                    "message_count": len(conversation_history) + 1 if conversation_history else 1,
-                    "context": user_context,
-                    "timestamp": datetime.now().isoformat(),
-                    "topics_discussed": self._extract_topics(user_message),
-                    "sentiment": "engaged"
-                }
-            }
+            return self.build_agent_result(
+                agent_role, agent_message, user_message, conversation_history, user_context,
+                prompt_usage=assembly.section_tokens
+            )
             
         except Exception as e:
             logger.error(f"Error getting agent response: {e}")
             raise
+
+    async def stream_agent_response(
+        self,
+        agent_role: RoleEnum,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, Any]]] = None,
+        user_context: Optional[Dict[str, Any]] = None,
+        other_agents_activity: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Yield the agent reply token-by-token as it is generated.
+
+        The caller is responsible for joining the chunks and passing the
+        full text to `build_agent_result` once the stream is exhausted.
+        """
+        if not self.gateway.enabled:
+            # Stream the canned reply word-by-word so the SSE path is exercised
+            for word in self._mock_agent_message(agent_role, user_message).split(" "):
+                yield word + " "
+            return
+
+        assembly = self._build_agent_messages(
+            agent_role, user_message, conversation_history, user_context, other_agents_activity
+        )
+        try:
+            async for delta in self.router.stream_chat_completion(
+                request_class=INTERACTIVE,
+                call_site="chat",
+                messages=assembly.messages,
+                max_tokens=600,
+                temperature=0.7,
+                presence_penalty=0.1,
+                frequency_penalty=0.1
+            ):
+                yield delta
+        except Exception as e:
+            logger.error(f"Error streaming agent response: {e}")
+            raise
     
     def _extract_topics(self, message: str) -> List[str]:
         """Extract key topics from user message for context tracking"""
@@ -336,7 +418,7 @@ What can we launch this week to test and grow?"""
     
     async def generate_initial_tasks(self, user_role: RoleEnum, user_context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Generate comprehensive initial tasks for AI agents based on user's role"""
-        if not self.client:
+        if not self.gateway.enabled:
             # Enhanced mock tasks with more specificity
             enhanced_mock_tasks = {
                 RoleEnum.CEO: [
@@ -424,10 +506,36 @@ What can we launch this week to test and grow?"""
             # Define which roles need tasks based on user's role
             ai_roles = [role for role in RoleEnum if role != user_role]
             
-            tasks = []
-            for ai_role in ai_roles:
-                # Enhanced prompt for task generation
-                prompt = f"""As an expert {ai_role.value} for a startup where the founder is the {user_role.value}, 
+            # Fan out one completion per AI role and wait for all of them; a
+            # role that fails is logged and skipped so the others are kept
+            per_role_tasks = await asyncio.gather(
+                *(self._generate_role_tasks(ai_role, user_role, user_context) for ai_role in ai_roles),
+                return_exceptions=True
+            )
+            tasks, failures = [], []
+            for ai_role, result in zip(ai_roles, per_role_tasks):
+                if isinstance(result, BaseException):
+                    logger.error(f"Error generating initial tasks for {ai_role.value}: {result}")
+                    failures.append(result)
+                else:
+                    tasks.extend(result)
+            if len(failures) == len(ai_roles):
+                raise failures[0]
+            return tasks
+
+        except Exception as e:
+            logger.error(f"Error generating initial tasks: {e}")
+            raise
+
+    async def _generate_role_tasks(
+        self,
+        ai_role: RoleEnum,
+        user_role: RoleEnum,
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Generate the initial task list for a single AI role"""
+        # Enhanced prompt for task generation
+        prompt = f"""As an expert {ai_role.value} for a startup where the founder is the {user_role.value}, 
                 generate 3-4 high-priority, specific, and actionable initial tasks.
 
                 Context: {json.dumps(user_context, indent=2) if user_context else 'New startup, early validation stage'}
@@ -441,32 +549,29 @@ What can we launch this week to test and grow?"""
 
                 Format: Return only the task descriptions, one per line, without numbering.
                 Make each task specific with concrete deliverables."""
-                
-                response = self.client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[
-                        {"role": "system", "content": self.role_prompts[ai_role]},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=400,
-                    temperature=0.6
-                )
-                
-                task_descriptions = response.choices[0].message.content.strip().split('\n')
-                
-                for i, description in enumerate(task_descriptions):
-                    if description.strip():
-                        tasks.append({
-                            "assigned_to_role": ai_role,
-                            "description": description.strip(),
-                            "status": "pending"
-                        })
-            
-            return tasks
-            
-        except Exception as e:
-            logger.error(f"Error generating initial tasks: {e}")
-            raise
+        
+        response = await self.router.chat_completion(
+            request_class=BACKGROUND,
+            call_site="initial_tasks",
+            messages=[
+                {"role": "system", "content": self.role_prompts[ai_role]},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=400,
+            temperature=0.6
+        )
+        
+        task_descriptions = response.choices[0].message.content.strip().split('\n')
+        
+        tasks = []
+        for description in task_descriptions:
+            if description.strip():
+                tasks.append({
+                    "assigned_to_role": ai_role,
+                    "description": description.strip(),
+                    "status": "pending"
+                })
+        return tasks
     
     async def get_proactive_suggestions(
         self,
@@ -475,7 +580,7 @@ What can we launch this week to test and grow?"""
         ai_agents_status: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
         """Generate proactive suggestions based on current activity and context"""
-        if not self.client:
+        if not self.gateway.enabled:
             return [
                 {
                     "type": "collaboration",
@@ -498,22 +603,21 @@ What can we launch this week to test and grow?"""
             2. Actionable with clear next steps
             3. Strategic for startup growth
             
-            Format as JSON array with: type, message, action, priority"""
+            Return a JSON object whose "suggestions" array holds objects with:
+            type, message, action, priority (low, medium or high)"""
             
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            result = await generate_structured(
+                self.router,
+                schema_model=ProactiveSuggestionList,
+                request_class=SUGGESTION,
+                call_site="suggestions",
                 messages=[{"role": "user", "content": prompt}],
-                max_tokens=300,
+                max_tokens=400,  # room for the JSON envelope
                 temperature=0.7
             )
-            
-            # Parse and return structured suggestions
-            suggestions_text = response.choices[0].message.content
-            try:
-                return json.loads(suggestions_text)
-            except:
-                # Fallback if JSON parsing fails
-                return [{"type": "general", "message": suggestions_text, "action": "review", "priority": "low"}]
+            if result is None:
+                return []
+            return [suggestion.model_dump(mode="json") for suggestion in result.suggestions]
             
         except Exception as e:
             logger.error(f"Error generating proactive suggestions: {e}")
@@ -530,7 +634,7 @@ What can we launch this week to test and grow?"""
 
     async def generate_company_context_suggestions(self, company_name: str, description: str = "") -> Dict[str, str]:
         """Generate concise suggestions for company context fields."""
-        if not self.client:
+        if not self.gateway.enabled:
             return self._mock_company_suggestions(company_name)
 
         prompt = (
@@ -543,19 +647,17 @@ What can we launch this week to test and grow?"""
         )
 
         try:
-            chat_completion = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            result = await generate_structured(
+                self.router,
+                schema_model=CompanyContextSuggestions,
+                request_class=SUGGESTION,
+                call_site="company_suggest",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7,
             )
-            content = chat_completion.choices[0].message.content
-            import json as _json
-            suggestions = _json.loads(content)
-            # basic validation
-            expected_keys = {"company_info", "product_overview", "tech_stack", "go_to_market_strategy"}
-            if not expected_keys.issubset(suggestions.keys()):
-                raise ValueError("Incomplete keys in AI response")
-            return suggestions
+            if result is None:
+                raise ValueError("AI response did not match the company context schema")
+            return result.model_dump()
         except Exception as e:
             logger.error(f"Error generating company context suggestions: {e}")
             # fallback to mock
@@ -0,0 +1,159 @@
+"""Token-budgeted prompt assembly for agent chat.
+
+Tokens are counted locally: exactly with `tiktoken` when it is installed
+(optional, see requirements.txt), otherwise approximated as one token per
+4 characters – the rough average for English prose in the cl100k encoding
+used by gpt-4 / gpt-3.5-turbo.  The approximation can be off noticeably for
+code, non-English text or JSON, so leave headroom in the budget without
+tiktoken.
+
+`PromptAssembler.assemble` fills the budget in priority order – system
+prompt, role context, team coordination, then history newest-first – and
+reports how many tokens each section used.
+"""
+
+import json
+import logging
+import math
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from app.config import CHAT_PROMPT_TOKEN_BUDGET
+
+try:
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover
+    tiktoken = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token for cl100k on English text (fallback only)
+_CHARS_PER_TOKEN = 4.0
+# Per-message framing overhead (role + separators) in the chat format
+_MESSAGE_OVERHEAD_TOKENS = 4
+# Every reply is primed with <|start|>assistant<|message|>
+_REPLY_PRIMING_TOKENS = 3
+
+
+@lru_cache(maxsize=8)
+def _encoding_for(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # Unknown model name or encoding files unavailable offline
+        try:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """Return the number of tokens in *text* for *model*."""
+    if not text:
+        return 0
+    encoding = _encoding_for(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def _message_content(message: Any) -> str:
+    # Tool-agent transcripts mix plain dicts with SDK message objects
+    if isinstance(message, dict):
+        return str(message.get("content") or "")
+    return str(getattr(message, "content", "") or "")
+
+
+def count_message_tokens(message: Dict[str, Any], model: str = "gpt-4") -> int:
+    """Return the tokens one chat message costs, including framing."""
+    return _MESSAGE_OVERHEAD_TOKENS + count_tokens(_message_content(message), model)
+
+
+def count_prompt_tokens(messages: List[Any], model: str = "gpt-4") -> int:
+    """Return the prompt tokens a list of chat messages costs."""
+    return sum(count_message_tokens(m, model) for m in messages) + _REPLY_PRIMING_TOKENS
+
+
+@dataclass
+class PromptAssembly:
+    """Result of `PromptAssembler.assemble`."""
+
+    messages: List[Dict[str, str]]
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    total_tokens: int = 0
+    history_included: int = 0
+    history_dropped: int = 0
+
+
+class PromptAssembler:
+    def __init__(self, budget: int = CHAT_PROMPT_TOKEN_BUDGET, model: str = "gpt-4"):
+        self.budget = budget
+        self.model = model
+
+    def assemble(
+        self,
+        system_prompt: str,
+        user_message: str,
+        role_context: Optional[str] = None,
+        coordination: Optional[Dict[str, Any]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> PromptAssembly:
+        """Build the message list within the token budget.
+
+        The system prompt and the current user message are always included.
+        Optional sections are added in priority order while they fit;
+        *history* (chat-format messages, oldest first) is filled newest-first
+        and stops at the first message that would overflow.
+        """
+        system_msg = {"role": "system", "content": system_prompt}
+        user_msg = {"role": "user", "content": user_message}
+
+        sections: Dict[str, int] = {
+            "system": count_message_tokens(system_msg, self.model),
+            "user_message": count_message_tokens(user_msg, self.model),
+        }
+        used = _REPLY_PRIMING_TOKENS + sections["system"] + sections["user_message"]
+
+        context_msgs: List[Dict[str, str]] = []
+        optional_sections = [("role_context", role_context)]
+        if coordination:
+            # Compact separators – indentation is pure token overhead
+            optional_sections.append(
+                ("coordination", "TEAM COORDINATION:\n" + json.dumps(coordination, separators=(",", ":")))
+            )
+        for name, content in optional_sections:
+            if not content:
+                continue
+            msg = {"role": "system", "content": content}
+            cost = count_message_tokens(msg, self.model)
+            if used + cost > self.budget:
+                logger.info(f"Prompt budget: dropping {name} section ({cost} tokens)")
+                sections[name] = 0
+                continue
+            context_msgs.append(msg)
+            sections[name] = cost
+            used += cost
+
+        history = history or []
+        kept: List[Dict[str, str]] = []
+        history_tokens = 0
+        for msg in reversed(history):
+            cost = count_message_tokens(msg, self.model)
+            if used + cost > self.budget:
+                break
+            kept.append(msg)
+            history_tokens += cost
+            used += cost
+        kept.reverse()
+        sections["history"] = history_tokens
+
+        return PromptAssembly(
+            messages=[system_msg, *context_msgs, *kept, user_msg],
+            section_tokens=sections,
+            total_tokens=used,
+            history_included=len(kept),
+            history_dropped=len(history) - len(kept),
+        )
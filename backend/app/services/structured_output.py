@@ -0,0 +1,189 @@
+"""Schema-constrained LLM output validated with Pydantic models.
+
+`generate_structured` asks the routed model for JSON matching a Pydantic
+model and returns a validated instance:
+
+* Models that support Structured Outputs get ``response_format`` of type
+  ``json_schema`` (strict), generated from the Pydantic model.
+* Models with JSON mode only get ``json_object``, and models with neither
+  rely on the prompt; in both cases the JSON schema is added to the system
+  prompt.
+* Output that fails validation is first repaired locally (code fences,
+  surrounding prose), then by at most ``max_repairs`` follow-up requests
+  that show the model its validation errors.
+
+Every outcome – parsed, repaired locally, repaired by the model, failed – is
+counted per call site in `llm_telemetry`, together with the tokens spent on
+replies that could not be used.
+"""
+
+import copy
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.services.llm_telemetry import llm_telemetry
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+# Model-name prefixes by response_format support
+_JSON_SCHEMA_MODELS = ("gpt-4o", "gpt-4.1", "o1", "o3", "o4")
+_JSON_OBJECT_MODELS = ("gpt-4-turbo", "gpt-4-1106", "gpt-4-0125", "gpt-3.5-turbo")
+# Snapshots older than JSON mode
+_LEGACY_SNAPSHOTS = ("-0301", "-0613")
+
+# Schema keywords whose value maps names to subschemas
+_SCHEMA_MAPS = ("properties", "$defs", "definitions")
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.I)
+
+
+def strict_json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Pydantic JSON schema adapted to OpenAI's strict-mode subset."""
+    schema = copy.deepcopy(model.model_json_schema())
+
+    def visit(node: Any) -> None:
+        if isinstance(node, dict):
+            node.pop("title", None)
+            node.pop("default", None)
+            if node.get("type") == "object" and "properties" in node:
+                node["additionalProperties"] = False
+                node["required"] = list(node["properties"])
+            for key, value in node.items():
+                if key in _SCHEMA_MAPS and isinstance(value, dict):
+                    # Keys here are field/definition names, not keywords
+                    for subschema in value.values():
+                        visit(subschema)
+                else:
+                    visit(value)
+        elif isinstance(node, list):
+            for value in node:
+                visit(value)
+
+    visit(schema)
+    return schema
+
+
+def response_format_for(model_name: str, schema_model: Type[BaseModel]) -> Dict[str, Any]:
+    """Return the ``response_format`` parameter *model_name* supports, if any."""
+    if model_name.startswith(_JSON_SCHEMA_MODELS):
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": schema_model.__name__,
+                    "schema": strict_json_schema(schema_model),
+                    "strict": True,
+                },
+            }
+        }
+    if model_name.startswith(_JSON_OBJECT_MODELS) and not model_name.endswith(_LEGACY_SNAPSHOTS):
+        return {"response_format": {"type": "json_object"}}
+    return {}
+
+
+def _local_repair(text: str) -> Optional[str]:
+    """Strip code fences / surrounding prose; None if nothing changed."""
+    candidate = _FENCE_RE.sub("", text.strip())
+    start, end = candidate.find("{"), candidate.rfind("}")
+    if start != -1 and end > start:
+        candidate = candidate[start : end + 1]
+    return candidate if candidate != text else None
+
+
+def _validate(schema_model: Type[M], text: str) -> M:
+    return schema_model.model_validate_json(text)
+
+
+def _usable(schema_model: Type[BaseModel], response: Any) -> bool:
+    """Whether *response* parses, directly or after local repair"""
+    text = response.choices[0].message.content or ""
+    for candidate in (text, _local_repair(text)):
+        if candidate is None:
+            continue
+        try:
+            _validate(schema_model, candidate)
+            return True
+        except ValidationError:
+            pass
+    return False
+
+
+def _error_summary(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or '<root>'}: {err['msg']}" for err in exc.errors()[:10]
+    )
+
+
+async def generate_structured(
+    router: Any,
+    *,
+    schema_model: Type[M],
+    request_class: str,
+    call_site: str,
+    messages: List[Dict[str, Any]],
+    max_repairs: int = 1,
+    **params: Any,
+) -> Optional[M]:
+    """Return a validated *schema_model* instance, or None if repair fails.
+
+    *router* is the `ModelRouter` used for every request, so tier fallback
+    still applies.  Errors from the LLM call itself propagate.
+    """
+    schema_hint = {
+        "role": "system",
+        "content": "Respond only with JSON that matches this JSON schema:\n"
+        + json.dumps(schema_model.model_json_schema(), separators=(",", ":")),
+    }
+    conversation = [schema_hint, *messages]
+    model_params: Callable[[str], Dict[str, Any]] = lambda model: response_format_for(model, schema_model)
+
+    for attempt in range(max_repairs + 1):
+        response = await router.chat_completion(
+            request_class=request_class,
+            call_site=call_site,
+            messages=conversation,
+            model_params=model_params,
+            # Unusable replies are not cached, or every retry would replay them
+            cache_if=lambda response: _usable(schema_model, response),
+            **params,
+        )
+        text = response.choices[0].message.content or ""
+        usage = getattr(response, "usage", None)
+        tokens = getattr(usage, "total_tokens", 0) or 0
+
+        try:
+            result = _validate(schema_model, text)
+            llm_telemetry.record_parse(call_site, "parsed" if attempt == 0 else "repaired_by_model")
+            return result
+        except ValidationError as exc:
+            repaired = _local_repair(text)
+            if repaired is not None:
+                try:
+                    result = _validate(schema_model, repaired)
+                    llm_telemetry.record_parse(call_site, "repaired_locally")
+                    return result
+                except ValidationError:
+                    pass
+            error = exc
+
+        llm_telemetry.record_parse(call_site, "invalid", wasted_tokens=tokens)
+        logger.warning(f"Structured output for '{call_site}' failed validation (attempt {attempt + 1}): {_error_summary(error)}")
+        conversation = [
+            *conversation,
+            {"role": "assistant", "content": text},
+            {
+                "role": "user",
+                "content": "That reply did not match the schema: "
+                + _error_summary(error)
+                + ". Reply again with only the corrected JSON.",
+            },
+        ]
+
+    llm_telemetry.record_parse(call_site, "failed")
+    return None
@@ -1,17 +1,86 @@
-from supabase import create_client, Client
 from app.config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_KEY
-from typing import Dict, List, Optional, Any
+from app.services.db_pool import db_pool
+from app.services.entity_cache import entity_cache
+from app.utils import deadline
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
+import base64
+import binascii
+import json
 import logging
+from datetime import datetime
 from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
+if TYPE_CHECKING:  # the supabase package is only imported when a client is created
+    from supabase import Client
+
+# Column projections per use case.  Reads never `select("*")`: callers that
+# need less than a full row pass a narrower projection, so e.g. the agents'
+# `conversation_state` JSONB (every message) is only fetched when needed.
+USER_COLUMNS = "id,email,role,auth_user_id,created_at,updated_at"
+USER_ROLE_COLUMNS = "id,role"
+USER_IDENTITY_COLUMNS = "id,auth_user_id"
+AGENT_COLUMNS = "id,user_id,role,conversation_state,created_at,updated_at"
+# Only the conversation_state keys the dashboards show, extracted server-side
+AGENT_SUMMARY_COLUMNS = (
+    "id,user_id,role,created_at,"
+    "message_count:conversation_state->message_count,"
+    "timestamp:conversation_state->>timestamp,"
+    "topics_discussed:conversation_state->topics_discussed,"
+    "context_summary:conversation_state->>context_summary,"
+    "sentiment:conversation_state->>sentiment"
+)
+TASK_COLUMNS = "id,user_id,assigned_to_role,description,status,resources,created_at,updated_at"
+TASK_ACTIVITY_COLUMNS = "id,status,description,created_at"
+TASK_WORKER_COLUMNS = "id,user_id,auth_user_id,assigned_to_role,description,resources"
+COMPANY_COLUMNS = (
+    "id,user_id,name,description,industry,stage,company_info,product_overview,"
+    "tech_stack,go_to_market_strategy,codebase_files,created_at,updated_at"
+)
+COMPANY_FILES_COLUMNS = "id,codebase_files"
+
+# Task listings are ordered by (created_at, id); see encode_task_cursor
+TASK_ORDERS = ("desc", "asc")
+
+
+def encode_task_cursor(task: Dict[str, Any], order: str = "desc") -> str:
+    """Opaque keyset cursor resuming a task listing after *task*"""
+    key = json.dumps([order, task["created_at"], str(task["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_task_cursor(cursor: str, order: str) -> Tuple[str, str]:
+    """Return the (created_at, id) position in *cursor*.
+
+    Raises ValueError for malformed cursors and for cursors issued for the
+    other sort order.  Cursors come from clients and end up in a PostgREST
+    filter, so both values must parse as a timestamp and a UUID.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order, created_at, task_id = json.loads(raw)
+        datetime.fromisoformat(created_at)
+        task_id = str(UUID(task_id))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, AttributeError) as e:
+        raise ValueError("Invalid task cursor") from e
+    if cursor_order != order:
+        raise ValueError("Task cursor does not match the requested order")
+    return created_at, task_id
+
+
+def _owned_by(rows: List[Optional[Dict[str, Any]]], user_id: str) -> bool:
+    """Whether every cached row belongs to *user_id*"""
+    return all(row is not None and str(row.get("user_id")) == str(user_id) for row in rows)
+
 class SupabaseService:
     def __init__(self):
         # Only create client if we have valid credentials
         if SUPABASE_URL and SUPABASE_URL != "https://placeholder.supabase.co" and SUPABASE_SERVICE_KEY and SUPABASE_SERVICE_KEY != "placeholder_key":
+            from supabase import create_client
+
             # Use service role key for backend operations (bypasses RLS)
-            self.client: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+            self.client: Optional["Client"] = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
         else:
             self.client = None
             print("⚠️  Warning: Using placeholder Supabase credentials. Database operations will be mocked.")
@@ -20,6 +89,23 @@ class SupabaseService:
         self._mock_users = {}
         self._mock_agents = {}
         self._mock_tasks = {}
+
+    async def _execute(self, query: Any) -> Any:
+        """Execute a PostgREST query on the DB thread pool.
+
+        The blocking ``.execute()`` never runs on the event loop.  The wait
+        is bounded by the request deadline, and no query is started once the
+        deadline has passed.
+        """
+        return await db_pool.run(query.execute, timeout=deadline.timeout(None))
+
+    @staticmethod
+    def _project(row: Optional[Dict[str, Any]], columns: str) -> Optional[Dict[str, Any]]:
+        """Mock-mode equivalent of a plain column projection"""
+        if row is None:
+            return None
+        wanted = columns.split(",")
+        return {k: row[k] for k in wanted if k in row}
     
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user in the database"""
@@ -37,44 +123,73 @@ class SupabaseService:
             return mock_user
         
         try:
-            response = self.client.table("users").insert(user_data).execute()
-            return response.data[0] if response.data else None
+            response = await self._execute(self.client.table("users").insert(user_data))
+            user = response.data[0] if response.data else None
+            if user:
+                keys = [f"id:{user['id']}"] + ([f"auth_user_id:{user['auth_user_id']}"] if user.get("auth_user_id") else [])
+                await entity_cache.invalidate("users", *keys)
+            return user
         except Exception as e:
             logger.error(f"Error creating user: {e}")
             raise
+
+    async def _get_user(self, column: str, value: str, columns: str) -> Optional[Dict[str, Any]]:
+        """Fetch one user by *column*, through the entity cache when *columns* allows"""
+        async def load(select: str) -> Optional[Dict[str, Any]]:
+            response = await self._execute(self.client.table("users").select(select).eq(column, value).limit(1))
+            return response.data[0] if response.data else None
+
+        if not entity_cache.covers(columns, USER_COLUMNS):
+            return await load(columns)
+        user = await entity_cache.get_or_load(
+            "users", f"{column}:{value}", lambda: load(USER_COLUMNS),
+            owned_by_key=lambda row: str(row.get(column)) == str(value)
+        )
+        return self._project(user, columns)
     
-    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    async def get_user_by_email(self, email: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
         """Get user by email"""
         if not self.client:
             logger.info(f"Mock: Get user by email {email} - returning None")
             return None
         
         try:
-            response = self.client.table("users").select("*").eq("email", email).execute()
+            response = await self._execute(self.client.table("users").select(columns).eq("email", email))
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error getting user by email: {e}")
             raise
     
-    async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def get_user_by_id(self, user_id: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
         """Get user by ID"""
         if not self.client:
-            return self._mock_users.get(user_id)
+            return self._project(self._mock_users.get(user_id), columns)
         
         try:
-            response = self.client.table("users").select("*").eq("id", user_id).execute()
-            return response.data[0] if response.data else None
+            return await self._get_user("id", user_id, columns)
         except Exception as e:
             logger.error(f"Error getting user by ID: {e}")
             raise
     
+    async def get_user_by_auth_id(self, auth_user_id: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
+        """Get user by their Supabase Auth ID"""
+        if not self.client:
+            user = next((u for u in self._mock_users.values() if u.get("auth_user_id") == auth_user_id), None)
+            return self._project(user, columns)
+        
+        try:
+            return await self._get_user("auth_user_id", auth_user_id, columns)
+        except Exception as e:
+            logger.error(f"Error getting user by auth ID: {e}")
+            raise
+    
     async def create_agent(self, agent_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new agent"""
         if not self.client:
             import uuid
             mock_agent = {
                 **agent_data,
-                "id": str(uuid.uuid4()),
+                "id": str(agent_data.get("id") or uuid.uuid4()),
                 "created_at": "2023-01-01T00:00:00Z",
                 "updated_at": "2023-01-01T00:00:00Z"
             }
@@ -83,29 +198,146 @@ class SupabaseService:
             return mock_agent
         
         try:
-            response = self.client.table("agents").insert(agent_data).execute()
+            sanitized = self._sanitize_agent(agent_data)
+            response = await self._execute(self.client.table("agents").insert(sanitized))
+            await self._invalidate_agents(response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error creating agent: {e}")
             raise
-    
-    async def get_agents_by_user(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all agents for a user"""
+
+    async def create_agents_bulk(self, agents_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several agents with a single insert request"""
+        if not agents_data:
+            return []
         if not self.client:
-            return [agent for agent in self._mock_agents.values() if agent["user_id"] == user_id]
+            return [await self.create_agent(agent_data) for agent_data in agents_data]
+
         try:
-            response = self.client.table("agents").select("*").eq("user_id", user_id).execute()
+            created = await self._insert_rows("agents", [self._sanitize_agent(a) for a in agents_data])
+            await self._invalidate_agents(created)
+            return created
+        except Exception as e:
+            logger.error(f"Error bulk creating agents: {e}")
+            raise
+
+    async def upsert_agents(self, agents_data: List[Dict[str, Any]], on_conflict: str = "id") -> List[Dict[str, Any]]:
+        """Insert agents, updating rows that already exist (matched on *on_conflict*)"""
+        if not agents_data:
+            return []
+        if not self.client:
+            return [await self._mock_upsert(self._mock_agents, a, self.create_agent) for a in agents_data]
+
+        try:
+            rows = [self._sanitize_agent(a) for a in agents_data]
+            upserted = await self._insert_rows("agents", rows, upsert_on=on_conflict)
+            await self._invalidate_agents(upserted)
+            return upserted
+        except Exception as e:
+            logger.error(f"Error upserting agents: {e}")
+            raise
+
+    @staticmethod
+    def _sanitize_agent(agent_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Restrict an agent payload to real `agents` columns with JSON-safe values"""
+        _allowed_cols = {
+            "id",
+            "user_id",
+            "role",
+            "conversation_state",
+            "created_at",
+            "updated_at",
+        }
+        return {
+            k: (str(v) if isinstance(v, UUID) else v)
+            for k, v in agent_data.items()
+            if k in _allowed_cols
+        }
+    
+    @staticmethod
+    async def _invalidate_agents(rows: Optional[List[Dict[str, Any]]]) -> None:
+        """Drop cached agent lists and summaries of the users owning *rows*"""
+        for user_id in {str(row["user_id"]) for row in rows or [] if row.get("user_id")}:
+            await entity_cache.invalidate("agents", f"user_id:{user_id}", f"summaries:{user_id}")
+
+    async def get_agents_by_user(
+        self, user_id: str, columns: str = AGENT_COLUMNS, *, use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Get all agents for a user.
+
+        Pass ``use_cache=False`` when the result feeds `update_agent_conversation`:
+        a cached `conversation_state` written back would drop newer turns.
+        """
+        if not self.client:
+            return [self._project(agent, columns) for agent in self._mock_agents.values() if agent["user_id"] == user_id]
+
+        async def load(select: str) -> List[Dict[str, Any]]:
+            response = await self._execute(self.client.table("agents").select(select).eq("user_id", user_id))
             return response.data or []
+
+        try:
+            if not use_cache or not entity_cache.covers(columns, AGENT_COLUMNS):
+                return await load(columns)
+            agents = await entity_cache.get_or_load(
+                "agents", f"user_id:{user_id}", lambda: load(AGENT_COLUMNS),
+                owned_by_key=lambda rows: _owned_by(rows, user_id)
+            )
+            return [self._project(agent, columns) for agent in agents]
         except Exception as e:
             logger.error(f"Error getting agents by user: {e}")
             raise
+
+    async def get_agent_summaries(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get each agent's activity summary without its message history.
+
+        Returns id, role, created_at plus the message_count, timestamp,
+        topics_discussed, context_summary and sentiment keys of
+        `conversation_state` (None when unset).
+        """
+        if not self.client:
+            summaries = []
+            for agent in self._mock_agents.values():
+                if agent["user_id"] != user_id:
+                    continue
+                state = agent.get("conversation_state") or {}
+                summaries.append({
+                    "id": agent["id"],
+                    "user_id": agent["user_id"],
+                    "role": agent["role"],
+                    "created_at": agent.get("created_at"),
+                    **{key: state.get(key) for key in ("message_count", "timestamp", "topics_discussed", "context_summary", "sentiment")},
+                })
+            return summaries
+        async def load() -> List[Dict[str, Any]]:
+            response = await self._execute(
+                self.client.table("agents").select(AGENT_SUMMARY_COLUMNS).eq("user_id", user_id)
+            )
+            return response.data or []
+
+        try:
+            if not entity_cache.enabled:
+                return await load()
+            return await entity_cache.get_or_load(
+                "agents", f"summaries:{user_id}", load, owned_by_key=lambda rows: _owned_by(rows, user_id)
+            )
+        except Exception as e:
+            logger.error(f"Error getting agent summaries: {e}")
+            raise
     
     async def update_agent_conversation(self, agent_id: str, conversation_state: Dict[str, Any]) -> Dict[str, Any]:
         """Update agent conversation state"""
+        if not self.client:
+            agent = self._mock_agents.get(agent_id)
+            if not agent:
+                return None
+            agent["conversation_state"] = conversation_state
+            return agent
+        
         try:
-            response = self.client.table("agents").update({
+            response = await self._execute(self.client.table("agents").update({
                 "conversation_state": conversation_state
-            }).eq("id", agent_id).execute()
+            }).eq("id", agent_id))
+            await self._invalidate_agents(response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error updating agent conversation: {e}")
@@ -122,7 +354,7 @@ class SupabaseService:
 
             mock_task = {
                 **task_data,
-                "id": str(uuid.uuid4()),
+                "id": str(task_data.get("id") or uuid.uuid4()),
                 "created_at": "2023-01-01T00:00:00Z",
                 "updated_at": "2023-01-01T00:00:00Z"
             }
@@ -131,47 +363,175 @@ class SupabaseService:
             return mock_task
         
         try:
-            # Only include columns that exist in the Supabase `tasks` table to avoid
-            # PostgREST errors like PGRST204 when an unexpected column is sent.
-            _allowed_cols = {
-                "id",
-                "user_id",
-                "assigned_to_role",
-                "description",
-                "status",
-                "resources",
-                "created_at",
-                "updated_at",
-            }
-            sanitized = {
-                k: (str(v) if isinstance(v, UUID) else v)
-                for k, v in task_data.items()
-                if k in _allowed_cols
-            }
-            response = self.client.table("tasks").insert(sanitized).execute()
+            sanitized = self._sanitize_task(task_data)
+            response = await self._execute(self.client.table("tasks").insert(sanitized))
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error creating task: {e}")
             raise
+
+    async def create_tasks_bulk(self, tasks_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several tasks with a single insert request"""
+        if not tasks_data:
+            return []
+        if not self.client:
+            return [await self.create_task(task_data) for task_data in tasks_data]
+
+        try:
+            return await self._insert_rows("tasks", [self._sanitize_task(t) for t in tasks_data])
+        except Exception as e:
+            logger.error(f"Error bulk creating tasks: {e}")
+            raise
+
+    async def upsert_tasks(self, tasks_data: List[Dict[str, Any]], on_conflict: str = "id") -> List[Dict[str, Any]]:
+        """Insert tasks, updating rows that already exist (matched on *on_conflict*)"""
+        if not tasks_data:
+            return []
+        if not self.client:
+            return [await self._mock_upsert(self._mock_tasks, t, self.create_task) for t in tasks_data]
+
+        try:
+            rows = [self._sanitize_task(t) for t in tasks_data]
+            return await self._insert_rows("tasks", rows, upsert_on=on_conflict)
+        except Exception as e:
+            logger.error(f"Error upserting tasks: {e}")
+            raise
+
+    async def _insert_rows(
+        self, table: str, rows: List[Dict[str, Any]], upsert_on: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Bulk insert (or upsert on the *upsert_on* columns) sanitized rows"""
+        # PostgREST requires every row of a bulk insert to share the same
+        # keys, so rows are grouped by column set (normally one group).
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+        created: List[Dict[str, Any]] = []
+        for group in groups.values():
+            query = self.client.table(table)
+            query = query.upsert(group, on_conflict=upsert_on) if upsert_on else query.insert(group)
+            response = await self._execute(query)
+            created.extend(response.data or [])
+        return created
+
+    @staticmethod
+    async def _mock_upsert(store: Dict[str, Dict[str, Any]], data: Dict[str, Any], create) -> Dict[str, Any]:
+        """Mock-mode upsert keyed on id: merge into an existing row or create one"""
+        existing = store.get(str(data.get("id")))
+        if existing is None:
+            return await create(data)
+        existing.update(data)
+        return existing
+
+    @staticmethod
+    def _sanitize_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Restrict a task payload to real `tasks` columns with JSON-safe values"""
+        # Only include columns that exist in the Supabase `tasks` table to avoid
+        # PostgREST errors like PGRST204 when an unexpected column is sent.
+        _allowed_cols = {
+            "id",
+            "user_id",
+            "assigned_to_role",
+            "description",
+            "status",
+            "resources",
+            "created_at",
+            "updated_at",
+        }
+        return {
+            k: (str(v) if isinstance(v, UUID) else v)
+            for k, v in task_data.items()
+            if k in _allowed_cols
+        }
     
-    async def get_tasks_by_user(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all tasks for a user"""
+    async def get_tasks_by_user(
+        self,
+        user_id: str,
+        columns: str = TASK_COLUMNS,
+        *,
+        status: Optional[str] = None,
+        role: Optional[str] = None,
+        order: str = "desc",
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get a user's tasks, newest first (``order="asc"`` for oldest first).
+
+        *status* and *role* filter on the server.  Paging is keyset based:
+        pass ``encode_task_cursor(last_row, order)`` of the previous page as
+        *cursor* to continue after it (raises ValueError for a bad cursor).
+        """
+        if order not in TASK_ORDERS:
+            raise ValueError(f"order must be one of {TASK_ORDERS}")
+        after = decode_task_cursor(cursor, order) if cursor else None
+        descending = order == "desc"
+
         if not self.client:
-            return [task for task in self._mock_tasks.values() if str(task["user_id"]) == str(user_id)]
+            tasks = [
+                task for task in self._mock_tasks.values()
+                if str(task["user_id"]) == str(user_id)
+                and (status is None or task.get("status") == status)
+                and (role is None or task.get("assigned_to_role") == role)
+            ]
+            position = lambda t: (t["created_at"], str(t["id"]))
+            tasks.sort(key=position, reverse=descending)
+            if after:
+                tasks = [t for t in tasks if (position(t) < after if descending else position(t) > after)]
+            if limit is not None:
+                tasks = tasks[:limit]
+            return [self._project(task, columns) for task in tasks]
         try:
-            # Try to query with the user_id as-is first
-            try:
-                response = self.client.table("tasks").select("*").eq("user_id", user_id).execute()
-            except Exception as uuid_error:
-                # If it fails due to UUID format, try to find a valid UUID for this user
-                # This handles cases where frontend passes non-UUID user identifiers
-                logger.warning(f"UUID format error for user_id {user_id}: {uuid_error}")
-                # For now, return empty list - in production you'd want to map user identifiers to UUIDs
-                return []
+            query = self.client.table("tasks").select(columns).eq("user_id", user_id)
+            if status is not None:
+                query = query.eq("status", status)
+            if role is not None:
+                query = query.eq("assigned_to_role", role)
+            if after:
+                created_at, task_id = after
+                op = "lt" if descending else "gt"
+                # (created_at, id) past the cursor; postgrest-py 0.11 has no or_()
+                query.params = query.params.add(
+                    "or", f'(created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}.{task_id}))'
+                )
+            # One order param: chained .order() calls send two, and PostgREST
+            # would drop the id tiebreaker the keyset condition relies on
+            direction = "desc" if descending else "asc"
+            query.params = query.params.add("order", f"created_at.{direction},id.{direction}")
+            if limit is not None:
+                query = query.limit(limit)
+            response = await self._execute(query)
             return response.data or []
         except Exception as e:
             logger.error(f"Error getting tasks by user: {e}")
             raise
+
+    async def count_tasks_by_user(self, user_id: str, status: Optional[str] = None) -> int:
+        """Count a user's tasks (optionally with *status*) without fetching them"""
+        if not self.client:
+            return len([
+                t for t in self._mock_tasks.values()
+                if str(t["user_id"]) == str(user_id) and (status is None or t.get("status") == status)
+            ])
+        try:
+            query = self.client.table("tasks").select("id", count="exact").eq("user_id", user_id)
+            if status is not None:
+                query = query.eq("status", status)
+            response = await self._execute(query.limit(1))
+            return response.count or 0
+        except Exception as e:
+            logger.error(f"Error counting tasks by user: {e}")
+            raise
+    
+    async def get_pending_tasks(self) -> List[Dict[str, Any]]:
+        """Get every task still waiting for the background worker"""
+        if not self.client:
+            return [self._project(t, TASK_WORKER_COLUMNS) for t in self._mock_tasks.values() if t.get("status") == "pending"]
+        try:
+            response = await self._execute(self.client.table("tasks").select(TASK_WORKER_COLUMNS).eq("status", "pending"))
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error getting pending tasks: {e}")
+            raise
     
     async def update_task(self, task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a task"""
@@ -185,7 +545,7 @@ class SupabaseService:
         try:
             # Supabase client needs plain JSON; convert UUIDs to strings
             sanitized = {k: (str(v) if isinstance(v, UUID) else v) for k, v in task_data.items()}
-            response = self.client.table("tasks").update(sanitized).eq("id", task_id).execute()
+            response = await self._execute(self.client.table("tasks").update(sanitized).eq("id", task_id))
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error updating task: {e}")
@@ -199,7 +559,7 @@ class SupabaseService:
                 return True
             return False
         try:
-            self.client.table("tasks").delete().eq("id", task_id).execute()
+            await self._execute(self.client.table("tasks").delete().eq("id", task_id))
             return True
         except Exception as e:
             logger.error(f"Error deleting task: {e}")
@@ -247,35 +607,50 @@ class SupabaseService:
                 for k, v in company_data.items()
                 if k in _allowed_cols
             }
-            response = self.client.table("companies").insert(sanitized).execute()
+            response = await self._execute(self.client.table("companies").insert(sanitized))
+            await self._invalidate_companies(response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error creating company: {e}")
             raise
 
-    async def get_company_by_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def get_company_by_user(self, user_id: str, columns: str = COMPANY_COLUMNS) -> Optional[Dict[str, Any]]:
         """Fetch company profile for a user"""
         if not self.client:
             if hasattr(self, "_mock_companies"):
                 for comp in self._mock_companies.values():
                     if str(comp.get("user_id")) == str(user_id):
-                        return comp
+                        return self._project(comp, columns)
             return None
-        try:
+        async def load(select: str) -> Optional[Dict[str, Any]]:
             # Fetch at most one matching row; avoid `.single()` so we don't raise
             # a 406 error when zero rows are found (PGRST116).
-            response = (
+            response = await self._execute(
                 self.client.table("companies")
-                .select("*")
+                .select(select)
                 .eq("user_id", user_id)
                 .limit(1)
-                .execute()
             )
             return response.data[0] if response.data else None
+
+        try:
+            if not entity_cache.covers(columns, COMPANY_COLUMNS):
+                return await load(columns)
+            company = await entity_cache.get_or_load(
+                "companies", f"user_id:{user_id}", lambda: load(COMPANY_COLUMNS),
+                owned_by_key=lambda row: _owned_by([row], user_id)
+            )
+            return self._project(company, columns)
         except Exception as e:
             logger.error(f"Error getting company by user: {e}")
             raise
 
+    @staticmethod
+    async def _invalidate_companies(rows: Optional[List[Dict[str, Any]]]) -> None:
+        """Drop the cached companies of the users owning *rows*"""
+        for user_id in {str(row["user_id"]) for row in rows or [] if row.get("user_id")}:
+            await entity_cache.invalidate("companies", f"user_id:{user_id}")
+
     async def update_company(self, company_id: str, company_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update company"""
         if not self.client:
@@ -301,7 +676,8 @@ class SupabaseService:
                 for k, v in company_data.items()
                 if k in _allowed_cols
             }
-            response = self.client.table("companies").update(sanitized).eq("id", company_id).execute()
+            response = await self._execute(self.client.table("companies").update(sanitized).eq("id", company_id))
+            await self._invalidate_companies(response.data)
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error updating company: {e}")
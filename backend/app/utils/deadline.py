@@ -0,0 +1,77 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+__all__ = [
+    "DeadlineExceeded",
+    "DeadlineMiddleware",
+    "request_deadline",
+    "remaining",
+    "timeout",
+    "check",
+]
+
+# Absolute time.monotonic() by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before the next call could start."""
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Give the enclosed work *seconds* to finish (None removes the deadline).
+
+    Routes set this once for their own budget (replacing the middleware
+    default); everything underneath reads it through `remaining`/`timeout`.
+    The value is a context variable, so tasks spawned inside inherit it.
+    """
+    token = _deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left for the current request, or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def timeout(default: Optional[float]) -> Optional[float]:
+    """Shrink a call's own *default* timeout to the remaining budget.
+
+    Raises `DeadlineExceeded` if the deadline has already passed, so no new
+    call is started for a request that cannot be answered in time.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("request deadline exceeded")
+    return left if default is None else min(default, left)
+
+
+def check() -> None:
+    """Raise `DeadlineExceeded` if the current request is out of time."""
+    timeout(None)
+
+
+class DeadlineMiddleware:
+    """Give every HTTP request a default deadline of *seconds*."""
+
+    def __init__(self, app: ASGIApp, seconds: float):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with request_deadline(self.seconds):
+            await self.app(scope, receive, send)
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Awaitable, TypeVar
+
+from starlette.requests import Request
+
+from app.config import CLIENT_DISCONNECT_POLL_SEC
+
+__all__ = [
+    "ClientDisconnected",
+    "CLIENT_CLOSED_REQUEST",
+    "cancel_on_disconnect",
+]
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Non-standard status (nginx) logged for requests the client abandoned
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before the response was ready."""
+
+
+async def cancel_on_disconnect(
+    request: Request,
+    work: Awaitable[T],
+    poll_interval: float = CLIENT_DISCONNECT_POLL_SEC,
+) -> T:
+    """Await *work*, cancelling it if the client disconnects first.
+
+    Non-streaming endpoints only notice a disconnect when they try to send
+    the response, so without this a closed tab still pays for the whole LLM
+    call and its tool calls.  *work* runs in its own task while the request
+    is polled every *poll_interval* seconds; on disconnect the task is
+    cancelled (propagating into in-flight completions and tool coroutines)
+    and `ClientDisconnected` is raised.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                break
+    except BaseException:
+        # The request handler itself was cancelled
+        task.cancel()
+        raise
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        logger.debug(f"Work abandoned after disconnect failed while cancelling: {e}")
+    raise ClientDisconnected(f"{request.method} {request.url.path}")
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+
+from app.config import IDEMPOTENCY_CLAIM_TTL_SEC, IDEMPOTENCY_TTL_SEC
+from app.services.cache import get_cache
+from app.utils.singleflight import SingleFlight
+
+__all__ = [
+    "IDEMPOTENCY_HEADER",
+    "run_idempotent",
+    "idempotency_stats",
+]
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Set on responses replayed from the store
+REPLAYED_HEADER = "Idempotent-Replayed"
+_MAX_KEY_LENGTH = 255
+
+# Completed responses, shared across workers when CACHE_BACKEND is shared;
+# retention is bounded by the TTL (and the backend's size limit)
+_RESPONSES = get_cache("idempotency", ttl=IDEMPOTENCY_TTL_SEC)
+# Keys being executed, claimed with an atomic add (redis SET NX / sqlite
+# INSERT OR IGNORE) so only one worker runs them; value is key + fingerprint
+_CLAIMS = get_cache("idempotency-claims", ttl=IDEMPOTENCY_CLAIM_TTL_SEC)
+# Requests with an in-flight key join the original execution (per process)
+_FLIGHT = SingleFlight()
+# store key -> payload fingerprint of the in-flight execution
+_INFLIGHT: Dict[str, str] = {}
+
+
+def _fingerprint(payload: Any) -> str:
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def _own_entry(store_key: str, entry: Any) -> Optional[Dict[str, Any]]:
+    """*entry* if it was written for *store_key*, else None.
+
+    Records carry their own key so a reply meant for another key (e.g. from
+    a desynced backend connection) is never replayed or read as a claim.
+    """
+    if entry is None:
+        return None
+    if isinstance(entry, dict) and entry.get("key") == store_key and "fingerprint" in entry:
+        return entry
+    logger.warning("Ignoring idempotency record written for another key")
+    return None
+
+
+def _key_reused() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f"{IDEMPOTENCY_HEADER} was already used for a different request"
+    )
+
+
+def _key_in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"A request with this {IDEMPOTENCY_HEADER} is still being processed"
+    )
+
+
+async def run_idempotent(
+    key: Optional[str],
+    *,
+    scope: str,
+    payload: Any,
+    work: Callable[[], Awaitable[BaseModel]],
+    response: Optional[Response] = None,
+) -> Any:
+    """Run *work* at most once per ``Idempotency-Key``.
+
+    Without a *key* this is just ``await work()``.  With one:
+
+    * a repeat of a completed request gets the stored response body (and the
+      ``Idempotent-Replayed: true`` header on *response*);
+    * a repeat arriving at the same worker while the original is still
+      running awaits the same execution instead of starting another;
+    * a repeat arriving at another worker while the original is running is
+      rejected with 409 (the key is claimed in the shared cache backend);
+    * reusing a key with a different *payload* is rejected with 422.
+
+    *scope* namespaces keys per endpoint and caller (e.g. ``"chat:<user_id>"``).
+    Only successful results are stored, so a request that failed can be
+    retried with the same key.  The work runs in its own task: a client that
+    disconnects does not cancel it, so its retry gets the finished response.
+
+    Across workers the guarantee needs a shared ``CACHE_BACKEND`` (sqlite or
+    redis); with the memory backend it holds per process only.  With redis
+    it relies on `RedisCacheBackend.execute` dropping the connection when a
+    command is cancelled, so replies never reach the wrong command; stored
+    records also carry their key and are ignored under any other key.
+    """
+    if key is None:
+        return await work()
+    if not key or len(key) > _MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be 1-{_MAX_KEY_LENGTH} characters"
+        )
+
+    store_key = f"{scope}:{key}"
+    fingerprint = _fingerprint(payload)
+
+    async def _replay_or_run() -> Tuple[Any, bool]:
+        try:
+            stored = _own_entry(store_key, await _RESPONSES.get(store_key))
+            if stored is None:
+                try:
+                    claimed = await _CLAIMS.add(store_key, {"key": store_key, "fingerprint": fingerprint})
+                except Exception as e:
+                    # Degrade to the per-process guarantee rather than fail the request
+                    logger.warning(f"Could not claim idempotency key, running unclaimed: {e}")
+                    claimed = True
+                if claimed:
+                    try:
+                        result = await work()
+                        await _RESPONSES.set(store_key, {
+                            "key": store_key,
+                            "fingerprint": fingerprint,
+                            "body": result.model_dump(mode="json"),
+                        })
+                        return result, False
+                    finally:
+                        await _CLAIMS.delete(store_key)
+                # Another worker holds the key; it may have finished meanwhile
+                stored = _own_entry(store_key, await _RESPONSES.get(store_key))
+                if stored is None:
+                    claim = _own_entry(store_key, await _CLAIMS.get(store_key))
+                    if claim is not None and claim["fingerprint"] != fingerprint:
+                        raise _key_reused()
+                    raise _key_in_progress()
+            if stored["fingerprint"] != fingerprint:
+                raise _key_reused()
+            return stored["body"], True
+        finally:
+            _INFLIGHT.pop(store_key, None)
+
+    # Register before any await so concurrent requests in this process join
+    # the same execution; joiners must send the same request
+    if _INFLIGHT.setdefault(store_key, fingerprint) != fingerprint:
+        raise _key_reused()
+    body, replayed = await _FLIGHT.do(store_key, _replay_or_run)
+    if replayed:
+        logger.info(f"Replaying stored response for idempotency key in '{scope.split(':')[0]}'")
+        if response is not None:
+            response.headers[REPLAYED_HEADER] = "true"
+    return body
+
+
+def idempotency_stats() -> Dict[str, Any]:
+    """In-flight/joined counters and hit ratio of the response store."""
+    return {**_FLIGHT.stats(), "store": _RESPONSES.stats(), "claims": _CLAIMS.stats()}
@@ -0,0 +1,47 @@
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from app.dev.fake_openai import FakeLLMConfig, create_app
+
+
+class _FakeOpenAIServer:
+    """The app/dev/fake_openai.py stand-in served by uvicorn on a free port."""
+
+    def __init__(self, config: FakeLLMConfig):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.app = create_app(config)
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def fake(self):
+        return self.app.state.fake
+
+    def start(self) -> "_FakeOpenAIServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("fake OpenAI server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+@pytest.fixture
+def fake_openai_server(request):
+    """Start a local OpenAI-compatible server; parametrize with a FakeLLMConfig."""
+    config = getattr(request, "param", None) or FakeLLMConfig()
+    server = _FakeOpenAIServer(config).start()
+    yield server
+    server.stop()
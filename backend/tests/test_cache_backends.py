@@ -0,0 +1,155 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.cache import (
+    MemoryCacheBackend,
+    NamespacedCache,
+    RedisCacheBackend,
+    SQLiteCacheBackend,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _start_resp_stand_in(reply_delay=0.0):
+    """Tiny Redis-protocol server (GET / SET [NX] [PX] / DEL) for tests."""
+    store = {}
+
+    async def read_command(reader):
+        header = await reader.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args
+
+    async def handle(reader, writer):
+        while True:
+            args = await read_command(reader)
+            if args is None:
+                break
+            cmd = args[0].upper()
+            await asyncio.sleep(reply_delay)
+            if cmd == "SET":
+                options = [a.upper() for a in args[3:]]
+                expires = time.monotonic() + int(args[args.index("PX") + 1]) / 1000 if "PX" in options else None
+                _, current_expiry = store.get(args[1], (None, 0))
+                if "NX" in options and args[1] in store and (current_expiry is None or current_expiry > time.monotonic()):
+                    writer.write(b"$-1\r\n")
+                else:
+                    store[args[1]] = (args[2], expires)
+                    writer.write(b"+OK\r\n")
+            elif cmd == "GET":
+                value, expires = store.get(args[1], (None, None))
+                if value is None or (expires is not None and expires <= time.monotonic()):
+                    writer.write(b"$-1\r\n")
+                else:
+                    data = value.encode()
+                    writer.write(b"$%d\r\n%s\r\n" % (len(data), data))
+            elif cmd == "DEL":
+                writer.write(b":%d\r\n" % (1 if store.pop(args[1], None) else 0))
+            else:
+                writer.write(b"-ERR unknown command\r\n")
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def test_memory_backend_lru_and_ttl():
+    backend = MemoryCacheBackend(max_entries=2)
+    await backend.set("a", "1")
+    await backend.set("b", "2", ttl=0.01)
+    await backend.set("c", "3")  # evicts "a"
+
+    assert await backend.get("a") is None
+    await asyncio.sleep(0.02)
+    assert await backend.get("b") is None
+    assert await backend.get("c") == "3"
+
+
+async def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker_a = NamespacedCache(SQLiteCacheBackend(path, max_entries=2), "suggestions")
+    worker_b = NamespacedCache(SQLiteCacheBackend(path, max_entries=2), "suggestions")
+
+    await worker_a.set("user-1", {"suggestions": [1, 2]})
+    assert await worker_b.get("user-1") == {"suggestions": [1, 2]}
+
+    await worker_a.set("user-2", {})
+    await worker_a.set("user-3", {})
+    assert await worker_b.get("user-1") is None  # evicted by size bound
+    assert worker_b.stats()["hits"] == 1
+
+
+async def test_add_only_succeeds_for_one_worker(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    workers = [NamespacedCache(SQLiteCacheBackend(path), "claims", ttl=0.05) for _ in range(4)]
+
+    results = await asyncio.gather(*(w.add("key", i) for i, w in enumerate(workers)))
+    assert sorted(results) == [False, False, False, True]
+
+    await asyncio.sleep(0.06)
+    assert await workers[0].add("key", "again") is True
+
+    memory = MemoryCacheBackend()
+    assert await memory.add("k", "1") is True
+    assert await memory.add("k", "2") is False
+    assert await memory.get("k") == "1"
+
+
+async def test_redis_backend_against_stand_in():
+    server, port = await _start_resp_stand_in()
+    try:
+        backend = RedisCacheBackend(f"redis://127.0.0.1:{port}/0")
+        cache = NamespacedCache(backend, "suggestions", ttl=0.05)
+        other = NamespacedCache(backend, "other")
+
+        await cache.set("user-1", {"ok": True})
+        assert await cache.get("user-1") == {"ok": True}
+        assert await other.get("user-1") is None  # namespaces are isolated
+
+        await asyncio.sleep(0.06)
+        assert await cache.get("user-1") is None  # TTL sent as PX
+
+        await other.set("k", [1])
+        await other.delete("k")
+        assert await other.get("k") is None
+
+        assert await cache.add("claim", "a") is True
+        assert await cache.add("claim", "b") is False  # sent as SET NX
+        await asyncio.sleep(0.06)
+        assert await cache.add("claim", "c") is True  # expired claims can be retaken
+        await backend.aclose()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def test_cancelled_command_does_not_leave_its_reply_for_the_next():
+    server, port = await _start_resp_stand_in(reply_delay=0.1)
+    try:
+        backend = RedisCacheBackend(f"redis://127.0.0.1:{port}/0")
+        await backend.set("a", "value-of-a")
+        await backend.set("b", "value-of-b")
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(backend.get("a"), timeout=0.05)  # cancelled mid-flight
+        await asyncio.sleep(0.1)  # the reply to GET a has arrived by now
+
+        assert await backend.get("b") == "value-of-b"
+        await backend.aclose()
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def test_unreachable_backend_is_a_miss():
+    cache = NamespacedCache(RedisCacheBackend("redis://127.0.0.1:1/0", timeout=0.2), "x")
+    await cache.set("k", 1)
+    assert await cache.get("k") is None
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.main import app
+from app.routes import agents as agents_routes
+from app.services.openai_service import openai_service
+from app.services.supabase_service import supabase_service
+from app.utils import deadline
+
+pytestmark = pytest.mark.asyncio
+
+
+class _RecordBodyMessages:
+    """ASGI wrapper keeping each body message; ASGITransport joins them."""
+
+    def __init__(self, app):
+        self.app = app
+        self.bodies = []
+
+    async def __call__(self, scope, receive, send):
+        async def recording_send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                self.bodies.append(message["body"].decode())
+            await send(message)
+
+        await self.app(scope, receive, recording_send)
+
+
+def _parse_frame(frame: str):
+    event, data = None, None
+    for line in frame.strip().split("\n"):
+        field, _, value = line.partition(": ")
+        if field == "event":
+            event = value
+        elif field == "data":
+            data = json.loads(value)
+    return event, data
+
+
+async def test_chat_stream_sends_token_frames_then_done(monkeypatch):
+    # Mock mode: no database client, canned reply streamed word by word
+    user = await supabase_service.create_user({"email": "stream@example.com", "role": "CEO"})
+    agent = await supabase_service.create_agent({"user_id": user["id"], "role": "CTO", "conversation_state": {}})
+
+    saves = []
+    save_conversation = supabase_service.update_agent_conversation
+
+    async def counting_save(agent_id, state):
+        saves.append(agent_id)
+        return await save_conversation(agent_id, state)
+
+    monkeypatch.setattr(supabase_service, "update_agent_conversation", counting_save)
+
+    recorder = _RecordBodyMessages(app)
+    transport = httpx.ASGITransport(app=recorder)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async with client.stream(
+            "POST", "/api/agents/chat/stream", json={"user_id": user["id"], "role": "CTO", "message": "How do we scale?"}
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join([chunk.decode() async for chunk in response.aiter_raw()])
+
+    # Sent as one SSE frame per body message, not a single buffered body
+    chunks = recorder.bodies
+    assert len(chunks) > 2
+    assert "".join(chunks) == body
+    assert all(chunk.endswith("\n\n") and chunk.count("data: ") == 1 for chunk in chunks)
+    frames = [_parse_frame(chunk) for chunk in chunks]
+
+    *token_frames, (event, done) = frames
+    assert event == "done"
+    assert all(event is None and "token" in data for event, data in token_frames)
+    streamed = "".join(data["token"] for _, data in token_frames).strip()
+    assert done["message"].startswith(streamed)
+    assert done["agent_role"] == "CTO"
+
+    assert saves == [agent["id"]]
+    [stored] = await supabase_service.get_agents_by_user(user["id"], use_cache=False)
+    assert stored["conversation_state"]["messages"][-1]["message"] == done["message"]
+
+
+async def test_chat_stream_prepares_and_streams_under_one_chat_deadline(monkeypatch):
+    user = await supabase_service.create_user({"email": "stream-deadline@example.com", "role": "CEO"})
+    await supabase_service.create_agent({"user_id": user["id"], "role": "CTO", "conversation_state": {}})
+    monkeypatch.setattr(agents_routes, "CHAT_DEADLINE_SEC", 100)
+    budgets = {}
+    get_agents = supabase_service.get_agents_by_user
+    stream_reply = openai_service.stream_agent_response
+
+    async def timed_get_agents(*args, **kwargs):
+        budgets["prepare"] = deadline.remaining()
+        await asyncio.sleep(0.2)
+        return await get_agents(*args, **kwargs)
+
+    async def timed_stream(**kwargs):
+        budgets["stream"] = deadline.remaining()
+        async for token in stream_reply(**kwargs):
+            yield token
+
+    monkeypatch.setattr(supabase_service, "get_agents_by_user", timed_get_agents)
+    monkeypatch.setattr(openai_service, "stream_agent_response", timed_stream)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post(
+            "/api/agents/chat/stream", json={"user_id": user["id"], "role": "CTO", "message": "Hi"}
+        )
+
+    assert response.status_code == 200
+    # The chat budget, not the 30s middleware default, covers _prepare_chat
+    assert 99 < budgets["prepare"] <= 100
+    # The stream gets what _prepare_chat left over
+    assert 99 < budgets["stream"] <= budgets["prepare"] - 0.2
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.db_pool import BlockingCallPool
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_blocking_calls_do_not_block_the_loop():
+    pool = BlockingCallPool(max_workers=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.create_task(ticker())
+    results = await asyncio.gather(*(pool.run(time.sleep, 0.1) for _ in range(4)))
+    ticking.cancel()
+
+    stats = pool.stats()
+    assert results == [None] * 4
+    assert ticks >= 10  # the loop kept running during ~0.2s of blocking calls
+    assert stats["completed"] == 4 and stats["max_queued"] >= 2
+    assert stats["queued"] == stats["active"] == 0
+    pool.shutdown()
+
+
+async def test_timed_out_call_is_dropped_from_the_queue():
+    pool = BlockingCallPool(max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    blocker = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0.01)
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.run(ran.append, 1, timeout=0.05)
+    release.set()
+    await blocker
+
+    assert ran == []
+    assert pool.stats()["abandoned"] == 1 and pool.stats()["queued"] == 0
+    pool.shutdown()
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from app.agents.tools.base import BaseTool
+from app.dev.fake_openai import FakeLLMConfig, LatencyDistribution
+from app.services.llm_cache import CompletionCache
+from app.services.llm_gateway import LLMGateway
+from app.utils import deadline
+from app.utils.deadline import DeadlineExceeded, request_deadline
+
+pytestmark = pytest.mark.asyncio
+
+
+class _SleepTool(BaseTool):
+    name = "sleep"
+
+    async def run(self, seconds: str) -> str:
+        await asyncio.sleep(float(seconds))
+        return "woke up"
+
+
+async def _remaining():
+    return deadline.remaining()
+
+
+async def test_timeouts_shrink_to_the_remaining_budget():
+    assert deadline.timeout(15.0) == 15.0  # no deadline set
+
+    with request_deadline(0.5):
+        assert deadline.timeout(15.0) <= 0.5
+        assert deadline.timeout(0.1) == 0.1
+        # Spawned tasks inherit the deadline
+        assert 0 < await asyncio.create_task(_remaining()) <= 0.5
+
+    with request_deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            deadline.check()
+
+
+async def test_tool_is_cancelled_at_the_deadline():
+    tool = _SleepTool()
+    assert await tool.invoke(seconds="0") == "woke up"
+
+    started = time.monotonic()
+    with request_deadline(0.1), pytest.raises(DeadlineExceeded):
+        await tool.invoke(seconds="5")
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.parametrize(
+    "fake_openai_server",
+    [FakeLLMConfig(latency=LatencyDistribution.parse("fixed:1"))],
+    indirect=True,
+)
+async def test_llm_call_respects_request_deadline(fake_openai_server):
+    gateway = LLMGateway(
+        api_key="sk-placeholder_key",
+        base_url=fake_openai_server.base_url,
+        cache=CompletionCache(max_entries=0),
+    )
+
+    started = time.monotonic()
+    with request_deadline(0.2), pytest.raises(DeadlineExceeded):
+        await gateway.chat_completion(
+            call_site="test", model="gpt-4", messages=[{"role": "user", "content": "hi"}], timeout=30
+        )
+
+    assert time.monotonic() - started < 0.8
+    await gateway.aclose()
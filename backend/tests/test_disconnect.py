@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from fastapi import Response
+
+from app.dev.fake_openai import FakeLLMConfig, LatencyDistribution
+from app.services.llm_cache import CompletionCache
+from app.services.llm_gateway import LLMGateway
+from app.services.llm_telemetry import LLMTelemetry
+from app.models import ChatMessage
+from app.routes import agents as agents_routes
+from app.services.supabase_service import supabase_service
+from app.utils.disconnect import CLIENT_CLOSED_REQUEST, ClientDisconnected, cancel_on_disconnect
+
+pytestmark = pytest.mark.asyncio
+
+
+class _FakeRequest:
+    method = "POST"
+
+    class url:
+        path = "/api/agents/chat"
+
+    def __init__(self, disconnect_after: float):
+        self._disconnect_at = asyncio.get_running_loop().time() + disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        return asyncio.get_running_loop().time() >= self._disconnect_at
+
+
+async def test_returns_result_while_client_is_connected():
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    assert await cancel_on_disconnect(_FakeRequest(10), work(), poll_interval=0.01) == "done"
+
+
+@pytest.mark.parametrize(
+    "fake_openai_server",
+    [FakeLLMConfig(latency=LatencyDistribution.parse("fixed:1.5"))],
+    indirect=True,
+)
+async def test_disconnect_cancels_in_flight_completion(fake_openai_server):
+    telemetry = LLMTelemetry(jsonl_path=None)
+    gateway = LLMGateway(
+        api_key="sk-placeholder_key",
+        base_url=fake_openai_server.base_url,
+        cache=CompletionCache(max_entries=0),
+        telemetry=telemetry,
+    )
+    call = gateway.chat_completion(call_site="chat", model="gpt-4", messages=[{"role": "user", "content": "hi"}])
+
+    started = asyncio.get_running_loop().time()
+    with pytest.raises(ClientDisconnected):
+        await cancel_on_disconnect(_FakeRequest(0.1), call, poll_interval=0.02)
+
+    assert asyncio.get_running_loop().time() - started < 0.8
+    stats = telemetry.snapshot()["totals"]
+    assert stats["cancelled"] == 1 and stats["errors"] == 0
+    await gateway.aclose()
+
+
+async def test_discarded_chat_turn_creates_no_tasks(monkeypatch):
+    user = await supabase_service.create_user({"email": "gone@example.com", "role": "CEO"})
+    await supabase_service.create_agent({"user_id": user["id"], "role": "CTO", "conversation_state": {}})
+
+    async def slow_reply(**kwargs):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(agents_routes.openai_service, "get_agent_response", slow_reply)
+    message = ChatMessage(user_id=user["id"], role="CTO", message="We need to update the landing page")
+
+    result = await agents_routes.chat_with_agent(message, _FakeRequest(0.05), Response(), idempotency_key=None)
+
+    assert result.status_code == CLIENT_CLOSED_REQUEST
+    assert await supabase_service.get_tasks_by_user(user["id"]) == []
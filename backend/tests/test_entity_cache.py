@@ -0,0 +1,139 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import supabase_service as supabase_module
+from app.services.entity_cache import EntityCache
+from app.services.supabase_service import SupabaseService
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(autouse=True)
+def enabled_cache(monkeypatch):
+    # Off by default with the memory backend
+    monkeypatch.setattr(supabase_module, "entity_cache", EntityCache(ttl=60))
+
+
+class _Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = {}
+        self.changes = None
+
+    def select(self, columns):
+        self.client.selects.append(self.table)
+        return self
+
+    def update(self, changes):
+        self.changes = changes
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        rows = [
+            row for row in self.client.rows[self.table]
+            if all(row.get(k) == v for k, v in self.filters.items())
+        ]
+        if self.changes:
+            for row in rows:
+                row.update(self.changes)
+        return SimpleNamespace(data=[dict(row) for row in rows])
+
+
+class _FakeClient:
+    """In-memory tables that count select requests."""
+
+    def __init__(self, **rows):
+        self.rows = rows
+        self.selects = []
+
+    def table(self, name):
+        return _Query(self, name)
+
+
+async def test_user_reads_are_served_from_the_cache():
+    user_id, auth_id = str(uuid.uuid4()), str(uuid.uuid4())
+    service = SupabaseService()
+    service.client = _FakeClient(users=[{"id": user_id, "auth_user_id": auth_id, "role": "CEO", "email": "c@example.com"}])
+
+    first = await service.get_user_by_id(user_id)
+    again = await service.get_user_by_id(user_id, columns="id,role")
+    by_auth = await service.get_user_by_auth_id(auth_id)
+    await service.get_user_by_auth_id(auth_id)
+
+    assert again == {"id": user_id, "role": "CEO"}
+    assert first["email"] == by_auth["email"] == "c@example.com"
+    assert service.client.selects == ["users", "users"]  # one per key
+
+
+async def test_agent_writes_invalidate_the_cached_list():
+    user_id, agent_id = str(uuid.uuid4()), str(uuid.uuid4())
+    service = SupabaseService()
+    service.client = _FakeClient(
+        agents=[{"id": agent_id, "user_id": user_id, "role": "CTO", "conversation_state": {"message_count": 1}}]
+    )
+
+    await service.get_agents_by_user(user_id)
+    await service.get_agents_by_user(user_id)
+    assert service.client.selects == ["agents"]
+
+    await service.update_agent_conversation(agent_id, {"message_count": 2})
+    [agent] = await service.get_agents_by_user(user_id)
+
+    assert agent["conversation_state"] == {"message_count": 2}
+    assert service.client.selects == ["agents", "agents"]
+
+    # Read-modify-write callers always go to the database
+    await service.get_agents_by_user(user_id, use_cache=False)
+    assert service.client.selects == ["agents", "agents", "agents"]
+
+
+async def test_fill_racing_a_write_is_not_stored():
+    cache = EntityCache(ttl=60)
+    key = f"user_id:{uuid.uuid4()}"
+    loaded = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_load():
+        loaded.set()
+        await release.wait()
+        return {"version": "old"}
+
+    read = asyncio.create_task(cache.get_or_load("companies", key, slow_load))
+    await loaded.wait()
+    await cache.invalidate("companies", key)
+    release.set()
+
+    assert await read == {"version": "old"}
+    assert await cache.get_or_load("companies", key, lambda: asyncio.sleep(0, {"version": "new"})) == {"version": "new"}
+    assert cache.stats()["stale_fills"] == 1
+
+
+async def test_cached_row_of_another_key_is_not_returned():
+    user_id, other_id = str(uuid.uuid4()), str(uuid.uuid4())
+    service = SupabaseService()
+    service.client = _FakeClient(
+        users=[{"id": user_id, "role": "CEO"}],
+        agents=[{"id": str(uuid.uuid4()), "user_id": user_id, "role": "CTO"}],
+    )
+    cache = supabase_module.entity_cache
+    # As if a desynced backend reply had stored another user's rows under these keys
+    await cache._caches["users"].set(f"id:{user_id}", {"id": other_id, "role": "CMO"})
+    await cache._caches["agents"].set(f"user_id:{user_id}", [{"id": "x", "user_id": other_id, "role": "CEO"}])
+
+    assert (await service.get_user_by_id(user_id))["id"] == user_id
+    [agent] = await service.get_agents_by_user(user_id)
+
+    assert agent["user_id"] == user_id
+    assert cache.stats()["mismatches"] == 2
+    assert service.client.selects == ["users", "agents"]
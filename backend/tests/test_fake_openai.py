@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+import pytest
+
+from app.agents.executor import ToolAgent
+from app.dev.fake_openai import FakeLLMConfig, LatencyDistribution
+from app.services.llm_cache import CompletionCache
+from app.services.llm_gateway import LLMGateway
+from app.services.llm_resilience import RetryPolicy
+from app.services.model_router import INTERACTIVE, ModelRouter
+from app.services.supabase_service import supabase_service
+
+pytestmark = pytest.mark.asyncio
+
+
+def _gateway(server, **kwargs):
+    return LLMGateway(
+        api_key="sk-placeholder_key",
+        base_url=server.base_url,
+        cache=CompletionCache(max_entries=0),
+        **kwargs,
+    )
+
+
+async def test_chat_and_stream_against_stand_in(fake_openai_server):
+    gateway = _gateway(fake_openai_server)
+    router = ModelRouter(gateway)
+    messages = [{"role": "user", "content": "How do we grow?"}]
+
+    first = await router.chat_completion(request_class=INTERACTIVE, call_site="chat", messages=messages, max_tokens=20)
+    second = await router.chat_completion(request_class=INTERACTIVE, call_site="chat", messages=messages, max_tokens=20)
+    streamed = [
+        delta
+        async for delta in gateway.stream_chat_completion(
+            call_site="chat", model="gpt-4", messages=messages, max_tokens=20
+        )
+    ]
+
+    assert gateway.enabled
+    assert first.choices[0].message.content == second.choices[0].message.content  # deterministic
+    assert "".join(streamed) == first.choices[0].message.content
+    assert first.usage.completion_tokens > 0
+    assert fake_openai_server.fake.requests_by_model == {"gpt-4": 3}
+    await gateway.aclose()
+
+
+async def test_tool_agent_round_trip(fake_openai_server):
+    agent = ToolAgent(max_steps=3)
+    agent.gateway = _gateway(fake_openai_server)
+    agent.router = ModelRouter(agent.gateway)
+
+    answer = await agent.chat("please summarize_text this")
+
+    # One tool-calling round, then the final answer
+    assert answer
+    assert fake_openai_server.fake.requests == 2
+
+
+@pytest.mark.parametrize(
+    "fake_openai_server",
+    [FakeLLMConfig(latency=LatencyDistribution.parse("fixed:0.3"))],
+    indirect=True,
+)
+async def test_tool_agent_inserts_auto_tasks_after_the_answer(fake_openai_server, monkeypatch):
+    agent = ToolAgent(max_steps=1)
+    agent.gateway = _gateway(fake_openai_server)
+    agent.router = ModelRouter(agent.gateway)
+    await supabase_service.create_user({"email": "founder@example.com", "role": "CEO", "auth_user_id": "auth-overlap"})
+    lookup_user = supabase_service.get_user_by_auth_id
+    inserts = []
+
+    async def slow_lookup(*args, **kwargs):
+        await asyncio.sleep(0.3)
+        return await lookup_user(*args, **kwargs)
+
+    async def bulk_insert(tasks):
+        inserts.append((fake_openai_server.fake.requests, [t["description"] for t in tasks]))
+        return tasks
+
+    monkeypatch.setattr(supabase_service, "get_user_by_auth_id", slow_lookup)
+    monkeypatch.setattr(supabase_service, "create_tasks_bulk", bulk_insert)
+
+    started = time.monotonic()
+    answer = await agent.chat("We need to fix the login and update the pricing page", "auth-overlap")
+    elapsed = time.monotonic() - started
+
+    # Two 0.3s completions; the 0.3s user lookup runs alongside them
+    assert elapsed < 0.85
+    # One bulk insert, after both completions
+    assert inserts == [(2, ["Fix the login", "Update the pricing page"])]
+    assert answer.endswith("I've added the following tasks:\n• Fix the login\n• Update the pricing page")
+
+
+@pytest.mark.parametrize("fake_openai_server", [FakeLLMConfig(server_error_rate=1.0)], indirect=True)
+async def test_failed_or_abandoned_tool_turn_creates_no_tasks(fake_openai_server, monkeypatch):
+    agent = ToolAgent(max_steps=1)
+    agent.gateway = _gateway(fake_openai_server, retry=RetryPolicy(max_attempts=1))
+    agent.router = ModelRouter(agent.gateway)
+    await supabase_service.create_user({"email": "gone@example.com", "role": "CEO", "auth_user_id": "auth-gone"})
+    inserts = []
+
+    async def bulk_insert(tasks):
+        inserts.append(tasks)
+        return tasks
+
+    monkeypatch.setattr(supabase_service, "create_tasks_bulk", bulk_insert)
+
+    with pytest.raises(Exception):
+        await agent.chat("We need to fix the login", "auth-gone")
+
+    fake_openai_server.fake.config.server_error_rate = 0.0
+    fake_openai_server.fake.config.latency = LatencyDistribution.parse("fixed:1")
+    turn = asyncio.create_task(agent.chat("We need to fix the login", "auth-gone"))
+    await asyncio.sleep(0.2)
+    turn.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await turn
+
+    assert inserts == []
+
+
+@pytest.mark.parametrize(
+    "fake_openai_server",
+    [FakeLLMConfig(latency=LatencyDistribution.parse("uniform:0.001,0.005"), rate_limit_rate=0.5, seed=7)],
+    indirect=True,
+)
+async def test_injected_rate_limits_are_retried(fake_openai_server):
+    gateway = _gateway(fake_openai_server, retry=RetryPolicy(max_attempts=8, base_delay=0.001, max_delay=0.25))
+
+    for i in range(5):
+        await gateway.chat_completion(call_site="test", model="gpt-3.5-turbo", messages=[{"role": "user", "content": str(i)}])
+
+    assert gateway.resilience_stats()["retries"] > 0
+    assert fake_openai_server.fake.requests == 5 + gateway.resilience_stats()["retries"]
+    await gateway.aclose()
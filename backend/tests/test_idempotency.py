@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+from app.main import app
+from app.utils import idempotency
+from app.utils.idempotency import run_idempotent
+
+pytestmark = pytest.mark.asyncio
+
+
+class _Reply(BaseModel):
+    n: int
+
+
+def _counting_work(delay=0.0, fail=False):
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("boom")
+        return _Reply(n=len(calls))
+
+    return work, calls
+
+
+async def test_in_flight_key_joins_and_completed_key_replays():
+    key = str(uuid.uuid4())
+    work, calls = _counting_work(delay=0.05)
+
+    first, second = await asyncio.gather(
+        run_idempotent(key, scope="t", payload={"a": 1}, work=work),
+        run_idempotent(key, scope="t", payload={"a": 1}, work=work),
+    )
+    response = Response()
+    replay = await run_idempotent(key, scope="t", payload={"a": 1}, work=work, response=response)
+
+    assert calls == [1]
+    assert first is second
+    assert replay == {"n": 1}
+    assert response.headers["Idempotent-Replayed"] == "true"
+
+
+async def test_key_reused_for_different_payload_is_rejected():
+    key = str(uuid.uuid4())
+    work, _ = _counting_work()
+    await run_idempotent(key, scope="t", payload={"a": 1}, work=work)
+
+    with pytest.raises(HTTPException) as exc:
+        await run_idempotent(key, scope="t", payload={"a": 2}, work=work)
+    assert exc.value.status_code == 422
+
+
+async def test_failures_are_not_stored():
+    key = str(uuid.uuid4())
+    failing, _ = _counting_work(fail=True)
+    with pytest.raises(RuntimeError):
+        await run_idempotent(key, scope="t", payload={}, work=failing)
+
+    work, calls = _counting_work()
+    assert await run_idempotent(key, scope="t", payload={}, work=work) == _Reply(n=1)
+    assert calls == [1]
+
+
+async def test_key_claimed_by_another_worker_is_not_run_again():
+    key = str(uuid.uuid4())
+    payload = {"a": 1}
+    # As if another worker had claimed the key and is still running it
+    await idempotency._CLAIMS.add(f"t:{key}", {"key": f"t:{key}", "fingerprint": idempotency._fingerprint(payload)})
+    work, calls = _counting_work()
+
+    with pytest.raises(HTTPException) as in_progress:
+        await run_idempotent(key, scope="t", payload=payload, work=work)
+    with pytest.raises(HTTPException) as reused:
+        await run_idempotent(key, scope="t", payload={"a": 2}, work=work)
+
+    assert in_progress.value.status_code == 409
+    assert reused.value.status_code == 422
+    assert calls == []
+
+
+async def test_record_stored_for_another_key_is_not_replayed():
+    key, other = str(uuid.uuid4()), str(uuid.uuid4())
+    payload = {"a": 1}
+    # As if a desynced backend reply had returned another key's stored response
+    await idempotency._RESPONSES.set(
+        f"t:{key}", {"key": f"t:{other}", "fingerprint": idempotency._fingerprint(payload), "body": {"n": 99}}
+    )
+    work, calls = _counting_work()
+
+    assert await run_idempotent(key, scope="t", payload=payload, work=work) == _Reply(n=1)
+    assert calls == [1]
+
+
+async def test_create_task_retry_does_not_duplicate():
+    body = {"user_id": str(uuid.uuid4()), "assigned_to_role": "CEO", "description": "Draft the pitch deck"}
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.post("/api/tasks/", json=body, headers=headers)
+        retry = await client.post("/api/tasks/", json=body, headers=headers)
+        fresh = await client.post("/api/tasks/", json=body)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert fresh.json()["id"] != first.json()["id"]
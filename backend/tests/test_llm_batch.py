@@ -0,0 +1,75 @@
+import json
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app.services.llm_batch import BatchTransport, build_batch_line
+
+pytestmark = pytest.mark.asyncio
+
+
+def _batch_stand_in():
+    """In-memory /files + /batches endpoints that 'complete' batches instantly."""
+    files, batches = {}, {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/v1/files" and request.method == "POST":
+            file_id = f"file-{len(files)}"
+            # multipart body: keep only the JSONL lines
+            body = request.content.decode()
+            files[file_id] = "\n".join(l for l in body.splitlines() if l.startswith("{"))
+            return httpx.Response(200, json={
+                "id": file_id, "object": "file", "bytes": len(body), "created_at": 0,
+                "filename": "batch_input.jsonl", "purpose": "batch", "status": "processed",
+            })
+        if path == "/v1/batches" and request.method == "POST":
+            payload = json.loads(request.content)
+            batch_id = f"batch-{len(batches)}"
+            outputs, errors = [], []
+            for raw in files[payload["input_file_id"]].splitlines():
+                line = json.loads(raw)
+                if "fail" in line["body"]["messages"][0]["content"]:
+                    errors.append({"custom_id": line["custom_id"], "response": None,
+                                   "error": {"code": "server_error", "message": "boom"}})
+                    continue
+                outputs.append({"custom_id": line["custom_id"], "response": {"status_code": 200, "body": {
+                    "choices": [{"message": {"role": "assistant", "content": "done " + line["custom_id"]}}]
+                }}})
+            files[f"{batch_id}-out"] = "\n".join(json.dumps(o) for o in outputs)
+            files[f"{batch_id}-err"] = "\n".join(json.dumps(e) for e in errors)
+            batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": payload["endpoint"],
+                "input_file_id": payload["input_file_id"], "completion_window": "24h",
+                "status": "completed", "created_at": 0,
+                "output_file_id": f"{batch_id}-out", "error_file_id": f"{batch_id}-err",
+            }
+            return httpx.Response(200, json=batches[batch_id])
+        if path.startswith("/v1/batches/"):
+            return httpx.Response(200, json=batches[path.rsplit("/", 1)[1]])
+        if path.startswith("/v1/files/") and path.endswith("/content"):
+            return httpx.Response(200, text=files[path.split("/")[3]])
+        return httpx.Response(404, json={"error": {"message": "not found"}})
+
+    return handler
+
+
+async def test_submit_and_poll_round_trip(tmp_path):
+    client = AsyncOpenAI(
+        api_key="sk-test",
+        base_url="http://batch.local/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(_batch_stand_in())),
+    )
+    transport = BatchTransport(client, batch_dir=tmp_path)
+    lines = [
+        build_batch_line("t1", "gpt-3.5-turbo", [{"role": "user", "content": "write a memo"}], max_tokens=10),
+        build_batch_line("t2", "gpt-3.5-turbo", [{"role": "user", "content": "please fail"}]),
+    ]
+
+    batch_id = await transport.submit(lines)
+    result = await transport.poll(batch_id)
+
+    assert result.done and not result.failed
+    assert result.outputs == {"t1": "done t1", "t2": None}
+    assert (tmp_path / f"{batch_id}.jsonl").read_text().count("\n") == 2
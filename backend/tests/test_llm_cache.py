@@ -0,0 +1,34 @@
+import time
+
+from app.services.llm_cache import CompletionCache
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def test_key_is_stable_and_param_sensitive():
+    key = CompletionCache.make_key("gpt-4", MESSAGES, {"temperature": 0.7, "max_tokens": 10})
+    same = CompletionCache.make_key("gpt-4", MESSAGES, {"max_tokens": 10, "temperature": 0.7})
+    other = CompletionCache.make_key("gpt-4", MESSAGES, {"temperature": 0.2, "max_tokens": 10})
+    assert key == same
+    assert key != other
+
+
+def test_lru_eviction_and_counters():
+    cache = CompletionCache(max_entries=2, ttl_sec=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)  # evicts "b"
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_ttl_expiry():
+    cache = CompletionCache(max_entries=10, ttl_sec=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
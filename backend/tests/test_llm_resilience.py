@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+import httpx
+import openai
+import pytest
+from openai import AsyncOpenAI
+
+from app.services.llm_cache import CompletionCache
+from app.services.llm_gateway import LLMGateway
+from app.services.llm_resilience import CircuitOpenError, RetryPolicy, hedged
+
+pytestmark = pytest.mark.asyncio
+
+
+def _completion(content="ok"):
+    return {
+        "id": "cmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+    }
+
+
+def _gateway(faults, delays=None, **kwargs):
+    """Gateway whose HTTP transport replays *faults* (status codes) before succeeding.
+
+    *delays* optionally holds per-request latencies in seconds, consumed in order.
+    """
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        if delays:
+            await asyncio.sleep(delays.pop(0))
+        if faults:
+            return httpx.Response(faults.pop(0), json={"error": {"message": "injected"}})
+        return httpx.Response(200, json=_completion())
+
+    gateway = LLMGateway(
+        api_key="sk-test",
+        cache=CompletionCache(max_entries=0),
+        retry=RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.02),
+        **kwargs,
+    )
+    gateway.client = AsyncOpenAI(
+        api_key="sk-test",
+        base_url="http://llm.local/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        max_retries=0,
+    )
+    return gateway, calls
+
+
+async def _chat(gateway):
+    return await gateway.chat_completion(
+        call_site="test", model="gpt-4", messages=[{"role": "user", "content": "hi"}]
+    )
+
+
+async def test_retries_429_and_5xx_then_succeeds():
+    gateway, calls = _gateway([429, 503])
+
+    response = await _chat(gateway)
+
+    assert response.choices[0].message.content == "ok"
+    assert len(calls) == 3
+    assert gateway.resilience_stats()["retries"] == 2
+
+
+async def test_client_errors_are_not_retried():
+    gateway, calls = _gateway([400])
+
+    with pytest.raises(openai.BadRequestError):
+        await _chat(gateway)
+    assert len(calls) == 1
+
+
+async def test_breaker_opens_and_recovers_via_probe():
+    gateway, calls = _gateway([500] * 3, breaker_threshold=3, breaker_reset_sec=0.05)
+
+    with pytest.raises(openai.InternalServerError):
+        await _chat(gateway)
+    with pytest.raises(CircuitOpenError):
+        await _chat(gateway)  # fails fast, no HTTP request
+    assert len(calls) == 3
+
+    await asyncio.sleep(0.06)
+    await _chat(gateway)  # half-open probe succeeds
+    assert gateway.resilience_stats()["breakers"]["gpt-4"]["state"] == "closed"
+
+
+async def test_cancelled_probe_does_not_wedge_breaker():
+    gateway, calls = _gateway([500] * 3, delays=[0, 0, 0, 1], breaker_threshold=3, breaker_reset_sec=0.01)
+    with pytest.raises(openai.InternalServerError):
+        await _chat(gateway)
+    await asyncio.sleep(0.02)
+
+    probe = asyncio.ensure_future(_chat(gateway))
+    await asyncio.sleep(0.02)  # the probe is admitted, then abandoned
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    await _chat(gateway)  # next call may probe instead of failing fast
+    assert gateway.resilience_stats()["breakers"]["gpt-4"]["state"] == "closed"
+
+
+async def test_hedged_request_returns_faster_copy():
+    delays = [0.5, 0.01]
+    cancelled = []
+
+    async def attempt():
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    assert await hedged(attempt, delay=0.05) == 0.01
+    await asyncio.sleep(0)
+    assert cancelled == [0.5]
+
+
+async def test_hedged_copy_gets_the_budget_left_after_the_hedge_delay():
+    gateway, _ = _gateway([], hedging=True)
+    gateway._hedge_delay = lambda model: 0.1
+    budgets = []
+
+    async def attempt(remaining):
+        budgets.append(remaining)
+        await asyncio.sleep(1 if len(budgets) == 1 else 0.01)
+        return "ok"
+
+    assert await gateway._call_resilient("test", "gpt-4", attempt, timeout=1.0, hedge=True) == "ok"
+    first, second = budgets
+    assert first == pytest.approx(1.0, abs=0.02)
+    assert second <= first - 0.09
+    assert gateway.hedges_sent == 1
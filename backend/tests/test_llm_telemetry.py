@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from app.services.llm_telemetry import LLMTelemetry, estimate_cost
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_aggregates_per_call_site_and_model(tmp_path):
+    sink = tmp_path / "llm.jsonl"
+    telemetry = LLMTelemetry(jsonl_path=str(sink))
+
+    telemetry.record(call_site="chat", model="gpt-4", latency_sec=1.2, prompt_tokens=800, completion_tokens=200)
+    telemetry.record(call_site="chat", model="gpt-4", latency_sec=0.0, status="cache_hit")
+    telemetry.record(call_site="worker", model="gpt-3.5-turbo", latency_sec=30.5, status="error", error=TimeoutError())
+    await telemetry.flush()
+
+    snapshot = telemetry.snapshot()
+    chat = snapshot["call_sites"]["chat"]["gpt-4"]
+    assert chat["calls"] == 2 and chat["cache_hits"] == 1
+    assert chat["cost_usd"] == pytest.approx(0.036)
+    assert chat["latency_ms"]["buckets"]["le_2500"] == 1
+    worker = snapshot["call_sites"]["worker"]["gpt-3.5-turbo"]
+    assert worker["error_types"] == {"TimeoutError": 1}
+    assert worker["latency_ms"]["buckets"]["le_60000"] == 1
+    assert snapshot["totals"]["prompt_tokens"] == 800
+
+    lines = [json.loads(line) for line in sink.read_text().splitlines()]
+    assert [line["status"] for line in lines] == ["ok", "cache_hit", "error"]
+
+
+async def test_dated_model_snapshots_are_priced_by_family():
+    assert estimate_cost("gpt-4-0613", 1000, 0) == pytest.approx(0.03)
+    assert estimate_cost("mystery-model", 1000, 1000) is None
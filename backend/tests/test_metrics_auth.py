@@ -0,0 +1,21 @@
+import uuid
+
+import httpx
+import jwt
+import pytest
+
+from app.main import app
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.mark.parametrize("path", ["/api/metrics/llm", "/api/metrics/db"])
+async def test_metrics_require_a_bearer_token(path):
+    token = jwt.encode({"sub": str(uuid.uuid4()), "email": "ops@example.com"}, "placeholder-secret", algorithm="HS256")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        anonymous = await client.get(path)
+        authorized = await client.get(path, headers={"Authorization": f"Bearer {token}"})
+
+    assert anonymous.status_code == 401
+    assert authorized.status_code == 200
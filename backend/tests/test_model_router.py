@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.services.model_router import BACKGROUND, INTERACTIVE, SUGGESTION, ModelRouter
+
+pytestmark = pytest.mark.asyncio
+
+
+class _FakeGateway:
+    """Records the model of every call; models in `failing` raise."""
+
+    def __init__(self, failing=None):
+        self.failing = failing or {}
+        self.models = []
+
+    async def chat_completion(self, *, call_site, model, messages, **params):
+        self.models.append(model)
+        if model in self.failing:
+            raise self.failing[model]
+        usage = SimpleNamespace(prompt_tokens=12, completion_tokens=3)
+        return SimpleNamespace(model=model, usage=usage)
+
+
+def _rate_limited():
+    response = httpx.Response(429, request=httpx.Request("POST", "http://llm.local/v1/chat/completions"))
+    return openai.RateLimitError("slow down", response=response, body=None)
+
+
+async def test_routes_by_class_and_call_site():
+    router = ModelRouter(_FakeGateway())
+    messages = [{"role": "user", "content": "hi"}]
+
+    assert router.pick_model(INTERACTIVE, "chat") == "gpt-4"
+    assert router.pick_model(BACKGROUND, "worker") == "gpt-3.5-turbo"
+    assert router.pick_model(SUGGESTION, "company_suggest") == "gpt-3.5-turbo"
+    # Structured suggestions go to a model with schema-enforced output
+    assert router.pick_model(SUGGESTION, "suggestions") == "gpt-4o"
+    # Oversized suggestion prompts are downgraded to the cheaper tier
+    assert router.pick_model(SUGGESTION, "suggestions", prompt_tokens=5000) == "gpt-3.5-turbo"
+    # Prompts beyond the premium context window skip it entirely
+    assert router.pick_model(INTERACTIVE, "chat", prompt_tokens=9000) == "gpt-3.5-turbo"
+
+    response = await router.chat_completion(request_class=INTERACTIVE, call_site="chat", messages=messages)
+    assert response.model == "gpt-4"
+    assert router.stats()["premium"]["completion_tokens"] == 3
+
+
+async def test_rate_limited_tier_falls_back_and_cools_down():
+    gateway = _FakeGateway(failing={"gpt-4": _rate_limited()})
+    router = ModelRouter(gateway, cooldown_sec=60)
+    messages = [{"role": "user", "content": "hi"}]
+
+    first = await router.chat_completion(request_class=INTERACTIVE, call_site="chat", messages=messages)
+    second = await router.chat_completion(request_class=INTERACTIVE, call_site="chat", messages=messages)
+
+    assert first.model == second.model == "gpt-3.5-turbo"
+    # The second request skipped the cooling-down primary
+    assert gateway.models == ["gpt-4", "gpt-3.5-turbo", "gpt-3.5-turbo"]
+    stats = router.stats()["premium"]
+    assert stats["rate_limited"] == 1 and stats["fallbacks"] == 1 and stats["cooling_down"]
+
+
+async def test_last_tier_failure_propagates():
+    gateway = _FakeGateway(failing={"gpt-3.5-turbo": asyncio.TimeoutError()})
+    router = ModelRouter(gateway)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await router.chat_completion(request_class=BACKGROUND, call_site="worker", messages=[])
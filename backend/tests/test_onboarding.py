@@ -0,0 +1,107 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import jwt
+import pytest
+
+from app.main import app
+from app.models import RoleEnum
+from app.services.openai_service import OpenAIService
+from app.services.supabase_service import supabase_service
+
+pytestmark = pytest.mark.asyncio
+
+
+class _Router:
+    """Answers initial-task prompts per role; *failing* roles raise."""
+
+    def __init__(self, role_prompts, failing=()):
+        self.roles = {prompt: role for role, prompt in role_prompts.items()}
+        self.failing = set(failing)
+        self.in_flight = self.max_in_flight = 0
+
+    async def chat_completion(self, messages, **kwargs):
+        role = self.roles[messages[0]["content"]]
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.05)
+            if role in self.failing:
+                raise RuntimeError(f"{role.value} completion failed")
+        finally:
+            self.in_flight -= 1
+        content = f"{role.value} task one\n{role.value} task two\n"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _service(failing=()):
+    service = OpenAIService()
+    service.gateway = SimpleNamespace(enabled=True)
+    service.router = _Router(service.role_prompts, failing)
+    return service
+
+
+async def test_initial_tasks_are_generated_concurrently_per_role():
+    service = _service()
+
+    tasks = await service.generate_initial_tasks(RoleEnum.CEO)
+
+    assert service.router.max_in_flight == 2
+    assert [(t["assigned_to_role"], t["description"]) for t in tasks] == [
+        (RoleEnum.CTO, "CTO task one"),
+        (RoleEnum.CTO, "CTO task two"),
+        (RoleEnum.CMO, "CMO task one"),
+        (RoleEnum.CMO, "CMO task two"),
+    ]
+
+
+async def test_one_failing_role_keeps_the_other_roles_tasks():
+    service = _service(failing=[RoleEnum.CMO])
+
+    tasks = await service.generate_initial_tasks(RoleEnum.CEO)
+
+    assert {t["assigned_to_role"] for t in tasks} == {RoleEnum.CTO}
+    assert len(tasks) == 2
+
+    with pytest.raises(RuntimeError):
+        await _service(failing=[RoleEnum.CTO, RoleEnum.CMO]).generate_initial_tasks(RoleEnum.CEO)
+
+
+async def test_onboarding_inserts_agents_and_tasks_in_one_call_each(monkeypatch, tmp_path):
+    # Mock mode; onboarding creates a workspace folder relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    inserts = {"agents": [], "tasks": []}
+    create_agents_bulk, create_tasks_bulk = supabase_service.create_agents_bulk, supabase_service.create_tasks_bulk
+
+    async def recording_agents_bulk(rows):
+        inserts["agents"].append(rows)
+        return await create_agents_bulk(rows)
+
+    async def recording_tasks_bulk(rows):
+        inserts["tasks"].append(rows)
+        return await create_tasks_bulk(rows)
+
+    monkeypatch.setattr(supabase_service, "create_agents_bulk", recording_agents_bulk)
+    monkeypatch.setattr(supabase_service, "create_tasks_bulk", recording_tasks_bulk)
+
+    auth_id, email = str(uuid.uuid4()), f"{uuid.uuid4().hex}@example.com"
+    token = jwt.encode({"sub": auth_id, "email": email}, "placeholder-secret", algorithm="HS256")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # ASGITransport runs the background task before returning
+        response = await client.post(
+            "/api/users/onboard",
+            json={"email": email, "role": "CTO"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert response.status_code == 201
+    user_id = response.json()["id"]
+    [agent_rows] = inserts["agents"]
+    assert {row["role"] for row in agent_rows} == {RoleEnum.CEO, RoleEnum.CMO}
+    [task_rows] = inserts["tasks"]
+    assert {row["assigned_to_role"] for row in task_rows} == {RoleEnum.CEO, RoleEnum.CMO}
+    assert all(row["user_id"] == user_id and row["auth_user_id"] == auth_id for row in task_rows)
+    assert len(await supabase_service.get_tasks_by_user(user_id)) == len(task_rows)
@@ -0,0 +1,58 @@
+from app.services.prompt_budget import (
+    PromptAssembler,
+    count_message_tokens,
+    count_prompt_tokens,
+    count_tokens,
+)
+
+
+def _history(turns):
+    return [
+        {"role": "user" if n % 2 == 0 else "assistant", "content": f"turn {n}: " + "word " * 20}
+        for n in range(turns)
+    ]
+
+
+def test_count_tokens_grows_with_text():
+    assert count_tokens("") == 0
+    assert 0 < count_tokens("hello world") < count_tokens("hello world " * 50)
+    message = {"role": "user", "content": "hello world"}
+    assert count_message_tokens(message) > count_tokens("hello world")
+
+
+def test_everything_fits_under_a_large_budget():
+    history = _history(4)
+    result = PromptAssembler(budget=10_000).assemble(
+        "You are the CTO.", "What next?", role_context="Stage: seed", coordination={"CEO": {"message_count": 2}}, history=history
+    )
+
+    assert result.history_included == 4 and result.history_dropped == 0
+    assert [m["role"] for m in result.messages] == ["system", "system", "system", *[m["role"] for m in history], "user"]
+    assert result.total_tokens == count_prompt_tokens(result.messages)
+
+
+def test_trimming_drops_oldest_history_first_and_keeps_the_ends():
+    history = _history(10)
+    system_prompt, user_message = "You are the CTO.", "What should we build next?"
+    # Room for the fixed parts plus roughly three history messages
+    fixed = count_prompt_tokens([{"content": system_prompt}, {"content": user_message}])
+    budget = fixed + 3 * count_message_tokens(history[-1]) + 1
+
+    result = PromptAssembler(budget=budget).assemble(system_prompt, user_message, history=history)
+
+    assert result.messages[0] == {"role": "system", "content": system_prompt}
+    assert result.messages[-1] == {"role": "user", "content": user_message}
+    assert result.messages[1:-1] == history[-3:]  # newest kept, in order
+    assert result.history_dropped == 7
+    assert result.total_tokens == count_prompt_tokens(result.messages) <= budget
+
+
+def test_optional_sections_are_dropped_before_overflowing():
+    result = PromptAssembler(budget=40).assemble(
+        "You are the CMO.", "Plan a launch.", role_context="context " * 200, history=_history(3)
+    )
+
+    assert result.section_tokens["role_context"] == 0
+    assert [m["role"] for m in result.messages][0] == "system"
+    assert result.messages[-1]["content"] == "Plan a launch."
+    assert result.total_tokens <= 40
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "done"
+
+    results = await asyncio.gather(*(flight.do("user-1", work) for _ in range(5)))
+
+    assert results == ["done"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "started": 1, "joined": 4}
+
+
+async def test_exceptions_propagate_to_every_caller():
+    flight = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("nope")
+
+    results = await asyncio.gather(
+        flight.do("k", boom), flight.do("k", boom), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.in_flight() == 0
+
+
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return 42
+
+    leader = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == 42
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.models import CompanyContextSuggestions, ProactiveSuggestionList
+from app.services.llm_cache import CompletionCache
+from app.services.llm_gateway import LLMGateway
+from app.services.llm_telemetry import LLMTelemetry
+from app.services.llm_telemetry import llm_telemetry
+from app.services.model_router import SUGGESTION, ModelRouter
+from app.services.structured_output import generate_structured, response_format_for, strict_json_schema
+
+pytestmark = pytest.mark.asyncio
+
+_VALID = '{"company_info": "a", "product_overview": "b", "tech_stack": "c", "go_to_market_strategy": "d"}'
+
+
+class _ScriptedGateway:
+    """Returns the scripted replies in order and records request params."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    async def chat_completion(self, *, call_site, model, messages, **params):
+        self.requests.append({"model": model, "messages": messages, **params})
+        usage = SimpleNamespace(total_tokens=50, prompt_tokens=40, completion_tokens=10)
+        message = SimpleNamespace(content=self.replies.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+async def _generate(gateway, call_site, schema_model=CompanyContextSuggestions):
+    return await generate_structured(
+        ModelRouter(gateway),
+        schema_model=schema_model,
+        request_class=SUGGESTION,
+        call_site=call_site,
+        messages=[{"role": "user", "content": "Suggest context as JSON"}],
+    )
+
+
+async def test_response_format_depends_on_model():
+    assert response_format_for("gpt-4", CompanyContextSuggestions) == {}
+    assert response_format_for("gpt-3.5-turbo", CompanyContextSuggestions) == {"response_format": {"type": "json_object"}}
+    strict = response_format_for("gpt-4o-mini", ProactiveSuggestionList)["response_format"]["json_schema"]
+    assert strict["strict"] is True
+
+    schema = strict_json_schema(ProactiveSuggestionList)
+    item = schema["$defs"]["ProactiveSuggestion"]
+    assert item["additionalProperties"] is False
+    assert set(item["required"]) == {"type", "message", "action", "priority"}
+
+
+async def test_suggestions_request_schema_enforced_output():
+    reply = '{"suggestions": [{"type": "growth", "message": "m", "action": "a", "priority": "high"}]}'
+    gateway = _ScriptedGateway(reply)
+
+    result = await _generate(gateway, "suggestions", schema_model=ProactiveSuggestionList)
+
+    assert result.suggestions[0].priority == "high"
+    [request] = gateway.requests
+    assert request["model"] == "gpt-4o"
+    assert request["response_format"]["type"] == "json_schema"
+    assert request["response_format"]["json_schema"]["name"] == "ProactiveSuggestionList"
+
+
+async def test_fenced_output_is_repaired_locally():
+    gateway = _ScriptedGateway("Sure! ```json\n" + _VALID + "\n```")
+
+    result = await _generate(gateway, "test_local_repair")
+
+    assert result.tech_stack == "c"
+    assert len(gateway.requests) == 1
+    assert llm_telemetry.snapshot()["structured_output"]["test_local_repair"] == {"wasted_tokens": 0, "repaired_locally": 1}
+
+
+async def test_invalid_output_gets_one_model_repair_then_gives_up():
+    gateway = _ScriptedGateway('{"company_info": "a"}', _VALID)
+    assert (await _generate(gateway, "test_model_repair")).company_info == "a"
+    # The repair request shows the model its own reply and the validation errors
+    assert "product_overview" in gateway.requests[1]["messages"][-1]["content"]
+
+    gateway = _ScriptedGateway("not json", "still not json")
+    assert await _generate(gateway, "test_give_up") is None
+
+    counts = llm_telemetry.snapshot()["structured_output"]
+    assert counts["test_model_repair"] == {"wasted_tokens": 50, "invalid": 1, "repaired_by_model": 1}
+    assert counts["test_give_up"] == {"wasted_tokens": 100, "invalid": 2, "failed": 1}
+
+
+class _Article(BaseModel):
+    title: str
+    default: Optional[str] = None
+
+
+async def test_fields_named_like_schema_keywords_are_kept():
+    schema = strict_json_schema(_Article)
+
+    assert set(schema["properties"]) == {"title", "default"}
+    assert schema["required"] == ["title", "default"]
+    assert "title" not in schema["properties"]["title"]
+
+
+async def test_only_usable_replies_are_cached():
+    replies = ["not json", "still not json", "not json", "still not json", _VALID]
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content=replies[len(calls) - 1])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    gateway = LLMGateway(
+        api_key="sk-placeholder_key",
+        cache=CompletionCache(max_entries=10),
+        telemetry=LLMTelemetry(jsonl_path=None),
+    )
+    gateway.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    assert await _generate(gateway, "test_cache_failed") is None
+    # The retry reaches the model again instead of replaying the bad reply
+    assert await _generate(gateway, "test_cache_failed") is None
+    assert (await _generate(gateway, "test_cache_ok")).company_info == "a"
+    assert (await _generate(gateway, "test_cache_ok")).company_info == "a"
+
+    assert len(calls) == 5
+    await gateway.aclose()
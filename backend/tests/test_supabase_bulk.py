@@ -0,0 +1,87 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.supabase_service import SupabaseService
+
+pytestmark = pytest.mark.asyncio
+
+
+class _Query:
+    def __init__(self, log, table):
+        self.log = log
+        self.table = table
+        self.rows = None
+
+    def insert(self, rows):
+        self.log.append((self.table, "insert", rows, None))
+        self.rows = rows
+        return self
+
+    def upsert(self, rows, on_conflict=""):
+        self.log.append((self.table, "upsert", rows, on_conflict))
+        self.rows = rows
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=list(self.rows))
+
+
+class _FakeClient:
+    """Records PostgREST requests instead of sending them."""
+
+    def __init__(self):
+        self.requests = []
+
+    def table(self, name):
+        return _Query(self.requests, name)
+
+
+def _service_with_fake_client():
+    service = SupabaseService()
+    service.client = _FakeClient()
+    return service
+
+
+async def test_bulk_inserts_send_one_sanitized_request():
+    service = _service_with_fake_client()
+    user_id = uuid.uuid4()
+
+    agents = await service.create_agents_bulk(
+        [{"user_id": user_id, "role": role, "conversation_state": {}, "bogus": 1} for role in ("CTO", "CMO")]
+    )
+    await service.create_tasks_bulk(
+        [{"user_id": user_id, "assigned_to_role": "CEO", "description": f"Task {i}", "extra": True} for i in range(20)]
+    )
+
+    assert [(table, op) for table, op, _, _ in service.client.requests] == [("agents", "insert"), ("tasks", "insert")]
+    assert agents[0] == {"user_id": str(user_id), "role": "CTO", "conversation_state": {}}
+    assert len(service.client.requests[1][2]) == 20
+    assert all("extra" not in row for row in service.client.requests[1][2])
+
+
+async def test_upsert_passes_conflict_target():
+    service = _service_with_fake_client()
+
+    await service.upsert_tasks([{"id": "t1", "description": "Ship it", "status": "completed", "junk": 1}])
+
+    assert service.client.requests == [
+        ("tasks", "upsert", [{"id": "t1", "description": "Ship it", "status": "completed"}], "id")
+    ]
+
+
+async def test_mock_mode_upsert_merges_existing_rows():
+    service = SupabaseService()
+    assert service.client is None
+    created = await service.create_tasks_bulk(
+        [{"user_id": "u1", "assigned_to_role": "CEO", "description": "Draft", "status": "pending"}]
+    )
+
+    updated = await service.upsert_tasks(
+        [{"id": created[0]["id"], "status": "completed"}, {"id": "new-id", "user_id": "u1", "description": "New"}]
+    )
+
+    assert updated[0]["status"] == "completed" and updated[0]["description"] == "Draft"
+    assert updated[1]["id"] == "new-id"
+    assert len(await service.get_tasks_by_user("u1")) == 2
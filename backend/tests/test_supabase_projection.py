@@ -0,0 +1,72 @@
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.services.supabase_service import AGENT_SUMMARY_COLUMNS, SupabaseService
+
+pytestmark = pytest.mark.asyncio
+
+
+class _Query:
+    def __init__(self, log, table, rows):
+        self.log = log
+        self.table = table
+        self.rows = rows
+        self.params = httpx.QueryParams()
+
+    def select(self, columns):
+        self.log.append((self.table, columns))
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=list(self.rows))
+
+
+class _FakeClient:
+    """Records the projection of each PostgREST read."""
+
+    def __init__(self, rows):
+        self.selects = []
+        self.rows = rows
+
+    def table(self, name):
+        return _Query(self.selects, name, self.rows)
+
+
+async def test_reads_send_an_explicit_projection():
+    service = SupabaseService()
+    service.client = _FakeClient([{"id": "u1", "role": "CEO"}])
+    user_id = str(uuid.uuid4())
+
+    await service.get_user_by_email("p@example.com", columns="id,role")
+    await service.get_agent_summaries(user_id)
+    await service.get_tasks_by_user(user_id)
+
+    assert service.client.selects[0] == ("users", "id,role")
+    assert service.client.selects[1] == ("agents", AGENT_SUMMARY_COLUMNS)
+    assert all(columns != "*" for _, columns in service.client.selects)
+
+
+async def test_mock_agent_summaries_omit_the_message_history():
+    service = SupabaseService()
+    service.client = None
+    user = await service.create_user({"email": "p@example.com", "role": "CEO"})
+    agent = await service.create_agent({"user_id": user["id"], "role": "CTO"})
+    await service.update_agent_conversation(agent["id"], {
+        "messages": [{"role": "user", "content": "hi"}] * 3,
+        "message_count": 3,
+        "topics_discussed": ["hiring"],
+    })
+
+    [summary] = await service.get_agent_summaries(user["id"])
+
+    assert "conversation_state" not in summary
+    assert summary["message_count"] == 3
+    assert summary["topics_discussed"] == ["hiring"]
+    assert summary["sentiment"] is None
+    assert await service.get_user_by_id(user["id"], columns="id,role") == {"id": user["id"], "role": "CEO"}
@@ -0,0 +1,129 @@
+import uuid
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.main import app
+from app.services.supabase_service import SupabaseService, encode_task_cursor, supabase_service
+from app.utils.deadline import DeadlineExceeded
+
+pytestmark = pytest.mark.asyncio
+
+
+class _Query:
+    """Stands in for a PostgREST select builder and keeps its query string."""
+
+    def __init__(self):
+        self.params = httpx.QueryParams()
+
+    def select(self, columns, count=None):
+        self.params = self.params.add("select", columns)
+        return self
+
+    def eq(self, column, value):
+        self.params = self.params.add(column, f"eq.{value}")
+        return self
+
+    def limit(self, n):
+        self.params = self.params.add("limit", str(n))
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[], count=0)
+
+
+class _FakeClient:
+    def __init__(self):
+        self.queries = []
+
+    def table(self, name):
+        self.queries.append(_Query())
+        return self.queries[-1]
+
+
+async def test_filters_order_and_cursor_are_pushed_down():
+    service = SupabaseService()
+    service.client = _FakeClient()
+    task_id = str(uuid.uuid4())
+    cursor = encode_task_cursor({"created_at": "2024-05-01T10:00:00+00:00", "id": task_id})
+
+    await service.get_tasks_by_user("u1", status="pending", role="CTO", limit=21, cursor=cursor)
+
+    params = service.client.queries[0].params
+    assert params["status"] == "eq.pending"
+    assert params["assigned_to_role"] == "eq.CTO"
+    assert params["or"] == (
+        '(created_at.lt."2024-05-01T10:00:00+00:00",'
+        f'and(created_at.eq."2024-05-01T10:00:00+00:00",id.lt.{task_id}))'
+    )
+    assert params.get_list("order") == ["created_at.desc,id.desc"]
+    assert params["limit"] == "21"
+
+
+async def test_cursor_for_other_order_is_rejected():
+    cursor = encode_task_cursor({"created_at": "2024-05-01T10:00:00+00:00", "id": str(uuid.uuid4())}, "asc")
+
+    with pytest.raises(ValueError):
+        await SupabaseService().get_tasks_by_user("u1", cursor=cursor)
+
+
+@pytest.mark.parametrize("created_at, task_id", [
+    ('2024-05-01",status.eq.completed', str(uuid.uuid4())),
+    ("2024-05-01T10:00:00+00:00", "x),status.eq.completed,id.gt.(x"),
+    (1714557600, str(uuid.uuid4())),
+])
+async def test_forged_cursor_is_rejected(created_at, task_id):
+    cursor = encode_task_cursor({"created_at": created_at, "id": task_id})
+
+    with pytest.raises(ValueError):
+        await SupabaseService().get_tasks_by_user("u1", cursor=cursor)
+
+
+async def test_task_pages_walk_every_task_once():
+    user_id = str(uuid.uuid4())
+    for n in range(5):
+        await supabase_service.create_task(
+            {"user_id": user_id, "assigned_to_role": "CMO" if n % 2 else "CEO", "description": f"task {n}", "status": "pending"}
+        )
+
+    seen, cursor = [], None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = (await client.get(f"/api/tasks/user/{user_id}/page", params=params)).json()
+            seen += [task["id"] for task in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        cmo = (await client.get(f"/api/tasks/role/CMO/user/{user_id}/page")).json()
+        bad = await client.get(f"/api/tasks/user/{user_id}/page", params={"cursor": "not-a-cursor"})
+
+    assert len(seen) == len(set(seen)) == 5
+    assert len(cmo["items"]) == 2 and cmo["next_cursor"] is None
+    assert bad.status_code == 400
+
+
+async def test_query_failures_are_errors_not_an_empty_last_page(monkeypatch):
+    class _FailingQuery(_Query):
+        def execute(self):
+            raise self.error
+
+    class _FailingClient:
+        def __init__(self, error):
+            self.error = error
+
+        def table(self, name):
+            query = _FailingQuery()
+            query.error = self.error
+            return query
+
+    user_id = str(uuid.uuid4())
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        monkeypatch.setattr(supabase_service, "client", _FailingClient(RuntimeError("PostgREST 400")))
+        failed = await client.get(f"/api/tasks/user/{user_id}/page")
+        monkeypatch.setattr(supabase_service, "client", _FailingClient(DeadlineExceeded("request deadline exceeded")))
+        timed_out = await client.get(f"/api/tasks/role/CTO/user/{user_id}/page")
+
+    assert failed.status_code == 500
+    assert timed_out.status_code == 504
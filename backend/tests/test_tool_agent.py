@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents import executor
+from app.agents.executor import ToolAgent
+from app.agents.tools.base import BaseTool
+from app.dev.fake_openai import FakeLLMConfig
+from app.services.llm_cache import CompletionCache
+from app.services.llm_gateway import LLMGateway
+from app.services.model_router import ModelRouter
+from app.utils.deadline import request_deadline
+
+pytestmark = pytest.mark.asyncio
+
+
+class _SlowTool(BaseTool):
+    def __init__(self, name, delay, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.spans = []
+
+    async def run(self, **kwargs):
+        started = time.monotonic()
+        await asyncio.sleep(self.delay)
+        self.spans.append((started, time.monotonic()))
+        if self.fail:
+            raise RuntimeError(f"{self.name} broke")
+        return f"{self.name}:{kwargs['q']}"
+
+
+class _Registry:
+    def __init__(self, *tools):
+        self.tools = {tool.name: tool for tool in tools}
+
+    def get(self, name):
+        return self.tools.get(name)
+
+
+def _call(call_id, name, **args):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(args)))
+
+
+async def test_tool_calls_run_concurrently_keyed_by_call_id():
+    search, scrape = _SlowTool("search", 0.2), _SlowTool("scrape", 0.2)
+    agent = ToolAgent()
+    agent.registry = _Registry(search, scrape)
+    calls = [_call("call_a", "search", q="one"), _call("call_b", "scrape", q="two"), _call("call_c", "search", q="three")]
+
+    started = time.monotonic()
+    outputs = await agent._run_tool_calls(calls, user_id=None)
+
+    assert time.monotonic() - started < 0.35  # three 0.2s tools, not 0.6s
+    (a_start, a_end), (b_start, b_end) = search.spans[0], scrape.spans[0]
+    assert a_start < b_end and b_start < a_end  # overlapping in time
+    # Repeated calls to one tool keep separate results
+    assert {call_id: out["result"] for call_id, out in outputs.items()} == {
+        "call_a": "search:one",
+        "call_b": "scrape:two",
+        "call_c": "search:three",
+    }
+
+
+async def test_failing_tool_does_not_lose_the_other_results():
+    agent = ToolAgent()
+    agent.registry = _Registry(_SlowTool("search", 0.05), _SlowTool("scrape", 0.01, fail=True))
+
+    outputs = await agent._run_tool_calls(
+        [_call("call_ok", "search", q="x"), _call("call_bad", "scrape", q="y"), _call("call_unknown", "nope")],
+        user_id=None,
+    )
+
+    assert outputs["call_ok"]["result"] == "search:x"
+    assert outputs["call_bad"]["result"] == "[Tool execution error]: scrape broke"
+    assert outputs["call_unknown"]["result"] == "[Error] unknown tool nope"
+
+
+# ----------------------------------------------------------------------
+# Loop limits, against the fake OpenAI server scripted to keep calling tools
+# ----------------------------------------------------------------------
+
+_LOOKUP_SPEC = {
+    "type": "function",
+    "function": {
+        "name": "lookup",
+        "description": "Look something up",
+        "parameters": {"type": "object", "properties": {"q": {"type": "string"}}, "required": ["q"]},
+    },
+}
+
+
+def _looping_agent(server, tool_delay=0.0, **limits):
+    agent = ToolAgent(**limits)
+    agent.gateway = LLMGateway(
+        api_key="sk-placeholder_key", base_url=server.base_url, cache=CompletionCache(max_entries=0)
+    )
+    agent.router = ModelRouter(agent.gateway)
+    agent.registry = _Registry(_SlowTool("lookup", tool_delay))
+    agent._specs = [_LOOKUP_SPEC]
+    return agent
+
+
+def _stop_reason(caplog):
+    return next(r.getMessage() for r in caplog.records if "Tool agent stopped" in r.getMessage())
+
+
+_ALWAYS_TOOLS = [FakeLLMConfig(tool_rounds=1000)]
+
+
+@pytest.mark.parametrize("fake_openai_server", _ALWAYS_TOOLS, indirect=True)
+async def test_max_steps_ends_the_loop_with_a_final_answer(fake_openai_server, caplog):
+    agent = _looping_agent(fake_openai_server, max_steps=3)
+
+    with caplog.at_level(logging.INFO, logger="app.agents.executor"):
+        answer = await agent.chat("What should we do?")
+
+    assert answer
+    assert "after 3 step(s) (max_steps)" in _stop_reason(caplog)
+    assert fake_openai_server.fake.requests == 4  # three tool rounds + wrap-up
+    await agent.gateway.aclose()
+
+
+@pytest.mark.parametrize("fake_openai_server", _ALWAYS_TOOLS, indirect=True)
+async def test_token_budget_ends_the_loop_with_a_final_answer(fake_openai_server, caplog):
+    agent = _looping_agent(fake_openai_server, max_steps=10, token_budget=1)
+
+    with caplog.at_level(logging.INFO, logger="app.agents.executor"):
+        answer = await agent.chat("What should we do?")
+
+    assert answer
+    assert "after 1 step(s) (token_budget)" in _stop_reason(caplog)
+    assert fake_openai_server.fake.requests == 2
+    await agent.gateway.aclose()
+
+
+@pytest.mark.parametrize("fake_openai_server", _ALWAYS_TOOLS, indirect=True)
+async def test_deadline_ends_the_loop_with_a_final_answer(fake_openai_server, caplog):
+    agent = _looping_agent(fake_openai_server, tool_delay=0.1, max_steps=50, deadline_sec=0.3)
+
+    with caplog.at_level(logging.INFO, logger="app.agents.executor"):
+        answer = await agent.chat("What should we do?")
+
+    assert answer
+    assert "(deadline)" in _stop_reason(caplog)
+    assert fake_openai_server.fake.requests < 10
+    await agent.gateway.aclose()
+
+
+@pytest.mark.parametrize("fake_openai_server", _ALWAYS_TOOLS, indirect=True)
+async def test_loop_leaves_the_grace_period_for_the_wrap_up(fake_openai_server, caplog, monkeypatch):
+    monkeypatch.setattr(executor, "_FINAL_ANSWER_GRACE_SEC", 0.5)
+    agent = _looping_agent(fake_openai_server, tool_delay=0.1, max_steps=50, deadline_sec=60)
+
+    started = time.monotonic()
+    with caplog.at_level(logging.INFO, logger="app.agents.executor"), request_deadline(1.0):
+        # The loop may use 1.0 - 0.5 seconds; the wrap-up fits in the rest
+        answer = await agent.chat("What should we do?")
+
+    assert answer
+    assert "(deadline)" in _stop_reason(caplog)
+    assert time.monotonic() - started < 1.0
+    await agent.gateway.aclose()
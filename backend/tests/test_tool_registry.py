@@ -0,0 +1,37 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from app.agents.tools.registry import MANIFEST_PATH, ToolRegistry, build_manifest
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_manifest_specs_match_tool_classes():
+    # Fails when a tool changes without `python -m app.agents.tools.registry`
+    assert build_manifest() == json.loads(MANIFEST_PATH.read_text())
+
+
+async def test_specs_do_not_import_tool_modules():
+    script = (
+        "import sys\n"
+        "from app.agents.tools import tool_registry\n"
+        "specs = tool_registry.openai_specs()\n"
+        "heavy = [m for m in ('bs4', 'pdfplumber', 'duckduckgo_search', 'notion_client', 'app.agents.tools.read_pdf') if m in sys.modules]\n"
+        "print(len(specs), heavy)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "11 []"
+
+
+async def test_tools_are_instantiated_once_on_first_use():
+    registry = ToolRegistry(entry_point_group=None)
+    assert registry.loaded() == []
+
+    tool = registry.get("calendar_tool")
+
+    assert tool is registry.get("calendar_tool")
+    assert registry.loaded() == ["calendar_tool"]
+    assert registry.get("no_such_tool") is None
@@ -6,6 +6,7 @@ CREATE TABLE IF NOT EXISTS public.users (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     email VARCHAR(255) UNIQUE NOT NULL,
     role VARCHAR(10) NOT NULL CHECK (role IN ('CEO', 'CTO', 'CMO')),
+    auth_user_id TEXT,  -- Supabase Auth user ID
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -28,6 +29,7 @@ CREATE TABLE IF NOT EXISTS public.tasks (
     description TEXT NOT NULL,
     status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'in_progress', 'completed')),
     resources TEXT[] DEFAULT '{}',
+    auth_user_id TEXT,  -- owner's Supabase Auth user ID (workspace isolation)
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -49,9 +51,20 @@ CREATE TABLE IF NOT EXISTS public.companies (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Tables created before auth_user_id existed (same as add_auth_user_id.sql)
+ALTER TABLE public.users ADD COLUMN IF NOT EXISTS auth_user_id TEXT;
+ALTER TABLE public.tasks ADD COLUMN IF NOT EXISTS auth_user_id TEXT;
+
 -- Create indexes for better performance
+CREATE INDEX IF NOT EXISTS idx_users_auth_user_id ON public.users(auth_user_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_auth_user_id ON public.tasks(auth_user_id);
 CREATE INDEX IF NOT EXISTS idx_agents_user_id ON public.agents(user_id);
-CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON public.tasks(user_id);
+-- Task listings: filter by user (and status or role), keyset-paginate on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON public.tasks(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_status_created ON public.tasks(user_id, status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_role_created ON public.tasks(user_id, assigned_to_role, created_at DESC, id DESC);
+-- Superseded by idx_tasks_user_created
+DROP INDEX IF EXISTS public.idx_tasks_user_id;
 CREATE INDEX IF NOT EXISTS idx_tasks_status ON public.tasks(status);
 CREATE INDEX IF NOT EXISTS idx_companies_user_id ON public.companies(user_id);
 